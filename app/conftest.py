@@ -2,9 +2,36 @@ from decimal import Decimal
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from recipes.cache import reset_stats
 from recipes.models import Recipe
 from tags.models import Tag
 from ingredients.models import Ingredient
+from users.authentication import token_cache
+
+
+def clear_caches():
+    cache.clear()
+    caches["local"].clear()
+    token_cache.clear()
+    reset_stats()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Run every test with empty caches, leaving none behind."""
+    clear_caches()
+    yield
+    clear_caches()
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Store media in temporary directory and build image variants inline."""
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.RECIPES_IMAGE_WORKERS = 0
+    settings.MEDIA_URL_MAX_AGE = 0
+    return tmp_path
 
 
 @pytest.fixture
@@ -75,6 +102,22 @@ def create_example_recipe_3(example_user):
     recipe.image.delete()
 
 
+@pytest.fixture
+def create_example_recipes_list(example_user):
+    """Create and return list of Recipe objects."""
+
+    return [
+        Recipe.objects.create(
+            user=example_user,
+            title=f"Sample Recipe {_}",
+            time_minutes=5 * _,
+            price=Decimal(f"{_}.50"),
+            description="Sample Recipe Description.",
+        )
+        for _ in range(1, 6)
+    ]
+
+
 @pytest.fixture
 def create_example_recipe_for_user_2(example_user_2):
     """Create and return sample Recipe."""
@@ -0,0 +1,55 @@
+"""
+Signed URLs of uploaded media files.
+"""
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+
+
+MEDIA_SALT = "core.media-url"
+
+
+def _signature(name, expires):
+    return signing.Signer(salt=MEDIA_SALT).signature(f"{name}:{expires}")
+
+
+def media_url_epoch():
+    """
+    Return number of the current signing period.
+    URLs signed within one period share their expiry, so they stay the
+    same and cacheable for the whole period.
+    """
+
+    if not settings.MEDIA_URL_MAX_AGE:
+        return 0
+
+    return int(time.time()) // settings.MEDIA_URL_MAX_AGE
+
+
+def sign_media(name):
+    """Return query parameters granting access to media file name."""
+
+    expires = (media_url_epoch() + 2) * settings.MEDIA_URL_MAX_AGE
+    return {"expires": expires, "signature": _signature(name, expires)}
+
+
+def check_media_signature(name, expires, signature):
+    """
+    Return seconds left until signed access to media file name expires.
+    Returns None if the signature is invalid or expired.
+    """
+
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return None
+
+    left = expires - int(time.time())
+    if left <= 0 or not constant_time_compare(
+        signature or "", _signature(name, expires)
+    ):
+        return None
+
+    return left
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "recipes",
     "users",
     "rest_framework",
@@ -87,6 +88,38 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# The default file based cache is shared by all uwsgi workers of a container,
+# so invalidating a response in one worker is visible to the others.
+# Once it holds MAX_ENTRIES files, a third of them is removed at random, so
+# every entry must be safe to lose: cached responses, data versions (time
+# stamps, see recipes.cache), token versions (read back from the database)
+# and markers of valid tokens (a missing marker only costs a database
+# lookup). Revocations are never stored in the cache.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "/tmp/recipe-app-cache"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 10000)),
+        },
+    },
+    # Short lived per process cache for small hot responses.
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "recipe-app-local",
+        "TIMEOUT": int(os.environ.get("LOCAL_CACHE_TIMEOUT", 10)),
+    },
+}
+
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 300))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -129,6 +162,14 @@ MEDIA_URL = "/static/media/"
 MEDIA_ROOT = "/vol/web/media"
 STATIC_ROOT = "/vol/web/static"
 
+# Media files are served through signed URLs valid for one to two periods
+# of MEDIA_URL_MAX_AGE seconds, 0 leaves them unsigned. Django only checks
+# the signature and nginx sends the file from the internal location.
+MEDIA_URL_MAX_AGE = int(os.environ.get("MEDIA_URL_MAX_AGE", 24 * 60 * 60))
+MEDIA_ACCEL_REDIRECT_LOCATION = os.environ.get(
+    "MEDIA_ACCEL_REDIRECT_LOCATION", "" if DEBUG else "/protected-media/"
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -138,11 +179,81 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "users.User"
 
 
+# Signed stateless API tokens issued by the token endpoint, DRF tokens
+# stored in the database keep working either way.
+
+AUTH_SIGNED_TOKENS = bool(int(os.environ.get("AUTH_SIGNED_TOKENS", 1)))
+AUTH_TOKEN_MAX_AGE = int(os.environ.get("AUTH_TOKEN_MAX_AGE", 24 * 60 * 60))
+
+# Per-process cache of validated DRF tokens, a timeout of 0 disables it.
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", 1024))
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get("AUTH_TOKEN_CACHE_TIMEOUT", 60))
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
 
+# Recipe list pagination
+
+RECIPES_PAGE_SIZE = int(os.environ.get("RECIPES_PAGE_SIZE", 50))
+RECIPES_MAX_PAGE_SIZE = int(os.environ.get("RECIPES_MAX_PAGE_SIZE", 200))
+
+# Build Recipe list from .values() rows instead of model instances
+RECIPES_FAST_LIST = bool(int(os.environ.get("RECIPES_FAST_LIST", 0)))
+
+# Bulk Recipe import
+
+RECIPES_IMPORT_CHUNK_SIZE = int(
+    os.environ.get("RECIPES_IMPORT_CHUNK_SIZE", 500)
+)
+RECIPES_IMPORT_MAX_ITEMS = int(
+    os.environ.get("RECIPES_IMPORT_MAX_ITEMS", 10000)
+)
+
+# Bulk Recipe update and delete
+
+RECIPES_BULK_MAX_IDS = int(os.environ.get("RECIPES_BULK_MAX_IDS", 1000))
+
+# Streamed Recipe export
+
+RECIPES_EXPORT_CHUNK_SIZE = int(
+    os.environ.get("RECIPES_EXPORT_CHUNK_SIZE", 2000)
+)
+
+# Resized Recipe image variants, built by a pool of worker threads in every
+# process. With 0 workers they are built during the upload request.
+
+RECIPES_IMAGE_VARIANT_SIZES = [
+    int(size)
+    for size in os.environ.get(
+        "RECIPES_IMAGE_VARIANT_SIZES", "128,512,1024"
+    ).split(",")
+]
+RECIPES_IMAGE_WORKERS = int(os.environ.get("RECIPES_IMAGE_WORKERS", 2))
+# Formats Recipe images are also transcoded to, in order of preference, when
+# the installed Pillow can encode them. Clients list the ones they decode in
+# the Accept header of API requests. AVIF needs a Pillow plugin, as Pillow
+# itself cannot encode it.
+RECIPES_IMAGE_TRANSCODE_FORMATS = os.environ.get(
+    "RECIPES_IMAGE_TRANSCODE_FORMATS", "WEBP"
+).split(",")
+
+# Uploaded Recipe images are streamed to temporary files and rejected once
+# over RECIPES_IMAGE_MAX_BYTES, matching client_max_body_size of the proxy.
+# Dimensions are checked from the image header before anything is decoded.
+
+RECIPES_IMAGE_MAX_BYTES = int(
+    os.environ.get("RECIPES_IMAGE_MAX_BYTES", 10 * 1024 * 1024)
+)
+RECIPES_IMAGE_MAX_PIXELS = int(
+    os.environ.get("RECIPES_IMAGE_MAX_PIXELS", 40_000_000)
+)
+RECIPES_IMAGE_FORMATS = os.environ.get(
+    "RECIPES_IMAGE_FORMATS", "JPEG,PNG,WEBP"
+).split(",")
+
+
 SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
 }
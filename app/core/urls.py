@@ -1,6 +1,5 @@
 from django.conf import settings
-from core.views import health_check
-from django.conf.urls.static import static
+from core.views import health_check, serve_media
 from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
@@ -17,11 +16,9 @@ urlpatterns = [
     ),
     path("api/users/", include("users.urls", namespace="users")),
     path("api/recipes/", include("recipes.urls", namespace="recipes")),
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}<path:name>",
+        serve_media,
+        name="media",
+    ),
 ]
-
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT,
-    )
@@ -1,12 +1,77 @@
 """
 Core views for app
 """
+import mimetypes
+import posixpath
+from urllib.parse import quote
+
+from core.media import check_media_signature
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.cache import patch_cache_control
+from django.views import static
+from django.views.decorators.http import require_safe
+from recipes.formats import IMAGE_FORMATS
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
 
+# Lifetime of unsigned media URLs, files never change under their name.
+MEDIA_MAX_AGE = 365 * 24 * 60 * 60
+
+
 @api_view(["GET"])
 def health_check(request):
     """Return successful response."""
 
     return Response({"healthy": True})
+
+
+def media_content_type(name):
+    """
+    Return media type of media file name.
+    Image formats are looked up in IMAGE_FORMATS first, as mimetypes does
+    not know all of them on every Python version.
+    """
+
+    extension = posixpath.splitext(name)[1].lower()
+    for image_extension, media_type, _ in IMAGE_FORMATS.values():
+        if extension == image_extension:
+            return media_type
+
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+@require_safe
+def serve_media(request, name):
+    """
+    Serve uploaded media file after checking the signature of its URL.
+    Only the signature is checked, without database or file system access.
+    The file is sent by nginx through X-Accel-Redirect, or by Django when
+    no redirect location is configured.
+    """
+
+    if posixpath.normpath(name) != name or name.startswith("/"):
+        raise Http404
+
+    max_age = MEDIA_MAX_AGE
+    if settings.MEDIA_URL_MAX_AGE:
+        max_age = check_media_signature(
+            name, request.GET.get("expires"), request.GET.get("signature")
+        )
+        if max_age is None:
+            return HttpResponseForbidden()
+
+    location = settings.MEDIA_ACCEL_REDIRECT_LOCATION
+    if location:
+        response = HttpResponse(content_type=media_content_type(name))
+        response["X-Accel-Redirect"] = f"{location}{quote(name)}"
+    else:
+        response = static.serve(
+            request, name, document_root=settings.MEDIA_ROOT
+        )
+        if response.status_code == 200:
+            response["Content-Type"] = media_content_type(name)
+
+    patch_cache_control(response, public=True, max_age=max_age, immutable=True)
+    return response
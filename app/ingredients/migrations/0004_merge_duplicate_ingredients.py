@@ -0,0 +1,43 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:48
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Merge Ingredients sharing user and name into the oldest one."""
+
+    Ingredient = apps.get_model('ingredients', 'Ingredient')
+    Through = apps.get_model('recipes', 'Recipe').ingredients.through
+    duplicates = (
+        Ingredient.objects.values('user_id', 'name')
+        .annotate(keep_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        extra = Ingredient.objects.filter(
+            user_id=duplicate['user_id'],
+            name=duplicate['name'],
+        ).exclude(id=duplicate['keep_id'])
+        links = Through.objects.filter(ingredient__in=extra)
+        Through.objects.bulk_create(
+            [
+                Through(recipe_id=recipe_id, ingredient_id=duplicate['keep_id'])
+                for recipe_id in links.values_list('recipe_id', flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+        links.delete()
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_ingredients'),
+        ('ingredients', '0003_ingredient_user_name_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_ingredients, migrations.RunPython.noop),
+    ]
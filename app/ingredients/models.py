@@ -1,6 +1,7 @@
 """
 Ingredient model.
 """
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.conf import settings
 
@@ -14,5 +15,20 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="unique_ingredient_user_name",
+            ),
+        ]
+        indexes = [
+            GinIndex(
+                fields=["name"],
+                name="ingredient_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
     def __str__(self):
         return self.name
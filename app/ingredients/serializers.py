@@ -1,4 +1,5 @@
 """Serilizers for Ingredients APIs."""
+from django.utils.translation import gettext as _
 from rest_framework import serializers
 from ingredients.models import Ingredient
 
@@ -10,3 +11,20 @@ class IngredientSerializer(serializers.ModelSerializer):
         model = Ingredient
         fields = ["id", "name"]
         read_only_field = ["id"]
+
+    def validate_name(self, value):
+        """Check name is not used by another Ingredient of the user."""
+
+        request = self.context.get("request")
+        if self.parent is not None or request is None:
+            return value
+
+        others = Ingredient.objects.filter(user=request.user, name=value)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(
+                _("Ingredient with this name already exists.")
+            )
+
+        return value
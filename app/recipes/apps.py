@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from django.db.models import CharField
+        from recipes.lookups import TrigramWordSimilar
+        import recipes.signals  # noqa: F401
+
+        CharField.register_lookup(TrigramWordSimilar)
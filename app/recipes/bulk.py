@@ -0,0 +1,109 @@
+"""
+Set-based bulk changes of Recipes.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+from ingredients.models import Ingredient
+from recipes.cache import bump_data_version
+from recipes.images import release_images
+from recipes.models import Recipe
+from recipes.serializers import get_or_create_by_name
+from tags.models import Tag
+
+
+RELATIONS = {
+    "tags": (Tag, Recipe.tags.through, "tag"),
+    "ingredients": (Ingredient, Recipe.ingredients.through, "ingredient"),
+}
+
+
+def _lock_recipes(user, ids):
+    """Lock Recipes of user with given ids and return ids found."""
+
+    return list(
+        Recipe.objects.filter(user=user, id__in=ids)
+        .select_for_update()
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def _add_related(user, name, recipe_ids, names):
+    """Link every Recipe to related objects named in names."""
+
+    model, through, column = RELATIONS[name]
+    related = get_or_create_by_name(model, user, names)
+    through.objects.bulk_create(
+        [
+            through(recipe_id=recipe_id, **{f"{column}_id": obj.id})
+            for recipe_id in recipe_ids
+            for obj in related
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _remove_related(user, name, recipe_ids, names):
+    """Unlink related objects named in names from every Recipe."""
+
+    model, through, column = RELATIONS[name]
+    through.objects.filter(
+        recipe_id__in=recipe_ids,
+        **{f"{column}__user": user, f"{column}__name__in": names},
+    ).delete()
+
+
+@transaction.atomic
+def bulk_update_recipes(user, ids, fields, add=None, remove=None):
+    """
+    Apply the same partial update to Recipes of user with given ids.
+    fields holds Recipe column values, add and remove map relation name
+    to list of related names. Every change is a single statement over all
+    Recipes. Returns ids of updated Recipes.
+    """
+
+    recipe_ids = _lock_recipes(user, ids)
+    if not recipe_ids:
+        return recipe_ids
+
+    for name, names in (remove or {}).items():
+        if names:
+            _remove_related(user, name, recipe_ids, names)
+    for name, names in (add or {}).items():
+        if names:
+            _add_related(user, name, recipe_ids, names)
+
+    Recipe.objects.filter(id__in=recipe_ids).update(
+        updated_at=timezone.now(), **fields
+    )
+    bump_data_version(user.id)
+
+    return recipe_ids
+
+
+@transaction.atomic
+def bulk_delete_recipes(user, ids):
+    """
+    Delete Recipes of user with given ids and their relation links.
+    Rows are removed with one DELETE per table instead of the collector,
+    which would load every Recipe to send post_delete for it, and their
+    images are released in one statement.
+    Returns ids of deleted Recipes.
+    """
+
+    recipe_ids = _lock_recipes(user, ids)
+    if not recipe_ids:
+        return recipe_ids
+
+    for _, through, _ in RELATIONS.values():
+        through.objects.filter(recipe_id__in=recipe_ids).delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {Recipe._meta.db_table} WHERE id = ANY(%s) "
+            f"RETURNING image",
+            [recipe_ids],
+        )
+        release_images([image for image, in cursor.fetchall()])
+    bump_data_version(user.id)
+
+    return recipe_ids
@@ -0,0 +1,171 @@
+"""
+Per-user versioned cache for list API responses.
+"""
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from core.media import media_url_epoch
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from recipes.formats import accepted_image_types
+from rest_framework.response import Response
+
+
+VERSION_KEY = "recipes:data-version:{user_id}"
+RESPONSE_KEY = "recipes:response:{user_id}:{version}:{digest}"
+
+# Hit and miss counters of this process. Counting in the shared cache would
+# rewrite a cache file on every request and lose counts under concurrency.
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_data_version(user_id):
+    """
+    Return current data version of user.
+    Versions are nanosecond timestamps of the last change, so a version
+    evicted from cache never points back at responses stored before the
+    eviction and also serves as Last-Modified of the user's lists.
+    """
+
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+
+    return version
+
+
+def _bump(user_id):
+    """Move data version of user forward to current time."""
+
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key, 0)
+    cache.set(key, max(time.time_ns(), version + 1), timeout=None)
+
+
+def bump_data_version(user_id):
+    """
+    Invalidate cached responses of user.
+    The version is bumped again on commit, so responses cached by readers
+    that still saw the old rows during the transaction are dropped as well.
+    """
+
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def response_cache_key(request, version):
+    """Return cache key for request path and normalized query string."""
+
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+    )
+    # Responses hold signed media URLs, which change every signing period,
+    # of image formats negotiated from the Accept header.
+    image_types = ",".join(accepted_image_types(request))
+    digest = hashlib.md5(
+        f"{request.path}?{query}#{media_url_epoch()}#{image_types}".encode()
+    ).hexdigest()
+
+    return RESPONSE_KEY.format(
+        user_id=request.user.id,
+        version=version,
+        digest=digest,
+    )
+
+
+def get_stats():
+    """Return response cache hit and miss counters of this process."""
+
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    """Reset response cache hit and miss counters of this process."""
+
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
+
+
+class CachedListMixin:
+    """
+    Serve list responses from the per-user versioned cache.
+    Conditional requests are answered from the data version alone.
+    Other read-only actions can use `cached_response` the same way.
+    """
+
+    def use_local_cache(self):
+        """Check if response should also be kept in the per-process cache."""
+
+        return False
+
+    def list(self, request, *args, **kwargs):
+        """Return cached list response or build and cache a new one."""
+
+        def build():
+            return super(CachedListMixin, self).list(request, *args, **kwargs)
+
+        return self.cached_response(request, build)
+
+    def cached_response(self, request, build):
+        """Return cached response for request or cache the one from build."""
+
+        version = get_data_version(request.user.id)
+        key = response_cache_key(request, version)
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        # Responses hold media URLs signed for the current period, so they
+        # are not older than its start.
+        last_modified = max(
+            version // 10**9,
+            media_url_epoch() * settings.MEDIA_URL_MAX_AGE,
+        )
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            not_modified["Last-Modified"] = http_date(last_modified)
+            return not_modified
+
+        local_cache = caches["local"] if self.use_local_cache() else None
+        data = local_cache.get(key) if local_cache else None
+        if data is None:
+            data = cache.get(key)
+            if data is not None and local_cache:
+                local_cache.set(key, data)
+
+        if data is not None:
+            _count("hits")
+            response = Response(data, headers={"X-Cache": "HIT"})
+        else:
+            _count("misses")
+            response = build()
+            if response.status_code == 200:
+                cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+                if local_cache:
+                    local_cache.set(key, response.data)
+            response["X-Cache"] = "MISS"
+
+        if response.status_code == 200:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+
+        return response
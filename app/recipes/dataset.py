@@ -0,0 +1,102 @@
+"""
+Synthetic dataset generation used by benchmark commands.
+"""
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+from tags.models import Tag
+
+
+BATCH_SIZE = 5000
+
+
+def create_benchmark_user(email="benchmark@example.com"):
+    """Create and return a user owning the generated dataset."""
+
+    return get_user_model().objects.create_user(
+        email=email,
+        password="benchmark-pass",
+        name="Benchmark User",
+    )
+
+
+def seed_recipes(
+    user,
+    recipes=1000,
+    tags=50,
+    ingredients=200,
+    tags_per_recipe=3,
+    ingredients_per_recipe=5,
+    seed=0,
+):
+    """
+    Bulk create Recipes with random Tags and Ingredients for user.
+    Returns a tuple of created (recipes, tags, ingredients) lists.
+    """
+
+    rng = random.Random(seed)
+    tag_objs = Tag.objects.bulk_create(
+        [Tag(user=user, name=f"Tag {i}") for i in range(tags)],
+        batch_size=BATCH_SIZE,
+    )
+    ingredient_objs = Ingredient.objects.bulk_create(
+        [
+            Ingredient(user=user, name=f"Ingredient {i}")
+            for i in range(ingredients)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    recipe_objs = Recipe.objects.bulk_create(
+        [
+            Recipe(
+                user=user,
+                title=f"Recipe {i}",
+                description=f"Generated recipe number {i}.",
+                time_minutes=rng.randint(1, 240),
+                price=Decimal(rng.randint(100, 99999)) / 100,
+            )
+            for i in range(recipes)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    tag_links = []
+    ingredient_links = []
+    for recipe in recipe_objs:
+        for tag in rng.sample(tag_objs, min(tags_per_recipe, tags)):
+            tag_links.append(
+                Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            )
+        for ingredient in rng.sample(
+            ingredient_objs, min(ingredients_per_recipe, ingredients)
+        ):
+            ingredient_links.append(
+                Recipe.ingredients.through(
+                    recipe_id=recipe.id, ingredient_id=ingredient.id
+                )
+            )
+    Recipe.tags.through.objects.bulk_create(tag_links, batch_size=BATCH_SIZE)
+    Recipe.ingredients.through.objects.bulk_create(
+        ingredient_links, batch_size=BATCH_SIZE
+    )
+
+    return recipe_objs, tag_objs, ingredient_objs
+
+
+def analyze_tables():
+    """Refresh planner statistics for recipe related tables."""
+
+    models = [
+        Recipe,
+        Tag,
+        Ingredient,
+        Recipe.tags.through,
+        Recipe.ingredients.through,
+    ]
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
@@ -0,0 +1,41 @@
+"""
+Streamed export of Recipes.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from recipes.models import Recipe
+from recipes.serializers import RecipeExportRowSerializer
+
+
+def export_columns():
+    """Return names of exported Recipe fields in output order."""
+
+    return list(RecipeExportRowSerializer.serializer_class.Meta.fields)
+
+
+def iter_export(user, chunk_size=None):
+    """
+    Yield representations of all Recipes of user ordered by id.
+    Rows are read through a server-side cursor and related Tags and
+    Ingredients are fetched once per chunk, so memory use depends on
+    chunk_size and not on the number of Recipes. The cursor is read in a
+    transaction, as in autocommit mode Django declares it WITH HOLD and
+    PostgreSQL runs the whole query before the first row is sent.
+    """
+
+    chunk_size = chunk_size or settings.RECIPES_EXPORT_CHUNK_SIZE
+    serializer = RecipeExportRowSerializer(context={})
+    with transaction.atomic():
+        rows = (
+            Recipe.objects.filter(user=user)
+            .order_by("id")
+            .values(*serializer.columns())
+            .iterator(chunk_size=chunk_size)
+        )
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield from serializer.rows_to_representation(chunk)
@@ -0,0 +1,142 @@
+"""
+Query helpers for filtering and searching recipes.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    Exists,
+    F,
+    FloatField,
+    Func,
+    IntegerField,
+    OuterRef,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast
+from recipes.models import Recipe
+
+
+# Ranks are stored as integers so they can be used as a pagination cursor.
+RANK_SCALE = 10**6
+
+
+def filter_by_related(queryset, field_name, ids, match_all=False):
+    """
+    Filter Recipes by ids of a many-to-many relation using semi-joins.
+
+    With `match_all` only Recipes linked to every id are kept, otherwise
+    Recipes linked to any of them. Both forms filter on the through table
+    in a subquery, so the outer query never needs DISTINCT.
+    """
+
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    recipe_column = f"{field.m2m_field_name()}_id"
+    related_column = f"{field.m2m_reverse_field_name()}_id"
+    ids = set(ids)
+    links = through.objects.filter(**{f"{related_column}__in": ids})
+
+    if match_all:
+        matching = (
+            links.values(recipe_column)
+            .annotate(matched=Count(related_column, distinct=True))
+            .filter(matched=len(ids))
+            .values(recipe_column)
+        )
+        return queryset.filter(id__in=matching)
+
+    return queryset.filter(
+        Exists(links.filter(**{recipe_column: OuterRef("pk")})),
+    )
+
+
+def related_facets(recipes):
+    """
+    Return Tags and Ingredients linked to `recipes` with their Recipe
+    counts, ordered by count and name.
+    Both relations are counted in one query, a UNION ALL of aggregates
+    grouped by related id over the through tables.
+    """
+
+    recipe_ids = recipes.order_by().values("id")
+    counts = []
+    for field_name in ("tags", "ingredients"):
+        field = Recipe._meta.get_field(field_name)
+        related_name = field.m2m_reverse_field_name()
+        counts.append(
+            field.remote_field.through.objects.filter(
+                **{f"{field.m2m_field_name()}_id__in": recipe_ids}
+            )
+            .values(
+                facet=Value(field_name, output_field=CharField()),
+                related_id=F(f"{related_name}_id"),
+                name=F(f"{related_name}__name"),
+            )
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+
+    facets = {"tags": [], "ingredients": []}
+    for row in counts[0].union(*counts[1:], all=True):
+        facets[row["facet"]].append(
+            {
+                "id": row["related_id"],
+                "name": row["name"],
+                "count": row["count"],
+            }
+        )
+    for items in facets.values():
+        items.sort(key=lambda item: (-item["count"], item["name"]))
+
+    return facets
+
+
+def search_recipes(queryset, search):
+    """
+    Filter Recipes matching web search style `search` text through the
+    indexed search vector and annotate them with integer relevance `rank`.
+    """
+
+    query = SearchQuery(search, config="english", search_type="websearch")
+    rank = SearchRank(F("search_vector"), query) * Value(
+        RANK_SCALE, output_field=FloatField()
+    )
+
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(rank, IntegerField()),
+    )
+
+
+def autocomplete_by_name(queryset, text):
+    """
+    Filter objects whose name starts with `text` or contains a word similar
+    to it. Both conditions are served by the trigram index on `name`.
+    Prefix matches come first, then matches ordered by word similarity.
+    """
+
+    prefix = Q(name__iregex=f"^{re.escape(text)}")
+    similarity = Func(
+        Value(text),
+        F("name"),
+        function="word_similarity",
+        output_field=FloatField(),
+    )
+
+    return (
+        queryset.filter(prefix | Q(name__trigram_word_similar=text))
+        .annotate(
+            is_prefix=Case(
+                When(prefix, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            similarity=similarity,
+        )
+        .order_by("-is_prefix", "-similarity", "name")
+    )
@@ -0,0 +1,96 @@
+"""
+Formats of stored Recipe image copies and their negotiation.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from PIL import Image
+
+
+# Extension, media type and encoder options of formats Recipe image copies
+# are stored in. JPEG and PNG copies are kept for every client.
+IMAGE_FORMATS = {
+    "JPEG": (".jpg", "image/jpeg", {"quality": 85, "optimize": True}),
+    "PNG": (".png", "image/png", {"optimize": True}),
+    "WEBP": (".webp", "image/webp", {"quality": 80, "method": 6}),
+    "AVIF": (".avif", "image/avif", {"quality": 60}),
+}
+
+
+def transcode_formats():
+    """
+    Return formats of RECIPES_IMAGE_TRANSCODE_FORMATS the installed Pillow
+    can encode, in order of preference.
+    """
+
+    Image.init()
+    return [
+        image_format
+        for image_format in settings.RECIPES_IMAGE_TRANSCODE_FORMATS
+        if image_format in IMAGE_FORMATS and image_format in Image.SAVE
+    ]
+
+
+def _quality(value):
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+@lru_cache(maxsize=128)
+def _accepted_types(header, image_formats):
+    qualities = {}
+    for item in header.lower().split(","):
+        media_type, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                quality = _quality(value)
+        qualities[media_type.strip()] = quality
+
+    types = [
+        IMAGE_FORMATS[image_format][1]
+        for image_format in image_formats
+        if image_format in IMAGE_FORMATS
+    ]
+    accepted = [
+        media_type for media_type in types if qualities.get(media_type, 0) > 0
+    ]
+
+    return tuple(
+        sorted(accepted, key=lambda media_type: -qualities[media_type])
+    )
+
+
+def accepted_image_types(request):
+    """
+    Return media types of transcoded images accepted by client, best first.
+    Only types listed by name in the Accept header of request count, as
+    wildcards do not tell which formats the client decodes. Types of equal
+    quality keep the order of RECIPES_IMAGE_TRANSCODE_FORMATS.
+    """
+
+    header = request.META.get("HTTP_ACCEPT", "") if request else ""
+    if "image/" not in header.lower():
+        return ()
+
+    return _accepted_types(
+        header, tuple(settings.RECIPES_IMAGE_TRANSCODE_FORMATS)
+    )
+
+
+def negotiate_image(variants, size, name, accepted_types):
+    """
+    Return storage name of best copy of image for client.
+    Copies transcoded to accepted types are looked up in image variants
+    by size, "original" for the full image, else name is returned.
+    """
+
+    for media_type in accepted_types:
+        transcoded = variants.get(media_type, {}).get(size)
+        if transcoded:
+            return transcoded
+
+    return name
@@ -0,0 +1,289 @@
+"""
+Resized variants of Recipe images.
+"""
+import io
+import math
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from recipes.cache import bump_data_version
+from recipes.formats import IMAGE_FORMATS, transcode_formats
+from recipes.models import ImageBlob, Recipe
+
+
+image_storage = Recipe._meta.get_field("image").storage
+# Extensions of variants kept in JPEG or PNG.
+VARIANT_EXTENSIONS = (IMAGE_FORMATS["JPEG"][0], IMAGE_FORMATS["PNG"][0])
+_executor = None
+
+
+def _get_executor():
+    """Return worker pool of this process, starting it on first use."""
+
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPES_IMAGE_WORKERS,
+            thread_name_prefix="recipe-images",
+        )
+
+    return _executor
+
+
+def _run_in_worker(func, *args):
+    """Run func in a worker thread and release its database connection."""
+
+    try:
+        func(*args)
+    finally:
+        connections.close_all()
+
+
+def _variant_name(name, size, ext):
+    """
+    Return storage name of variant of size next to original image.
+    Size None names a copy of the full image in another format.
+    """
+
+    root = os.path.splitext(name)[0]
+    return f"{root}{ext}" if size is None else f"{root}_{size}{ext}"
+
+
+def _variant_key(size):
+    return "original" if size is None else str(size)
+
+
+def stored_variants(name):
+    """
+    Return mapping of size and extension to names of stored variants of
+    image name. Size is "original" for copies of the full image in other
+    formats.
+    """
+
+    directory, filename = os.path.split(name)
+    root, original_ext = os.path.splitext(filename)
+    try:
+        files = image_storage.listdir(directory)[1]
+    except FileNotFoundError:
+        return {}
+
+    variants = {}
+    for file in files:
+        stem, ext = os.path.splitext(file)
+        size = stem[len(root) + 1:]
+        if stem == root and ext != original_ext:
+            size = "original"
+        elif not (stem.startswith(f"{root}_") and size.isdigit()):
+            continue
+        variants[size, ext] = os.path.join(directory, file)
+
+    return variants
+
+
+def lock_image(name):
+    """
+    Serialize reference changes and removal of image name.
+    The lock is taken on the name without extension, which variant files
+    share, until the current transaction ends.
+    """
+
+    root = os.path.splitext(name)[0]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))", [root]
+        )
+
+
+def acquire_image(name):
+    """
+    Add a reference to stored image name.
+    Called before the file is written, so a concurrent removal of the same
+    unused image either finishes first or sees the reference.
+    """
+
+    table = ImageBlob._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        lock_image(name)
+        cursor.execute(
+            f"INSERT INTO {table} (name, ref_count) VALUES (%s, 1) "
+            f"ON CONFLICT (name) DO UPDATE "
+            f"SET ref_count = {table}.ref_count + 1",
+            [name],
+        )
+
+
+def release_images(names):
+    """
+    Drop one reference to stored image for every item of names.
+    Images left without references are deleted once the transaction
+    commits.
+    """
+
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return
+
+    table = ImageBlob._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} AS blob "
+            f"SET ref_count = GREATEST(blob.ref_count - released.count, 0) "
+            f"FROM unnest(%s::varchar[], %s::integer[]) "
+            f"AS released (name, count) "
+            f"WHERE blob.name = released.name "
+            f"RETURNING blob.name, blob.ref_count",
+            [sorted(counts), [counts[name] for name in sorted(counts)]],
+        )
+        unused = [name for name, count in cursor.fetchall() if not count]
+        ImageBlob.objects.filter(name__in=unused, ref_count=0).delete()
+
+    if unused:
+        transaction.on_commit(lambda: delete_unused_images(unused))
+
+
+def delete_unused_images(names):
+    """Delete stored images in names and their variants if unreferenced."""
+
+    for name in names:
+        with transaction.atomic():
+            lock_image(name)
+            if ImageBlob.objects.filter(name=name).exists():
+                continue
+            for variant in stored_variants(name).values():
+                image_storage.delete(variant)
+            image_storage.delete(name)
+
+
+def _encode(image, image_format):
+    """
+    Return image encoded in image_format and its file extension.
+    Format None stands for JPEG, or PNG for images with transparency.
+    """
+
+    if image_format is None:
+        image_format = "PNG" if image.mode == "RGBA" else "JPEG"
+    ext, _, options = IMAGE_FORMATS[image_format]
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+
+    return buffer.getvalue(), ext
+
+
+def resize_image(file, copies):
+    """
+    Return mapping of size and format pairs in copies to encoded image,
+    fitting in size x size pixels, and its file extension.
+    Size None keeps the full image and format None stands for JPEG or PNG.
+    Variants are resized from the largest down, each from the previous
+    one, and JPEG sources are decoded at reduced scale when possible.
+    Images are never scaled up. Copies in other formats the encoder
+    rejects, like WebP over 16383 pixels, are left out.
+    """
+
+    formats = defaultdict(list)
+    for size, image_format in copies:
+        formats[size].append(image_format)
+    sizes = sorted(formats, key=lambda size: -(size or math.inf))
+
+    with Image.open(file) as source:
+        if sizes[0] is not None:
+            source.draft("RGB", (sizes[0], sizes[0]))
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA" if "A" in image.mode else "RGB")
+
+        variants = {}
+        for size in sizes:
+            if size is not None:
+                image.thumbnail((size, size), Image.LANCZOS)
+            for image_format in formats[size]:
+                try:
+                    variants[size, image_format] = _encode(image, image_format)
+                except (OSError, ValueError):
+                    if image_format is None:
+                        raise
+
+    return variants
+
+
+def build_image_variants(recipe_id, user_id, name):
+    """
+    Store resized variants of image name and attach them to the Recipe.
+    Besides JPEG or PNG variants, the image and its variants are transcoded
+    to every format of transcode_formats and stored under their media type.
+    Variants already stored for the same image by another Recipe are
+    reused. When the Recipe got another image or was deleted meanwhile,
+    the image is deleted with its variants unless still referenced.
+    """
+
+    sizes = settings.RECIPES_IMAGE_VARIANT_SIZES
+    copies = [(size, None) for size in sizes]
+    for image_format in transcode_formats():
+        ext = IMAGE_FORMATS[image_format][0]
+        if not name.lower().endswith(ext):
+            copies.append((None, image_format))
+        copies += [(size, image_format) for size in sizes]
+
+    stored = stored_variants(name)
+    found = {}
+    for size, image_format in copies:
+        if image_format is None:
+            extensions = VARIANT_EXTENSIONS
+        else:
+            extensions = [IMAGE_FORMATS[image_format][0]]
+        for ext in extensions:
+            if (_variant_key(size), ext) in stored:
+                found[size, image_format] = stored[_variant_key(size), ext]
+
+    missing = [copy for copy in copies if copy not in found]
+    if missing:
+        with image_storage.open(name) as file:
+            resized = resize_image(file, missing)
+        for (size, image_format), (content, ext) in resized.items():
+            found[size, image_format] = image_storage.save(
+                _variant_name(name, size, ext), ContentFile(content)
+            )
+
+    variants = {}
+    for size, image_format in copies:
+        variant = found.get((size, image_format))
+        if variant and image_format is None:
+            variants[_variant_key(size)] = variant
+        elif variant:
+            media_type = IMAGE_FORMATS[image_format][1]
+            variants.setdefault(media_type, {})[_variant_key(size)] = variant
+
+    # Moving updated_at changes the ETag of the Recipe detail.
+    updated = Recipe.objects.filter(id=recipe_id, image=name).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    if updated:
+        bump_data_version(user_id)
+    else:
+        delete_unused_images([name])
+
+    return variants
+
+
+def schedule_image_variants(recipe):
+    """
+    Build image variants of Recipe once the current transaction commits.
+    The work runs in the process worker pool, off the request path, unless
+    RECIPES_IMAGE_WORKERS is 0.
+    """
+
+    args = (recipe.id, recipe.user_id, recipe.image.name)
+
+    def submit():
+        if settings.RECIPES_IMAGE_WORKERS:
+            _get_executor().submit(_run_in_worker, build_image_variants, *args)
+        else:
+            build_image_variants(*args)
+
+    transaction.on_commit(submit)
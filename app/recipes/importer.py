@@ -0,0 +1,145 @@
+"""
+Bulk import of Recipes.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from ingredients.models import Ingredient
+from recipes.cache import bump_data_version
+from recipes.models import Recipe
+from recipes.serializers import RecipeImportSerializer, get_or_create_by_name
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+from tags.models import Tag
+
+
+def _chunks(items, size):
+    """Yield lists of at most size items from iterable."""
+
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _names(data, field):
+    """Return distinct names of related items in validated data."""
+
+    return list(dict.fromkeys(item["name"] for item in data.get(field, [])))
+
+
+class RecipeImporter:
+    """
+    Validate and insert Recipes for user in chunks.
+    Every chunk is validated item by item, then written with one
+    bulk_create for Recipes and one per through table. Tags and
+    Ingredients are resolved once per distinct name for the whole import.
+    """
+
+    def __init__(self, user, chunk_size=None, max_items=None):
+        self.user = user
+        self.chunk_size = chunk_size or settings.RECIPES_IMPORT_CHUNK_SIZE
+        self.max_items = max_items or settings.RECIPES_IMPORT_MAX_ITEMS
+        self.related_ids = {Tag: {}, Ingredient: {}}
+
+    @transaction.atomic
+    def run(self, items, context=None):
+        """
+        Import items and return list of per-item results.
+        Each result holds item index and either created Recipe id or
+        validation errors. Nothing is written if the input is malformed
+        or holds more than max_items items.
+        """
+
+        serializer = RecipeImportSerializer(context=context)
+        results = []
+        for chunk in _chunks(items, self.chunk_size):
+            if len(results) + len(chunk) > self.max_items:
+                raise ValidationError(
+                    f"Import is limited to {self.max_items} Recipes."
+                )
+            results += self._import_chunk(len(results), chunk, serializer)
+
+        if any("id" in result for result in results):
+            bump_data_version(self.user.id)
+
+        return results
+
+    def _import_chunk(self, offset, chunk, serializer):
+        """
+        Validate and insert one chunk of items starting at offset.
+        Items are validated by one shared serializer the way ListSerializer
+        does it, so serializer fields are not rebuilt for every item.
+        """
+
+        results = []
+        valid = []
+        for index, item in enumerate(chunk, start=offset):
+            try:
+                data = serializer.run_validation(item)
+            except ValidationError as exc:
+                errors = as_serializer_error(exc)
+                results.append({"index": index, "errors": errors})
+            else:
+                results.append({"index": index})
+                valid.append((results[-1], data))
+
+        if not valid:
+            return results
+
+        tag_ids = self._resolve(Tag, valid, "tags")
+        ingredient_ids = self._resolve(Ingredient, valid, "ingredients")
+        recipes = Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    user=self.user,
+                    **{
+                        field: value
+                        for field, value in data.items()
+                        if field not in ("tags", "ingredients")
+                    },
+                )
+                for _, data in valid
+            ]
+        )
+
+        tag_links = []
+        ingredient_links = []
+        for (result, data), recipe in zip(valid, recipes):
+            result["id"] = recipe.id
+            for name in _names(data, "tags"):
+                tag_links.append(
+                    Recipe.tags.through(
+                        recipe_id=recipe.id,
+                        tag_id=tag_ids[name],
+                    )
+                )
+            for name in _names(data, "ingredients"):
+                ingredient_links.append(
+                    Recipe.ingredients.through(
+                        recipe_id=recipe.id,
+                        ingredient_id=ingredient_ids[name],
+                    )
+                )
+        Recipe.tags.through.objects.bulk_create(tag_links)
+        Recipe.ingredients.through.objects.bulk_create(ingredient_links)
+
+        return results
+
+    def _resolve(self, model, valid, field):
+        """Return mapping of names used by valid items to ids of model."""
+
+        known = self.related_ids[model]
+        names = [
+            name
+            for _, data in valid
+            for name in _names(data, field)
+            if name not in known
+        ]
+        for obj in get_or_create_by_name(model, self.user, names):
+            known[obj.name] = obj.id
+
+        return known
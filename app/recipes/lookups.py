@@ -0,0 +1,14 @@
+"""
+Custom lookups for recipe related queries.
+"""
+from django.contrib.postgres.lookups import PostgresOperatorLookup
+
+
+class TrigramWordSimilar(PostgresOperatorLookup):
+    """
+    Match values containing a word similar to the lookup value.
+    Served by `gin_trgm_ops` indexes.
+    """
+
+    lookup_name = "trigram_word_similar"
+    postgres_operator = "%%>"
@@ -0,0 +1,146 @@
+"""
+Django command reporting bytes saved by transcoding Recipe images.
+"""
+import io
+import os
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageFilter
+from recipes.formats import IMAGE_FORMATS, transcode_formats
+from recipes.images import resize_image
+
+
+def sample_images(count, size=(1600, 1200)):
+    """
+    Yield names and JPEG files of count synthetic photos.
+    Gradients, noise and blur stand in for the smooth areas and fine detail
+    of camera pictures.
+    """
+
+    for index in range(count):
+        gradient = Image.linear_gradient("L").resize(size)
+        noise = Image.effect_noise(size, 10 + index * 5)
+        radial = Image.radial_gradient("L").resize(size)
+        image = Image.merge(
+            "RGB", (gradient, noise, radial.rotate(index * 30))
+        ).filter(ImageFilter.GaussianBlur(index % 3))
+        file = io.BytesIO()
+        image.save(file, format="JPEG", quality=90)
+        file.seek(0)
+
+        yield f"sample-{index}.jpg", file
+
+
+def directory_images(directory):
+    """Yield names and contents of image files in directory."""
+
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        if entry.is_file():
+            with open(entry.path, "rb") as file:
+                yield entry.name, io.BytesIO(file.read())
+
+
+class Command(BaseCommand):
+    """
+    Django command encoding a corpus of images the way uploads are stored
+    and comparing total bytes of each transcoding format with the JPEG or
+    PNG copies served to every client.
+    """
+
+    help = "Report bytes saved by transcoding Recipe images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory",
+            help="Directory of sample images, synthetic photos by default.",
+        )
+        parser.add_argument(
+            "--images",
+            type=int,
+            default=10,
+            help="Number of synthetic photos without --directory.",
+        )
+        parser.add_argument(
+            "--formats",
+            help="Comma separated formats, transcoding formats by default.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+
+        if options["formats"]:
+            formats = options["formats"].upper().split(",")
+            unknown = set(formats) - set(IMAGE_FORMATS)
+            if unknown:
+                raise CommandError(f"Unknown formats: {sorted(unknown)}")
+        else:
+            formats = transcode_formats()
+        if not formats:
+            self.stdout.write(
+                "No format of RECIPES_IMAGE_TRANSCODE_FORMATS can be encoded "
+                "by the installed Pillow."
+            )
+
+        if options["directory"]:
+            images = directory_images(options["directory"])
+        else:
+            images = sample_images(options["images"])
+
+        sizes = [None, *settings.RECIPES_IMAGE_VARIANT_SIZES]
+        totals = defaultdict(int)
+        seconds = defaultdict(float)
+        count = 0
+        for name, file in images:
+            try:
+                with Image.open(file) as image:
+                    image.verify()
+            except (OSError, SyntaxError, ValueError):
+                self.stderr.write(f"Skipped {name}: not an image.")
+                continue
+            count += 1
+            totals[None, None] += file.getbuffer().nbytes
+
+            for image_format in [None, *formats]:
+                copies = [(size, image_format) for size in sizes]
+                if image_format is None:
+                    copies = copies[1:]
+                file.seek(0)
+                start = time.perf_counter()
+                encoded = resize_image(file, copies)
+                seconds[image_format] += time.perf_counter() - start
+                for (size, _), (content, ext) in encoded.items():
+                    totals[size, image_format] += len(content)
+
+        self.stdout.write(f"Images: {count}")
+        self._report(sizes, formats, totals, seconds, count)
+
+    def _report(self, sizes, formats, totals, seconds, count):
+        """Print total bytes of every size and format with savings."""
+
+        self.stdout.write(
+            f"{'size':>9} {'format':>9} {'bytes':>12} {'saved':>8}"
+        )
+        for size in sizes:
+            label = "original" if size is None else str(size)
+            baseline = totals[size, None]
+            for image_format in [None, *formats]:
+                total = totals[size, image_format]
+                if image_format is None:
+                    name = "source" if size is None else "JPEG/PNG"
+                    saved = ""
+                else:
+                    name = image_format
+                    saved = f"{1 - total / baseline:.1%}" if baseline else ""
+                self.stdout.write(
+                    f"{label:>9} {name:>9} {total:>12} {saved:>8}"
+                )
+
+        for image_format in [None, *formats]:
+            elapsed = seconds[image_format] * 1000 / count if count else 0
+            self.stdout.write(
+                f"Encoding {image_format or 'JPEG/PNG'}: "
+                f"{elapsed:.1f} ms/image"
+            )
@@ -0,0 +1,67 @@
+"""
+Django command comparing query plans of Recipe tag/ingredient filters.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.dataset import analyze_tables, create_benchmark_user, seed_recipes
+from recipes.filters import filter_by_related
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Django command printing EXPLAIN ANALYZE for JOIN + DISTINCT filtering
+    against EXISTS based filtering on a generated dataset.
+    All generated rows are rolled back when the command finishes.
+    """
+
+    help = "Compare plans of Recipe filtering by Tags on generated data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=50000)
+        parser.add_argument("--tags", type=int, default=200)
+        parser.add_argument("--tags-per-recipe", type=int, default=5)
+        parser.add_argument("--filter-size", type=int, default=3)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+
+        with transaction.atomic():
+            user = create_benchmark_user()
+            _, tags, _ = seed_recipes(
+                user,
+                recipes=options["recipes"],
+                tags=options["tags"],
+                tags_per_recipe=options["tags_per_recipe"],
+            )
+            analyze_tables()
+            tag_ids = [tag.id for tag in tags[: options["filter_size"]]]
+            recipes = Recipe.objects.filter(user=user)
+
+            queries = {
+                "JOIN + DISTINCT (any)": recipes.filter(
+                    tags__id__in=tag_ids
+                ).distinct(),
+                "EXISTS (any)": filter_by_related(recipes, "tags", tag_ids),
+                "GROUP BY + HAVING (all)": filter_by_related(
+                    recipes, "tags", tag_ids, match_all=True
+                ),
+            }
+            for name, queryset in queries.items():
+                self._report(name, queryset.order_by("-id"))
+
+            transaction.set_rollback(True)
+
+    def _report(self, name, queryset):
+        """Print plan and wall time of evaluating queryset."""
+
+        start = time.perf_counter()
+        count = len(list(queryset))
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.stdout.write(self.style.SUCCESS(f"== {name}"))
+        self.stdout.write(f"rows: {count}, fetched in {elapsed:.2f} ms")
+        self.stdout.write(queryset.explain(analyze=True))
+        self.stdout.write("")
@@ -0,0 +1,129 @@
+"""
+Django command comparing Recipe import throughput.
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from recipes.dataset import create_benchmark_user
+from recipes.views import RecipeViewSet
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+
+def import_payloads(count, tags=50, ingredients=200):
+    """Return count Recipe payloads sharing a pool of Tag names."""
+
+    return [
+        {
+            "title": f"Imported recipe {i}",
+            "description": f"Imported recipe number {i}.",
+            "time_minutes": i % 240 + 1,
+            "price": f"{i % 100}.50",
+            "tags": [{"name": f"Tag {(i + j) % tags}"} for j in range(3)],
+            "ingredients": [
+                {"name": f"Ingredient {(i + j) % ingredients}"}
+                for j in range(5)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Django command timing one POST per Recipe against a single NDJSON
+    bulk import for generated collections of increasing size.
+    All created rows are rolled back when the command finishes.
+    """
+
+    help = "Benchmark Recipe creation against bulk import."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000",
+            help="Comma separated list of collection sizes.",
+        )
+        parser.add_argument(
+            "--single-limit",
+            type=int,
+            default=1000,
+            help="Maximum number of Recipes created one POST at a time.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        self.stdout.write(
+            f"{'recipes':>10} {'method':>14} {'total ms':>10} "
+            f"{'recipes/s':>10}"
+        )
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for size in sizes:
+                single = min(size, options["single_limit"])
+                with transaction.atomic():
+                    user = create_benchmark_user()
+                    self._report(
+                        single,
+                        "single POST",
+                        lambda: self._post_each(user, import_payloads(single)),
+                    )
+                    transaction.set_rollback(True)
+
+                with transaction.atomic():
+                    user = create_benchmark_user()
+                    self._report(
+                        size,
+                        "bulk import",
+                        lambda: self._post_bulk(user, import_payloads(size)),
+                    )
+                    transaction.set_rollback(True)
+
+    def _post_each(self, user, items):
+        """Create every item with its own POST to the Recipe list."""
+
+        view = RecipeViewSet.as_view({"post": "create"})
+        for item in items:
+            request = APIRequestFactory().post(
+                reverse("recipes:recipe-list"), item, format="json"
+            )
+            force_authenticate(request, user=user)
+            self._check(view(request), 1)
+
+    def _post_bulk(self, user, items):
+        """Create all items with one NDJSON POST to the import action."""
+
+        view = RecipeViewSet.as_view(
+            {"post": "bulk_import"}, **RecipeViewSet.bulk_import.kwargs
+        )
+        body = "\n".join(json.dumps(item) for item in items)
+        request = APIRequestFactory().post(
+            reverse("recipes:recipe-bulk-import"),
+            body,
+            content_type="application/x-ndjson",
+        )
+        force_authenticate(request, user=user)
+        self._check(view(request), len(items))
+
+    def _check(self, response, count):
+        """Fail unless response reports count created Recipes."""
+
+        created = response.data.get("created", 1)
+        if response.status_code != 201 or created != count:
+            raise CommandError(f"Import failed: {response.data}")
+
+    def _report(self, size, name, run):
+        """Print total time and throughput of importing size Recipes."""
+
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        rate = size / elapsed if elapsed else 0
+
+        self.stdout.write(
+            f"{size:>10} {name:>14} {elapsed * 1000:>10.1f} {rate:>10.0f}"
+        )
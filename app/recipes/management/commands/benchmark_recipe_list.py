@@ -0,0 +1,71 @@
+"""
+Django command comparing per-row cost of Recipe list serializers.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.dataset import create_benchmark_user, seed_recipes
+from recipes.models import Recipe
+from recipes.serializers import RecipeRowSerializer, RecipeSerializer
+
+
+class Command(BaseCommand):
+    """
+    Django command timing RecipeSerializer against RecipeRowSerializer
+    for generated collections of increasing size.
+    All generated rows are rolled back when the command finishes.
+    """
+
+    help = "Benchmark Recipe list serialization on generated data."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000,100000",
+            help="Comma separated list of collection sizes.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        self.stdout.write(
+            f"{'recipes':>10} {'serializer':>22} {'total ms':>10} "
+            f"{'us/row':>8}"
+        )
+        for size in sizes:
+            with transaction.atomic():
+                user = create_benchmark_user()
+                seed_recipes(user, recipes=size)
+                recipes = Recipe.objects.filter(user=user).order_by("-id")
+
+                self._report(
+                    size,
+                    "RecipeSerializer",
+                    lambda: RecipeSerializer(
+                        recipes.prefetch_related("tags", "ingredients"),
+                        many=True,
+                    ).data,
+                )
+                self._report(
+                    size,
+                    "RecipeRowSerializer",
+                    lambda: RecipeRowSerializer(
+                        recipes.values(*RecipeRowSerializer.columns()),
+                        many=True,
+                    ).data,
+                )
+                transaction.set_rollback(True)
+
+    def _report(self, size, name, serialize):
+        """Print total and per-row time of building serialized data."""
+
+        start = time.perf_counter()
+        serialize()
+        elapsed = time.perf_counter() - start
+        per_row = elapsed / size * 10**6 if size else 0
+
+        self.stdout.write(
+            f"{size:>10} {name:>22} {elapsed * 1000:>10.1f} {per_row:>8.1f}"
+        )
@@ -0,0 +1,86 @@
+"""
+Django command comparing Recipe list requests with and without token cache.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from recipes.dataset import create_benchmark_user, seed_recipes
+from recipes.views import RecipeViewSet
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+from users.authentication import token_cache
+
+
+class Command(BaseCommand):
+    """
+    Django command timing repeated DRF token requests to the Recipe list
+    with the per-process token cache disabled and enabled.
+    All generated rows are rolled back when the command finishes.
+    """
+
+    help = "Benchmark DRF token authentication with and without cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=1000,
+            help="Number of requests sent in each mode.",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=10,
+            help="Number of users sending requests in turn.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+
+        self.stdout.write(
+            f"{'mode':>10} {'requests':>10} {'total ms':>10} "
+            f"{'queries/req':>12} {'hit rate':>9}"
+        )
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            with transaction.atomic():
+                keys = []
+                for index in range(options["users"]):
+                    user = create_benchmark_user(
+                        email=f"benchmark{index}@example.com"
+                    )
+                    seed_recipes(user, recipes=20)
+                    keys.append(Token.objects.create(user=user).key)
+
+                for mode, timeout in (("no cache", 0), ("cache", 60)):
+                    with override_settings(AUTH_TOKEN_CACHE_TIMEOUT=timeout):
+                        self._report(mode, keys, options["requests"])
+                transaction.set_rollback(True)
+
+        token_cache.clear()
+
+    def _report(self, mode, keys, count):
+        """Print time, queries per request and token cache hit rate."""
+
+        view = RecipeViewSet.as_view({"get": "list"})
+        url = reverse("recipes:recipe-list")
+        token_cache.clear()
+
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for index in range(count):
+                key = keys[index % len(keys)]
+                request = APIRequestFactory().get(
+                    url, HTTP_AUTHORIZATION=f"Token {key}"
+                )
+                view(request)
+        elapsed = time.perf_counter() - start
+        per_request = len(queries) / count if count else 0
+        hit_rate = token_cache.stats()["hit_rate"]
+
+        self.stdout.write(
+            f"{mode:>10} {count:>10} {elapsed * 1000:>10.1f} "
+            f"{per_request:>12.2f} {hit_rate:>9.1%}"
+        )
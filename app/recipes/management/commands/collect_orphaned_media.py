@@ -0,0 +1,80 @@
+"""
+Django command removing Recipe image files no Recipe uses.
+"""
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from recipes.orphans import ReferencedImages, iter_orphans, remove_orphans
+
+
+class Command(BaseCommand):
+    """
+    Django command walking the Recipe image directory and deleting, or
+    quarantining, files that neither a Recipe nor an image blob refers to.
+    Referenced names are streamed from the database into a compact hash
+    set and files are handled in batches, so memory stays bounded for any
+    number of files.
+    """
+
+    help = "Delete or quarantine orphaned Recipe image files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report orphaned files.",
+        )
+        parser.add_argument(
+            "--quarantine",
+            help="Move orphaned files below this directory instead.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of files removed per transaction.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Skip files modified in the last seconds.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+
+        referenced = ReferencedImages.load()
+        self.stdout.write(f"Referenced images: {len(referenced)}")
+
+        orphans = iter_orphans(referenced, min_age=options["min_age"])
+        found = removed = size = 0
+        while True:
+            batch = dict(islice(orphans, options["batch_size"]))
+            if not batch:
+                break
+            found += len(batch)
+            if options["dry_run"]:
+                for name in batch:
+                    self.stdout.write(name)
+                size += sum(batch.values())
+                continue
+
+            names = remove_orphans(list(batch), options["quarantine"])
+            removed += len(names)
+            size += sum(batch[name] for name in names)
+            self.stdout.write(f"Removed {removed} of {found} orphans")
+
+        action = (
+            "would be removed"
+            if options["dry_run"]
+            else "quarantined"
+            if options["quarantine"]
+            else "deleted"
+        )
+        count = found if options["dry_run"] else removed
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Orphaned files: {found}, {count} ({size} bytes) {action}"
+            )
+        )
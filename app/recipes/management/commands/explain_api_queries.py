@@ -0,0 +1,155 @@
+"""
+Django command printing query plans of recipe API requests.
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from ingredients.views import IngredientViewSet
+from recipes.dataset import analyze_tables, create_benchmark_user, seed_recipes
+from recipes.views import RecipeViewSet
+from rest_framework.test import APIRequestFactory, force_authenticate
+from tags.views import TagViewSet
+
+
+class Command(BaseCommand):
+    """
+    Django command calling recipe API views against a generated dataset and
+    printing EXPLAIN ANALYZE of every SELECT they run.
+    All generated rows are rolled back when the command finishes.
+    """
+
+    help = "Print EXPLAIN ANALYZE for recipe API queries on generated data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=20000)
+        parser.add_argument("--tags", type=int, default=200)
+        parser.add_argument("--ingredients", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+
+        with transaction.atomic():
+            user = create_benchmark_user()
+            recipes, tags, ingredients = seed_recipes(
+                user,
+                recipes=options["recipes"],
+                tags=options["tags"],
+                ingredients=options["ingredients"],
+            )
+            analyze_tables()
+
+            tag_ids = f"{tags[0].id},{tags[1].id}"
+            ingredient_ids = f"{ingredients[0].id},{ingredients[1].id}"
+            scenarios = [
+                ("recipe list", RecipeViewSet, "list", {}, {}),
+                (
+                    "recipe list filtered by tags",
+                    RecipeViewSet,
+                    "list",
+                    {"tags": tag_ids},
+                    {},
+                ),
+                (
+                    "recipe list matching all tags",
+                    RecipeViewSet,
+                    "list",
+                    {"tags": tag_ids, "match": "all"},
+                    {},
+                ),
+                (
+                    "recipe list filtered by ingredients",
+                    RecipeViewSet,
+                    "list",
+                    {"ingredients": ingredient_ids},
+                    {},
+                ),
+                (
+                    "recipe list under 20 minutes by time",
+                    RecipeViewSet,
+                    "list",
+                    {"time_max": 20, "ordering": "time_minutes"},
+                    {},
+                ),
+                (
+                    "recipe list in price range by price",
+                    RecipeViewSet,
+                    "list",
+                    {"price_min": 10, "price_max": 20, "ordering": "-price"},
+                    {},
+                ),
+                (
+                    "recipe search",
+                    RecipeViewSet,
+                    "list",
+                    {"search": "recipe 42"},
+                    {},
+                ),
+                ("recipe facets", RecipeViewSet, "facets", {}, {}),
+                (
+                    "recipe facets filtered by tags",
+                    RecipeViewSet,
+                    "facets",
+                    {"tags": tag_ids},
+                    {},
+                ),
+                (
+                    "recipe detail",
+                    RecipeViewSet,
+                    "retrieve",
+                    {},
+                    {"pk": recipes[len(recipes) // 2].id},
+                ),
+                ("tag list", TagViewSet, "list", {}, {}),
+                (
+                    "tag list assigned only",
+                    TagViewSet,
+                    "list",
+                    {"assigned_only": 1},
+                    {},
+                ),
+                (
+                    "tag autocomplete",
+                    TagViewSet,
+                    "list",
+                    {"q": "tag 1"},
+                    {},
+                ),
+                ("ingredient list", IngredientViewSet, "list", {}, {}),
+                (
+                    "ingredient autocomplete",
+                    IngredientViewSet,
+                    "list",
+                    {"q": "ingredent"},
+                    {},
+                ),
+            ]
+            with override_settings(ALLOWED_HOSTS=["testserver"]):
+                for scenario in scenarios:
+                    self._explain(user, *scenario)
+
+            transaction.set_rollback(True)
+
+    def _explain(self, user, name, viewset, action, params, kwargs):
+        """Call view action and print plans of SELECT queries it ran."""
+
+        basename = viewset.queryset.model._meta.model_name
+        suffix = {"list": "list", "retrieve": "detail"}.get(action, action)
+        url = reverse(f"recipes:{basename}-{suffix}", kwargs=kwargs)
+        request = APIRequestFactory().get(url, params)
+        force_authenticate(request, user=user)
+        view = viewset.as_view({"get": action})
+
+        with CaptureQueriesContext(connection) as captured:
+            view(request, **kwargs).render()
+
+        self.stdout.write(self.style.SUCCESS(f"== {name}: GET {url}"))
+        with connection.cursor() as cursor:
+            for query in captured.captured_queries:
+                if not query["sql"].lstrip("(").startswith("SELECT"):
+                    continue
+                cursor.execute(f"EXPLAIN ANALYZE {query['sql']}")
+                self.stdout.write(query["sql"][:200])
+                for (line,) in cursor.fetchall():
+                    self.stdout.write(f"  {line}")
+                self.stdout.write("")
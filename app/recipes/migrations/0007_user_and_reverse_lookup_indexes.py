@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0006_recipe_search_vector'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-id'], name='recipe_user_id_idx'),
+        ),
+        # Auto-created through tables only index (recipe_id, <related>_id),
+        # these serve lookups of Recipes by Tag or Ingredient.
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS recipe_tags_tag_recipe_idx '
+            'ON recipes_recipe_tags (tag_id, recipe_id);',
+            'DROP INDEX CONCURRENTLY IF EXISTS recipe_tags_tag_recipe_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS recipe_ingredients_ingredient_recipe_idx '
+            'ON recipes_recipe_ingredients (ingredient_id, recipe_id);',
+            'DROP INDEX CONCURRENTLY IF EXISTS recipe_ingredients_ingredient_recipe_idx;',
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:32
+
+from django.db import migrations, models
+from django.db.models import Count
+import recipes.models
+import recipes.storage
+
+
+def count_image_references(apps, schema_editor):
+    """Create blobs for images already used by Recipes."""
+
+    Recipe = apps.get_model('recipes', 'Recipe')
+    ImageBlob = apps.get_model('recipes', 'ImageBlob')
+    references = (
+        Recipe.objects.exclude(image__isnull=True)
+        .exclude(image='')
+        .values('image')
+        .annotate(total=Count('id'))
+    )
+    ImageBlob.objects.bulk_create(
+        [
+            ImageBlob(name=reference['image'], ref_count=reference['total'])
+            for reference in references.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(null=True, storage=recipes.storage.ContentAddressedStorage(), upload_to=recipes.models.recipe_image_file_path),
+        ),
+        migrations.RunPython(
+            count_image_references, migrations.RunPython.noop
+        ),
+    ]
@@ -1,18 +1,43 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from recipes.formats import IMAGE_FORMATS
+from recipes.storage import ContentAddressedStorage, content_digest
+from recipes.uploads import sniff_image_format
 from tags.models import Tag
 from ingredients.models import Ingredient
-import uuid
 import os
 
 
 def recipe_image_file_path(instance, filename):
-    """Generate filepath for new Recipe image."""
+    """
+    Generate filepath for new Recipe image from hash of its content.
+    Files are spread over subdirectories by the first digest characters.
+    The extension follows the format detected from the content, never the
+    client's file name, so files are not served as another type. Files of
+    unknown format get no extension.
+    """
 
-    ext = os.path.splitext(filename)[1]
-    filename = f"{uuid.uuid4()}{ext}"
+    image_format = sniff_image_format(instance.image.file)
+    ext = IMAGE_FORMATS[image_format][0] if image_format else ""
+    digest = content_digest(instance.image.file)
 
-    return os.path.join("uploads", "recipe", filename)
+    return os.path.join("uploads", "recipe", digest[:2], f"{digest}{ext}")
+
+
+class ImageBlob(models.Model):
+    """
+    Stored Recipe image file with the number of Recipes using it.
+    Recipes with identical images share one file, which is removed with
+    its variants when the last of them lets go of it.
+    """
+
+    name = models.CharField(max_length=255, primary_key=True)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
 
 
 class Recipe(models.Model):
@@ -29,7 +54,35 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField(Tag)
     ingredients = models.ManyToManyField(Ingredient)
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=ContentAddressedStorage(),
+    )
+    # Storage names of resized image copies keyed by their size in pixels,
+    # and of copies in other formats keyed by media type, then by size or
+    # "original" for the full image.
+    image_variants = models.JSONField(default=dict, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger from title and description.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-id"], name="recipe_user_id_idx"),
+            models.Index(
+                fields=["user", "price", "id"],
+                name="recipe_user_price_idx",
+            ),
+            models.Index(
+                fields=["user", "time_minutes", "id"],
+                name="recipe_user_time_idx",
+            ),
+            GinIndex(
+                fields=["search_vector"],
+                name="recipe_search_vector_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
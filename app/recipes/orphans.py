@@ -0,0 +1,159 @@
+"""
+Detection and removal of stored Recipe image files no Recipe uses.
+"""
+import hashlib
+import heapq
+import os
+import shutil
+import time
+from array import array
+from bisect import bisect_left
+from functools import reduce
+from itertools import groupby, islice
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+from recipes.images import image_storage, lock_image
+from recipes.models import ImageBlob, Recipe
+
+
+IMAGE_DIRECTORY = os.path.join("uploads", "recipe")
+
+
+def _key(root):
+    """Return 64 bit hash of image name without extension."""
+
+    digest = hashlib.blake2b(root.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _image_root(name):
+    """Return name of original image for image or variant file name."""
+
+    root = os.path.splitext(name)[0]
+    stem, _, size = root.rpartition("_")
+    return stem if stem and size.isdigit() else root
+
+
+class ReferencedImages:
+    """
+    Compact set of images referenced by Recipes or image blobs.
+    Only a sorted array of 64 bit hashes of names is kept, 8 bytes per
+    image. A hash collision can only keep an orphan, never delete a
+    referenced file.
+    """
+
+    def __init__(self, keys, chunk_size=100000):
+        # Sort keys in chunks and merge them, so no list of all keys as
+        # Python ints is ever built.
+        keys = iter(keys)
+        runs = []
+        while True:
+            chunk = sorted(islice(keys, chunk_size))
+            if not chunk:
+                break
+            runs.append(array("Q", chunk))
+
+        merged = heapq.merge(*runs)
+        self._keys = array("Q", (key for key, _ in groupby(merged)))
+
+    @classmethod
+    def load(cls, chunk_size=10000):
+        """Read referenced image names with streaming queries."""
+
+        def names():
+            yield from (
+                Recipe.objects.exclude(image__isnull=True)
+                .exclude(image="")
+                .values_list("image", flat=True)
+                .iterator(chunk_size=chunk_size)
+            )
+            yield from ImageBlob.objects.values_list(
+                "name", flat=True
+            ).iterator(chunk_size=chunk_size)
+
+        return cls(_key(os.path.splitext(name)[0]) for name in names())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, name):
+        """Check if image, or original image of variant, is referenced."""
+
+        key = _key(_image_root(name))
+        index = bisect_left(self._keys, key)
+        return index < len(self._keys) and self._keys[index] == key
+
+
+def iter_files(directory):
+    """Yield DirEntry of every file below directory, depth first."""
+
+    pending = [directory]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def iter_orphans(referenced, min_age=3600):
+    """
+    Yield storage name and size of every unreferenced image file.
+    Files modified in the last min_age seconds are skipped, as uploads in
+    progress may not be committed yet.
+    """
+
+    location = image_storage.path("")
+    newest = time.time() - min_age
+    for entry in iter_files(image_storage.path(IMAGE_DIRECTORY)):
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > newest:
+            continue
+        name = os.path.relpath(entry.path, location)
+        if name not in referenced:
+            yield name, stat.st_size
+
+
+def remove_orphans(names, quarantine=None):
+    """
+    Delete image files in names, or move them below quarantine directory.
+    The images are locked and looked up again first, so a file that an
+    upload of the same image started using since the scan is kept.
+    Returns names of removed files.
+    """
+
+    roots = sorted({_image_root(name) for name in names})
+    if not roots:
+        return []
+
+    with transaction.atomic():
+        for root in roots:
+            lock_image(root)
+        blobs = ImageBlob.objects.filter(
+            reduce(or_, (Q(name__startswith=f"{root}.") for root in roots))
+        )
+        used = {
+            os.path.splitext(name)[0]
+            for name in blobs.values_list("name", flat=True)
+        }
+
+        removed = []
+        for name in names:
+            if _image_root(name) in used:
+                continue
+            if quarantine:
+                target = os.path.join(quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(image_storage.path(name), target)
+            else:
+                image_storage.delete(name)
+            removed.append(name)
+
+    return removed
@@ -0,0 +1,56 @@
+"""
+Pagination classes for recipe APIs.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+
+# Allowed values of the `ordering` parameter. Each is backed by an index on
+# (user, <column>, id), the id breaks ties so rows have a stable position.
+ORDERINGS = {
+    "-id": ("-id",),
+    "id": ("id",),
+    "price": ("price", "id"),
+    "-price": ("-price", "-id"),
+    "time_minutes": ("time_minutes", "id"),
+    "-time_minutes": ("-time_minutes", "-id"),
+}
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Keyset pagination over Recipes ordered by descending id.
+    Each page is fetched with an indexed `id < cursor` range instead of OFFSET,
+    so deep pages cost the same as the first one.
+    """
+
+    ordering = "-id"
+    ordering_query_param = "ordering"
+    page_size = settings.RECIPES_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.RECIPES_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Order Recipes by whitelisted `ordering` parameter if given.
+        Otherwise searched Recipes are ordered by relevance, and others by
+        descending id.
+        """
+
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering:
+            if ordering not in ORDERINGS:
+                raise ValidationError(
+                    {
+                        self.ordering_query_param: (
+                            f"Must be one of: {', '.join(ORDERINGS)}."
+                        )
+                    }
+                )
+            return ORDERINGS[ordering]
+
+        if "rank" in queryset.query.annotations:
+            return ("-rank", "-id")
+
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,54 @@
+"""
+Parsers for recipe APIs.
+"""
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from recipes.uploads import LimitedUploadHandler
+from rest_framework.parsers import BaseParser, MultiPartParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parse newline delimited JSON into a lazy iterator of objects.
+    Lines are decoded while the iterator is consumed, so a large stream is
+    never held in memory at once. Blank lines are skipped.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Return iterator over JSON objects in stream."""
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        return self._iter_lines(stream, encoding)
+
+    def _iter_lines(self, stream, encoding):
+        if stream is None:
+            return
+
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line.decode(encoding))
+            except ValueError as exc:
+                raise ParseError(f"NDJSON parse error on line {number}: {exc}")
+
+
+class ImageUploadParser(MultiPartParser):
+    """
+    Parse multipart image uploads into size limited temporary files.
+    Files are never buffered in memory and the request is rejected as soon
+    as a file exceeds RECIPES_IMAGE_MAX_BYTES.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context["request"]._request
+        request.upload_handlers = [LimitedUploadHandler(request)]
+
+        return super().parse(stream, media_type, parser_context)
@@ -0,0 +1,80 @@
+"""
+Renderers for streamed recipe exports.
+"""
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render objects as newline delimited JSON."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render single object, used for error responses."""
+
+        if data is None:
+            return b""
+        return b"".join(self.stream([data]))
+
+    def stream(self, items, header=None):
+        """Yield one encoded line per item."""
+
+        for item in items:
+            line = json.dumps(item, cls=JSONEncoder, ensure_ascii=False)
+            yield f"{line}\n".encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Render Recipe representations as CSV.
+    Related Tags and Ingredients are flattened to their names joined with
+    RELATED_SEPARATOR.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+    RELATED_SEPARATOR = "|"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render single object, used for error responses."""
+
+        if data is None:
+            return b""
+        return b"".join(self.stream([data], header=list(data)))
+
+    def stream(self, items, header):
+        """Yield encoded header line followed by one line per item."""
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return value.encode(self.charset)
+
+        writer.writerow(header)
+        yield flush()
+        for item in items:
+            writer.writerow(
+                [self._to_cell(item.get(column)) for column in header]
+            )
+            yield flush()
+
+    def _to_cell(self, value):
+        """Return CSV cell for representation value."""
+
+        if isinstance(value, list):
+            return self.RELATED_SEPARATOR.join(
+                related["name"] for related in value
+            )
+        return value
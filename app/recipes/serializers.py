@@ -1,17 +1,134 @@
 """Serilizers for recipe APIs."""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import models, transaction
 from ingredients.models import Ingredient
 from ingredients.serializers import IngredientSerializer
+from recipes.cache import bump_data_version
+from recipes.formats import accepted_image_types, negotiate_image
+from recipes.images import image_storage, schedule_image_variants
 from recipes.models import Recipe
+from recipes.uploads import clean_image_upload
 from rest_framework import serializers
 from tags.models import Tag
 from tags.serializers import TagSerializer
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+def requested_fields(request):
+    """
+    Return set of field names from `fields` query parameter of a read
+    request, or None when all fields should be serialized.
+    """
+
+    if request is None or request.method not in ("GET", "HEAD"):
+        return None
+
+    fields = request.query_params.get("fields")
+    if not fields:
+        return None
+
+    return {name.strip() for name in fields.split(",") if name.strip()}
+
+
+def get_or_create_by_name(model, user, names):
+    """
+    Return objects of model owned by user for every distinct name.
+    Existing names are fetched in one query and missing ones are bulk
+    inserted with ON CONFLICT DO NOTHING, so concurrent requests
+    creating the same names do not fail or duplicate rows.
+    """
+
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+
+    objs = list(model.objects.filter(user=user, name__in=names))
+    missing = set(names) - {obj.name for obj in objs}
+    if missing:
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        objs += model.objects.filter(user=user, name__in=missing)
+        bump_data_version(user.id)
+
+    return objs
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Read-only mapping of image variant size to its URL.
+    Each URL points at the variant in the best format the client accepts.
+    URLs are absolute when the request is in serializer context.
+    """
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        accepted = accepted_image_types(request)
+        urls = {}
+        for size, name in value.items():
+            if "/" in size:
+                # Copies in other formats, keyed by media type.
+                continue
+            url = image_storage.url(
+                negotiate_image(value, size, name, accepted)
+            )
+            urls[size] = request.build_absolute_uri(url) if request else url
+
+        return urls
+
+
+class NegotiatedImageField(serializers.ImageField):
+    """Image field with URL of the best format the client accepts."""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        request = self.context.get("request")
+        name = negotiate_image(
+            value.instance.image_variants,
+            "original",
+            value.name,
+            accepted_image_types(request),
+        )
+        url = image_storage.url(name)
+
+        return request.build_absolute_uri(url) if request else url
+
+
+class RecipeImageField(NegotiatedImageField):
+    """
+    Image field validating uploads from their header only.
+    Unlike ImageField, the image is not fully decoded by Pillow, and the
+    stored copy has its metadata stripped.
+    """
+
+    def to_internal_value(self, data):
+        file = serializers.FileField.to_internal_value(self, data)
+
+        return clean_image_upload(file)
+
+
+class SparseFieldsMixin:
+    """Serialize only fields requested with `fields` query parameter."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        fields = requested_fields(self.context.get("request"))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for recipes."""
 
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -23,26 +140,26 @@ class RecipeSerializer(serializers.ModelSerializer):
             "link",
             "tags",
             "ingredients",
+            "image_variants",
         ]
         read_only_fields = ["id"]
 
+    def _get_or_create(self, model, items):
+        """Return objects of model named in items for authenticated user."""
+
+        auth_user = self.context["request"].user
+        names = [item["name"] for item in items]
+        return get_or_create_by_name(model, auth_user, names)
+
     def _get_or_create_tags(self, tags, recipe):
         """Handle getting or creating Tags."""
 
-        auth_user = self.context["request"].user
-        for tag in tags:
-            tag_obj, _ = Tag.objects.get_or_create(user=auth_user, **tag)
-            recipe.tags.add(tag_obj)
+        recipe.tags.add(*self._get_or_create(Tag, tags))
 
     def _get_or_create_ingredients(self, ingredients, recipe):
         """Handle getting or creating Ingredients."""
 
-        auth_user = self.context["request"].user
-        for ingredient in ingredients:
-            ingredient_obj, _ = Ingredient.objects.get_or_create(
-                user=auth_user, **ingredient
-            )
-            recipe.ingredients.add(ingredient_obj)
+        recipe.ingredients.add(*self._get_or_create(Ingredient, ingredients))
 
     def create(self, validated_data):
         """Create a Recipe and or create Tags if any."""
@@ -55,39 +172,227 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Update method."""
+        """
+        Update method.
+        Tags and Ingredients are synced with set(), which only deletes and
+        inserts the links that changed, and the Recipe row is only saved
+        when one of its fields changed.
+        """
 
         tags = validated_data.pop("tags", None)
         ingredients = validated_data.pop("ingredients", None)
 
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            instance.tags.set(self._get_or_create(Tag, tags))
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            instance.ingredients.set(
+                self._get_or_create(Ingredient, ingredients)
+            )
 
+        changed = False
         for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+            if getattr(instance, attr) != value:
+                setattr(instance, attr, value)
+                changed = True
 
-        instance.save()
+        if changed:
+            instance.save()
         return instance
 
 
 class RecipeDetailSerializer(RecipeSerializer):
-    """Detail serializer for Recipe detail view."""
+    """
+    Detail serializer for Recipe detail view.
+    Images are only uploaded through RecipeImageSerializer, which validates
+    and strips them and rebuilds their variants.
+    """
+
+    serializer_field_mapping = {
+        **RecipeSerializer.serializer_field_mapping,
+        models.ImageField: NegotiatedImageField,
+    }
 
     class Meta(RecipeSerializer.Meta):
         fields = RecipeSerializer.Meta.fields + ["description", "image"]
+        read_only_fields = RecipeSerializer.Meta.read_only_fields + ["image"]
+
+
+class RecipeImportSerializer(RecipeSerializer):
+    """Serializer validating a single item of a bulk Recipe import."""
+
+    image_variants = None
+
+    class Meta(RecipeSerializer.Meta):
+        fields = [
+            name
+            for name in RecipeSerializer.Meta.fields
+            if name != "image_variants"
+        ] + ["description"]
+
+
+class RecipeBulkSerializer(serializers.ModelSerializer):
+    """
+    Serializer for bulk change of Recipes selected by ids.
+    Holds the partial Recipe update applied to all of them and Tags and
+    Ingredients to add or remove by name.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+    )
+    add_tags = TagSerializer(many=True, required=False)
+    remove_tags = TagSerializer(many=True, required=False)
+    add_ingredients = IngredientSerializer(many=True, required=False)
+    remove_ingredients = IngredientSerializer(many=True, required=False)
+
+    class Meta:
+        model = Recipe
+        fields = [
+            "ids",
+            "title",
+            "time_minutes",
+            "price",
+            "link",
+            "description",
+            "add_tags",
+            "remove_tags",
+            "add_ingredients",
+            "remove_ingredients",
+        ]
+
+    def validate_ids(self, value):
+        """Check number of ids is within the bulk limit."""
+
+        if len(value) > settings.RECIPES_BULK_MAX_IDS:
+            raise serializers.ValidationError(
+                f"At most {settings.RECIPES_BULK_MAX_IDS} ids are allowed."
+            )
+
+        return list(dict.fromkeys(value))
+
+    def validate(self, attrs):
+        """Require ids even for partial validation."""
+
+        if "ids" not in attrs:
+            raise serializers.ValidationError(
+                {"ids": "This field is required."}
+            )
+
+        return attrs
+
+
+RELATED_FIELDS = {
+    "tags": (Recipe.tags.through, "tag"),
+    "ingredients": (Recipe.ingredients.through, "ingredient"),
+}
+
+
+class RecipeRowListSerializer(serializers.ListSerializer):
+    """Serialize a list of Recipe rows with batched related lookups."""
+
+    def to_representation(self, data):
+        return self.child.rows_to_representation(list(data))
+
+
+class RecipeRowSerializer(serializers.BaseSerializer):
+    """
+    Read-only serializer producing RecipeSerializer output from `.values()`
+    rows, without instantiating Recipe, Tag or Ingredient models.
+    """
+
+    serializer_class = RecipeSerializer
+
+    class Meta:
+        list_serializer_class = RecipeRowListSerializer
+
+    @classmethod
+    def columns(cls, fields=None):
+        """Return Recipe columns to select for requested fields."""
+
+        names = {
+            name
+            for name in cls.serializer_class.Meta.fields
+            if name not in RELATED_FIELDS
+            and (fields is None or name in fields)
+        }
+        return ["id", *sorted(names - {"id"})]
+
+    def _related(self, name, ids):
+        """Return mapping of Recipe id to list of related id/name dicts."""
+
+        through, column = RELATED_FIELDS[name]
+        links = through.objects.filter(recipe_id__in=ids).values_list(
+            "recipe_id", f"{column}__id", f"{column}__name"
+        )
+        related = defaultdict(list)
+        for recipe_id, related_id, related_name in links:
+            related[recipe_id].append({"id": related_id, "name": related_name})
+
+        return related
+
+    def rows_to_representation(self, rows):
+        """Serialize rows, fetching each relation once for all of them."""
+
+        fields = self.serializer_class(context=self.context).fields
+        ids = [row["id"] for row in rows]
+        related = {
+            name: self._related(name, ids) if ids else {}
+            for name in fields
+            if name in RELATED_FIELDS
+        }
+        converters = [
+            (name, field.to_representation, related.get(name))
+            for name, field in fields.items()
+        ]
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, to_representation, by_recipe in converters:
+                if by_recipe is not None:
+                    item[name] = by_recipe.get(row["id"], [])
+                else:
+                    value = row[name]
+                    item[name] = (
+                        None if value is None else to_representation(value)
+                    )
+            data.append(item)
+
+        return data
+
+    def to_representation(self, instance):
+        return self.rows_to_representation([instance])[0]
+
+
+class RecipeExportRowSerializer(RecipeRowSerializer):
+    """Row serializer producing Recipes in the bulk import shape."""
+
+    serializer_class = RecipeImportSerializer
 
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer for uloading images to Recipes."""
 
+    image = RecipeImageField()
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ["id", "image"]
+        fields = ["id", "image", "image_variants"]
         read_only_fields = ["id"]
-        extra_kwargs = {"image": {"required": "True"}}
+
+    def update(self, instance, validated_data):
+        """Store image and schedule building of its variants."""
+
+        instance.image_variants = {}
+        try:
+            recipe = super().update(instance, validated_data)
+        finally:
+            validated_data["image"].close()
+        schedule_image_variants(recipe)
+
+        return recipe
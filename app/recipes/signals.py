@@ -0,0 +1,132 @@
+"""
+Signal handlers keeping cached recipe API responses, Recipe change
+markers and image references up to date.
+"""
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.utils import timezone
+from ingredients.models import Ingredient
+from recipes.cache import bump_data_version
+from recipes.images import acquire_image, release_images
+from recipes.models import Recipe
+from tags.models import Tag
+
+
+THROUGH_MODELS = {
+    Tag: Recipe.tags.through,
+    Ingredient: Recipe.ingredients.through,
+}
+
+
+def touch_recipes(queryset):
+    """Mark Recipes in queryset as modified now."""
+
+    return queryset.update(updated_at=timezone.now())
+
+
+def _recipes_linked_to(through, instance):
+    """Return Recipes linked to Tag or Ingredient instance."""
+
+    related_column = f"{instance._meta.model_name}_id"
+    links = through.objects.filter(**{related_column: instance.pk})
+    return Recipe.objects.filter(id__in=links.values("recipe_id"))
+
+
+def invalidate_owner_cache(sender, instance, **kwargs):
+    """Bump data version of the user owning changed object."""
+
+    bump_data_version(instance.user_id)
+
+
+def invalidate_owner_cache_on_m2m(sender, instance, action, **kwargs):
+    """Bump data version of the user after Recipe relations changed."""
+
+    if action.startswith("post_"):
+        bump_data_version(instance.user_id)
+
+
+def touch_recipes_on_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """Mark Recipes as modified after their Tags or Ingredients changed."""
+
+    if not reverse:
+        if action.startswith("post_"):
+            instance.updated_at = timezone.now()
+            Recipe.objects.filter(pk=instance.pk).update(
+                updated_at=instance.updated_at
+            )
+    elif action == "pre_clear":
+        touch_recipes(_recipes_linked_to(sender, instance))
+    elif action in ("post_add", "post_remove"):
+        touch_recipes(Recipe.objects.filter(pk__in=pk_set))
+
+
+def touch_recipes_on_related_change(sender, instance, **kwargs):
+    """Mark Recipes using a renamed or deleted Tag or Ingredient."""
+
+    if not kwargs.get("created", False):
+        through = THROUGH_MODELS[sender]
+        touch_recipes(_recipes_linked_to(through, instance))
+
+
+def acquire_uploaded_image(sender, instance, update_fields=None, **kwargs):
+    """
+    Reference new image of Recipe before it is written and remember the
+    stored image it replaces, also when the image is cleared.
+    """
+
+    if update_fields is not None and "image" not in update_fields:
+        return
+
+    image = instance.image
+    stored = (
+        Recipe.objects.filter(pk=instance.pk)
+        .values_list("image", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+    if image and not image._committed:
+        acquire_image(image.field.generate_filename(instance, image.name))
+    elif (image.name or "") == (stored or ""):
+        return
+    elif image:
+        acquire_image(image.name)
+
+    instance._replaced_image = stored
+
+
+def release_replaced_image(sender, instance, **kwargs):
+    """Release image of Recipe replaced or cleared by the save."""
+
+    replaced = instance.__dict__.pop("_replaced_image", None)
+    if replaced:
+        release_images([replaced])
+
+
+def release_deleted_image(sender, instance, **kwargs):
+    """Release image of deleted Recipe."""
+
+    if instance.image:
+        release_images([instance.image.name])
+
+
+pre_save.connect(acquire_uploaded_image, sender=Recipe)
+post_save.connect(release_replaced_image, sender=Recipe)
+post_delete.connect(release_deleted_image, sender=Recipe)
+
+for model in (Recipe, Tag, Ingredient):
+    post_save.connect(invalidate_owner_cache, sender=model)
+    post_delete.connect(invalidate_owner_cache, sender=model)
+
+for model in THROUGH_MODELS:
+    post_save.connect(touch_recipes_on_related_change, sender=model)
+    pre_delete.connect(touch_recipes_on_related_change, sender=model)
+
+for through in THROUGH_MODELS.values():
+    m2m_changed.connect(invalidate_owner_cache_on_m2m, sender=through)
+    m2m_changed.connect(touch_recipes_on_m2m, sender=through)
@@ -0,0 +1,51 @@
+"""
+Content-addressed storage of Recipe images.
+"""
+import hashlib
+import os
+import uuid
+from urllib.parse import urlencode
+
+from core.media import sign_media
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+
+def content_digest(file):
+    """Return SHA-256 hex digest of file content."""
+
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage for files named after their content.
+    A name that already exists holds the same bytes, so saving it again
+    keeps the stored file instead of writing a renamed copy. New files are
+    written under a temporary name and moved in place, so a file is never
+    seen half written. URLs are signed unless MEDIA_URL_MAX_AGE is 0.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+
+        temporary = super()._save(f"{name}.{uuid.uuid4().hex}.tmp", content)
+        os.replace(self.path(temporary), self.path(name))
+
+        return name
+
+    def url(self, name):
+        url = super().url(name)
+        if settings.MEDIA_URL_MAX_AGE:
+            url = f"{url}?{urlencode(sign_media(name))}"
+
+        return url
@@ -0,0 +1,264 @@
+"""
+Bounded-memory handling of uploaded Recipe images.
+"""
+import os
+import shutil
+import struct
+import warnings
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext as _
+from PIL import Image, UnidentifiedImageError
+from recipes.formats import IMAGE_FORMATS
+from rest_framework.exceptions import ValidationError
+
+
+COPY_BUFFER_SIZE = 64 * 1024
+ORIENTATION_TAG = 0x0112
+# JPEG segments with metadata: APP1 (Exif, XMP), APP13 (IPTC) and comment.
+JPEG_METADATA_MARKERS = {0xE1, 0xED, 0xFE}
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_METADATA_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"eXIf", b"tIME"}
+WEBP_METADATA_CHUNKS = {b"EXIF", b"XMP "}
+# Flags of VP8X chunk announcing EXIF and XMP chunks.
+WEBP_METADATA_FLAGS = 0x08 | 0x04
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream uploaded files to temporary files in chunks.
+    The upload is rejected as soon as a file grows over
+    RECIPES_IMAGE_MAX_BYTES, so it is never held in memory.
+    """
+
+    def receive_data_chunk(self, raw_data, start):
+        limit = settings.RECIPES_IMAGE_MAX_BYTES
+        if start + len(raw_data) > limit:
+            self.file.close()
+            message = _("Image exceeds %(limit)s bytes.") % {"limit": limit}
+            raise ValidationError({"image": [message]})
+
+        return super().receive_data_chunk(raw_data, start)
+
+
+def _copy(source, target, length):
+    """Copy length bytes from source to target in bounded chunks."""
+
+    while length > 0:
+        chunk = source.read(min(length, COPY_BUFFER_SIZE))
+        if not chunk:
+            raise ValueError("Unexpected end of file.")
+        target.write(chunk)
+        length -= len(chunk)
+
+
+def _read(source, length, allow_eof=False):
+    """
+    Read exactly length bytes from source.
+    With allow_eof, empty bytes are returned at the end of source.
+    """
+
+    data = source.read(length)
+    if len(data) != length and not (allow_eof and not data):
+        raise ValueError("Unexpected end of file.")
+
+    return data
+
+
+def _exif_orientation(data):
+    """Return orientation tag of EXIF APP1 payload, or None."""
+
+    if not data.startswith(b"Exif\x00\x00"):
+        return None
+
+    tiff = data[6:]
+    order = {b"MM": ">", b"II": "<"}.get(tiff[:2])
+    if order is None:
+        return None
+    try:
+        offset = struct.unpack_from(f"{order}I", tiff, 4)[0]
+        count = struct.unpack_from(f"{order}H", tiff, offset)[0]
+        for index in range(count):
+            tag, kind, number, value = struct.unpack_from(
+                f"{order}HHIH", tiff, offset + 2 + index * 12
+            )
+            if tag == ORIENTATION_TAG and kind == 3:
+                return value
+    except struct.error:
+        return None
+
+    return None
+
+
+def _orientation_exif(orientation):
+    """Return APP1 segment holding only an EXIF orientation tag."""
+
+    payload = (
+        b"Exif\x00\x00MM\x00\x2a\x00\x00\x00\x08"
+        + struct.pack(">HHHIHHI", 1, ORIENTATION_TAG, 3, 1, orientation, 0, 0)
+    )
+    return b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+
+
+def strip_jpeg(source, target):
+    """
+    Copy JPEG without metadata segments.
+    EXIF is replaced by a segment with only the orientation tag, so the
+    image is still displayed upright. Entropy coded data after the start
+    of scan is copied unchanged.
+    """
+
+    target.write(_read(source, 2))
+    while True:
+        marker = _read(source, 2)
+        if marker[0] != 0xFF:
+            raise ValueError("Invalid JPEG marker.")
+        if marker[1] == 0xDA:
+            target.write(marker)
+            shutil.copyfileobj(source, target, COPY_BUFFER_SIZE)
+            return
+
+        size = _read(source, 2)
+        length = struct.unpack(">H", size)[0] - 2
+        if marker[1] == 0xE1:
+            orientation = _exif_orientation(_read(source, length))
+            if orientation and orientation != 1:
+                target.write(_orientation_exif(orientation))
+        elif marker[1] in JPEG_METADATA_MARKERS:
+            source.seek(length, 1)
+        else:
+            target.write(marker + size)
+            _copy(source, target, length)
+
+
+def strip_png(source, target):
+    """Copy PNG without text, time and EXIF chunks."""
+
+    target.write(_read(source, len(PNG_SIGNATURE)))
+    while True:
+        header = _read(source, 8, allow_eof=True)
+        if not header:
+            return
+        length, kind = struct.unpack(">I4s", header)
+        if kind in PNG_METADATA_CHUNKS:
+            source.seek(length + 4, 1)
+        else:
+            target.write(header)
+            _copy(source, target, length + 4)
+        if kind == b"IEND":
+            return
+
+
+def strip_webp(source, target):
+    """Copy WebP without EXIF and XMP chunks, fixing sizes and flags."""
+
+    riff = _read(source, 12)
+    target.write(riff)
+    size = 4
+    while True:
+        header = _read(source, 8, allow_eof=True)
+        if not header:
+            break
+        kind, length = struct.unpack("<4sI", header)
+        padded = length + length % 2
+        if kind in WEBP_METADATA_CHUNKS:
+            source.seek(padded, 1)
+            continue
+        if kind == b"VP8X":
+            data = bytearray(_read(source, padded))
+            data[0] &= ~WEBP_METADATA_FLAGS & 0xFF
+            target.write(header + data)
+        else:
+            target.write(header)
+            _copy(source, target, padded)
+        size += 8 + padded
+
+    target.seek(4)
+    target.write(struct.pack("<I", size))
+    target.seek(0, 2)
+
+
+def sniff_image_format(file):
+    """Return image format from the magic bytes of file, or None."""
+
+    file.seek(0)
+    head = file.read(12)
+    file.seek(0)
+    if head.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if head.startswith(PNG_SIGNATURE):
+        return "PNG"
+    if head[:4] == b"RIFF" and head[8:] == b"WEBP":
+        return "WEBP"
+
+    return None
+
+
+def _inspect(file):
+    """
+    Return format and pixel count read from the header of image file,
+    without decoding image data.
+    """
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+        with Image.open(file) as image:
+            width, height = image.size
+            frames = getattr(image, "n_frames", 1)
+
+            return image.format, width * height * frames
+
+
+def clean_image_upload(file):
+    """
+    Return copy of uploaded image without metadata after validating it.
+    Metadata is dropped first by copying the file segment by segment, so
+    Pillow never parses it. Format and pixel count are then read from the
+    header before anything is decoded, and decompression bombs are
+    rejected while using a few kilobytes of memory. Image data is never
+    decoded or re-encoded.
+    """
+
+    invalid = _("Upload a valid image. The file is not an image or corrupted.")
+    image_format = sniff_image_format(file)
+    if image_format is None:
+        raise ValidationError(invalid)
+    if image_format not in settings.RECIPES_IMAGE_FORMATS:
+        raise ValidationError(
+            _("Unsupported image format %(format)s.")
+            % {"format": image_format}
+        )
+
+    # The client's file name only lends its stem, the extension and content
+    # type the file is later served with follow the detected format.
+    ext, content_type = IMAGE_FORMATS[image_format][:2]
+    stem = os.path.splitext(os.path.basename(file.name or "image"))[0]
+    cleaned = TemporaryUploadedFile(
+        f"{stem}{ext}", content_type, None, file.charset
+    )
+    strip = {"JPEG": strip_jpeg, "PNG": strip_png, "WEBP": strip_webp}
+    try:
+        strip[image_format](file, cleaned)
+        cleaned.size = cleaned.tell()
+        cleaned.seek(0)
+        inspected_format, pixels = _inspect(cleaned)
+    except Image.DecompressionBombError:
+        pixels = None
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        cleaned.close()
+        raise ValidationError(invalid)
+
+    if pixels is None or pixels > settings.RECIPES_IMAGE_MAX_PIXELS:
+        cleaned.close()
+        raise ValidationError(
+            _("Image exceeds %(limit)s pixels.")
+            % {"limit": settings.RECIPES_IMAGE_MAX_PIXELS}
+        )
+    if inspected_format != image_format:
+        cleaned.close()
+        raise ValidationError(invalid)
+
+    cleaned.seek(0)
+    return cleaned
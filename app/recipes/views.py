@@ -1,6 +1,13 @@
 """
 Views for recipe APIs.
 """
+from collections.abc import Iterator
+
+from core.media import media_url_epoch
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_etags, quote_etag
 from drf_spectacular.utils import (
     OpenApiParameter,
     OpenApiTypes,
@@ -8,73 +15,263 @@ from drf_spectacular.utils import (
     extend_schema_view,
 )
 from recipes import serializers
+from recipes.bulk import bulk_delete_recipes, bulk_update_recipes
+from recipes.cache import CachedListMixin
+from recipes.export import export_columns, iter_export
+from recipes.filters import (
+    autocomplete_by_name,
+    filter_by_related,
+    related_facets,
+    search_recipes,
+)
+from recipes.formats import accepted_image_types
+from recipes.importer import RecipeImporter
 from recipes.models import Recipe
-from rest_framework import mixins, status, viewsets
-from rest_framework.authentication import TokenAuthentication
+from recipes.pagination import ORDERINGS, RecipeCursorPagination
+from recipes.parsers import ImageUploadParser, NDJSONParser
+from recipes.renderers import CSVRenderer, NDJSONRenderer
+from rest_framework import fields, mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from users.authentication import SignedTokenAuthentication
+
+
+CONDITIONAL_HEADERS = [
+    "HTTP_IF_MATCH",
+    "HTTP_IF_NONE_MATCH",
+    "HTTP_IF_MODIFIED_SINCE",
+    "HTTP_IF_UNMODIFIED_SINCE",
+]
+AUTOCOMPLETE_LIMIT = 10
+CONCRETE_FIELDS = {field.name for field in Recipe._meta.concrete_fields}
+FIELDS_PARAMETER = OpenApiParameter(
+    "fields",
+    OpenApiTypes.STR,
+    description="Comma separated list of Recipe fields to return",
+)
+ORDERING_PARAMETER = OpenApiParameter(
+    "ordering",
+    OpenApiTypes.STR,
+    enum=list(ORDERINGS),
+    description=(
+        "Sort key, prefix with - for descending order. "
+        "Defaults to relevance when searching, otherwise to -id."
+    ),
+)
+RANGE_FILTERS = {
+    "price_min": (
+        "price__gte",
+        fields.DecimalField(max_digits=5, decimal_places=2),
+    ),
+    "price_max": (
+        "price__lte",
+        fields.DecimalField(max_digits=5, decimal_places=2),
+    ),
+    "time_max": ("time_minutes__lte", fields.IntegerField(min_value=0)),
+}
+FILTER_PARAMETERS = [
+    OpenApiParameter(
+        "tags",
+        OpenApiTypes.STR,
+        description="Comma separated list of Tag IDs to filter",
+    ),
+    OpenApiParameter(
+        "ingredients",
+        OpenApiTypes.STR,
+        description="Comma separated list of Ingredient IDs to filter",
+    ),
+    OpenApiParameter(
+        "match",
+        OpenApiTypes.STR,
+        enum=["any", "all"],
+        description=(
+            "Return Recipes matching any (default) "
+            "or all of the given Tags and Ingredients."
+        ),
+    ),
+    OpenApiParameter(
+        "price_min",
+        OpenApiTypes.DECIMAL,
+        description="Return Recipes costing at least this price.",
+    ),
+    OpenApiParameter(
+        "price_max",
+        OpenApiTypes.DECIMAL,
+        description="Return Recipes costing at most this price.",
+    ),
+    OpenApiParameter(
+        "time_max",
+        OpenApiTypes.INT,
+        description="Return Recipes taking at most this many minutes.",
+    ),
+    OpenApiParameter(
+        "search",
+        OpenApiTypes.STR,
+        description=(
+            "Full-text search in Recipe title and description, "
+            "results are ordered by relevance"
+        ),
+    ),
+]
+
+
+def recipe_etag(pk, updated_at, request):
+    """
+    Return quoted ETag for Recipe modified at updated_at.
+    Responses hold media URLs signed for the current period, in the image
+    formats negotiated from the Accept header of request. The tag changes
+    with both, so clients never keep expired URLs or another format.
+    """
+
+    marker = int(updated_at.timestamp()) * 10**6 + updated_at.microsecond
+    image_types = ",".join(accepted_image_types(request))
+    return quote_etag(f"{pk}-{marker}.{media_url_epoch()}.{image_types}")
+
+
+def recipe_last_modified(updated_at):
+    """
+    Return Last-Modified timestamp of Recipe read modified at updated_at,
+    not before the start of the current media URL signing period.
+    """
+
+    period_start = media_url_epoch() * settings.MEDIA_URL_MAX_AGE
+    return max(int(updated_at.timestamp()), period_start)
+
+
+def _precondition_etag(request, etag):
+    """
+    Return tag from If-Match of request naming the same Recipe state as
+    etag, else etag.
+    Preconditions of changes only compare the Recipe, not the signing
+    period or image formats of the representation the client read.
+    """
+
+    state = etag.split(".")[0]
+    for tag in parse_etags(request.META.get("HTTP_IF_MATCH", "")):
+        if tag.split(".")[0] == state:
+            return tag
+
+    return etag
 
 
 @extend_schema_view(
     list=extend_schema(
-        parameters=[
-            OpenApiParameter(
-                "tags",
-                OpenApiTypes.STR,
-                description="Comma separated list of Tag IDs to filter",
-            ),
-            OpenApiParameter(
-                "ingredients",
-                OpenApiTypes.STR,
-                description="Comma separated list of Ingredient IDs to filter",
-            ),
-        ]
-    )
+        parameters=[*FILTER_PARAMETERS, ORDERING_PARAMETER, FIELDS_PARAMETER]
+    ),
+    retrieve=extend_schema(parameters=[FIELDS_PARAMETER]),
+    facets=extend_schema(
+        parameters=FILTER_PARAMETERS,
+        responses={status.HTTP_200_OK: OpenApiTypes.OBJECT},
+    ),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedListMixin, viewsets.ModelViewSet):
     """
     View for manage recipe APIs.
     """
 
     serializer_class = serializers.RecipeDetailSerializer
-    queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    queryset = Recipe.objects.defer("search_vector")
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
 
-    def _params_to_ints(self, qs):
+    def _params_to_ints(self, qs, name):
         """Convert a list of strings to integers"""
-        return [int(str_id) for str_id in qs.split(",")]
+        try:
+            return [int(str_id) for str_id in qs.split(",")]
+        except ValueError:
+            raise ValidationError({name: ["Expected comma separated ids."]})
 
-    def get_queryset(self):
-        "Retrive recipes for authenticated user."
+    def _filter_recipes(self, queryset):
+        """Apply list filters of request to Recipes of authenticated user."""
 
         tags = self.request.query_params.get("tags")
         ingredients = self.request.query_params.get("ingredients")
-        queryset = self.queryset
+        match_all = self.request.query_params.get("match") == "all"
         if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            tag_ids = self._params_to_ints(tags, "tags")
+            queryset = filter_by_related(queryset, "tags", tag_ids, match_all)
 
         if ingredients:
-            ingredients_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredients_ids)
+            ingredients_ids = self._params_to_ints(ingredients, "ingredients")
+            queryset = filter_by_related(
+                queryset, "ingredients", ingredients_ids, match_all
+            )
+
+        for name, (lookup, field) in RANGE_FILTERS.items():
+            value = self.request.query_params.get(name)
+            if value:
+                try:
+                    value = field.run_validation(value)
+                except ValidationError as exc:
+                    raise ValidationError({name: exc.detail})
+                queryset = queryset.filter(**{lookup: value})
+
+        search = self.request.query_params.get("search")
+        if search:
+            queryset = search_recipes(queryset, search)
+
+        return queryset.filter(user=self.request.user)
+
+    def get_queryset(self):
+        "Retrive recipes for authenticated user."
+
+        queryset = self._filter_recipes(self.queryset).order_by("-id")
+        search = self.request.query_params.get("search")
+        fields = serializers.requested_fields(self.request)
+        # Pagination cursors are built from the sort columns of each row.
+        ordering = self.request.query_params.get("ordering")
+        sort_columns = [
+            name.lstrip("-") for name in ORDERINGS.get(ordering, ())
+        ]
+        if self._use_row_serializer():
+            columns = serializers.RecipeRowSerializer.columns(fields)
+            if search:
+                columns.append("rank")
+            columns += [name for name in sort_columns if name not in columns]
+            return queryset.values(*columns)
 
-        return (
-            queryset.filter(
-                user=self.request.user,
+        related = ["tags", "ingredients"]
+        if fields is not None:
+            related = [name for name in related if name in fields]
+            columns = fields & CONCRETE_FIELDS
+            queryset = queryset.only(
+                "id", "updated_at", *columns, *sort_columns
             )
-            .order_by("-id")
-            .distinct()
+
+        return queryset.prefetch_related(*related)
+
+    def _use_row_serializer(self):
+        """Check if list should be built by the fast row serializer."""
+
+        return self.action == "list" and settings.RECIPES_FAST_LIST
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Mark response as varying with Accept, which picks image formats."""
+
+        response = super().finalize_response(
+            request, response, *args, **kwargs
         )
+        patch_vary_headers(response, ["Accept"])
+
+        return response
 
     def get_serializer_class(self):
         """Return serializer for request."""
 
-        if self.action == "list":
+        if self._use_row_serializer():
+            return serializers.RecipeRowSerializer
+        elif self.action == "list":
             return serializers.RecipeSerializer
         elif self.action == "upload_image":
             return serializers.RecipeImageSerializer
+        elif self.action == "bulk_import":
+            return serializers.RecipeImportSerializer
+        elif self.action == "bulk":
+            return serializers.RecipeBulkSerializer
 
         return self.serializer_class
 
@@ -83,7 +280,220 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         serializer.save(user=self.request.user)
 
-    @action(methods=["POST"], detail=True, url_path="upload-image")
+    def _get_updated_at(self):
+        """Return change marker of requested Recipe without loading it."""
+
+        try:
+            return (
+                self.queryset.filter(
+                    user=self.request.user,
+                    pk=self.kwargs["pk"],
+                )
+                .values_list("updated_at", flat=True)
+                .first()
+            )
+        except (TypeError, ValueError):
+            return None
+
+    def _conditional_response(self, request):
+        """
+        Evaluate conditional request headers against Recipe change marker.
+        Returns 304 or 412 response if preconditions allow it, else None.
+        """
+
+        if not any(header in request.META for header in CONDITIONAL_HEADERS):
+            return None
+
+        updated_at = self._get_updated_at()
+        if updated_at is None:
+            return None
+
+        etag = recipe_etag(self.kwargs["pk"], updated_at, request)
+        last_modified = recipe_last_modified(updated_at)
+        if request.method not in ("GET", "HEAD"):
+            etag = _precondition_etag(request, etag)
+            last_modified = int(updated_at.timestamp())
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            self._set_conditional_headers(response, updated_at)
+
+        return response
+
+    def _set_conditional_headers(self, response, updated_at):
+        """Add ETag and Last-Modified of requested Recipe to response."""
+
+        if updated_at is not None:
+            response["ETag"] = recipe_etag(
+                self.kwargs["pk"], updated_at, self.request
+            )
+            response["Last-Modified"] = http_date(
+                recipe_last_modified(updated_at)
+            )
+
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve Recipe unless client copy is still fresh."""
+
+        response = self._conditional_response(request)
+        if response is not None:
+            return response
+
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        return self._set_conditional_headers(response, instance.updated_at)
+
+    def update(self, request, *args, **kwargs):
+        """Update Recipe if If-Match preconditions pass."""
+
+        response = self._conditional_response(request)
+        if response is not None:
+            return response
+
+        response = super().update(request, *args, **kwargs)
+        return self._set_conditional_headers(response, self._get_updated_at())
+
+    def destroy(self, request, *args, **kwargs):
+        """Delete Recipe if If-Match preconditions pass."""
+
+        response = self._conditional_response(request)
+        if response is not None:
+            return response
+
+        return super().destroy(request, *args, **kwargs)
+
+    @extend_schema(
+        request=serializers.RecipeImportSerializer(many=True),
+        responses={status.HTTP_201_CREATED: OpenApiTypes.OBJECT},
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="import",
+        parser_classes=[JSONParser, NDJSONParser],
+    )
+    def bulk_import(self, request):
+        """
+        Create Recipes from JSON array or NDJSON stream.
+        Invalid items are reported next to their index and skipped.
+        """
+
+        items = request.data
+        if isinstance(items, dict):
+            items = [items]
+        elif not isinstance(items, (list, Iterator)):
+            raise ValidationError(
+                "Expected a list of Recipes or a single Recipe."
+            )
+
+        results = RecipeImporter(request.user).run(
+            items, context=self.get_serializer_context()
+        )
+        created = sum("id" in result for result in results)
+        response_status = (
+            status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+
+        return Response(
+            {
+                "created": created,
+                "failed": len(results) - created,
+                "results": results,
+            },
+            status=response_status,
+        )
+
+    @extend_schema(
+        responses={
+            (status.HTTP_200_OK, NDJSONRenderer.media_type): OpenApiTypes.STR,
+            (status.HTTP_200_OK, CSVRenderer.media_type): OpenApiTypes.STR,
+        }
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """
+        Stream all Recipes of authenticated user as NDJSON or CSV.
+        Format is negotiated from Accept header or `format` parameter.
+        """
+
+        renderer = request.accepted_renderer
+        items = iter_export(request.user)
+        response = StreamingHttpResponse(
+            renderer.stream(items, header=export_columns()),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="recipes.{renderer.format}"'
+        )
+
+        return response
+
+    @action(methods=["GET"], detail=False)
+    def facets(self, request):
+        """
+        Return Recipe counts per Tag and Ingredient of authenticated user.
+        Counts cover Recipes matching the same filters as the list.
+        """
+
+        def build():
+            recipes = self._filter_recipes(Recipe.objects.all())
+            return Response(related_facets(recipes))
+
+        return self.cached_response(request, build)
+
+    @extend_schema(responses={status.HTTP_200_OK: OpenApiTypes.OBJECT})
+    @action(methods=["PATCH", "DELETE"], detail=False)
+    def bulk(self, request):
+        """
+        Update or delete Recipes of authenticated user listed in `ids`.
+        PATCH applies the same partial update to all of them and can add
+        or remove Tags and Ingredients by name.
+        """
+
+        serializer = self.get_serializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        ids = data.pop("ids")
+
+        if request.method == "DELETE":
+            affected = bulk_delete_recipes(request.user, ids)
+        else:
+            add, remove = (
+                {
+                    relation: [
+                        item["name"]
+                        for item in data.pop(f"{change}_{relation}", [])
+                    ]
+                    for relation in ("tags", "ingredients")
+                }
+                for change in ("add", "remove")
+            )
+            affected = bulk_update_recipes(
+                request.user, ids, data, add=add, remove=remove
+            )
+
+        found = set(affected)
+        return Response(
+            {
+                "ids": affected,
+                "not_found": [pk for pk in ids if pk not in found],
+            }
+        )
+
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path="upload-image",
+        parser_classes=[ImageUploadParser],
+    )
     def upload_image(self, request, pk=None):
         """Upload an image to Recipe."""
 
@@ -103,11 +513,20 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 OpenApiTypes.INT,
                 enum=[0, 1],
                 description="Filter by items assigned to Recipes.",
-            )
+            ),
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                description=(
+                    "Autocomplete by name prefix or similar word, "
+                    f"returns at most {AUTOCOMPLETE_LIMIT} best matches."
+                ),
+            ),
         ]
     )
 )
 class BaseRecipeAttrViewSet(
+    CachedListMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
@@ -115,19 +534,25 @@ class BaseRecipeAttrViewSet(
 ):
     """Base ViewSet for Recipe attributes."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def use_local_cache(self):
+        """Keep hot autocomplete responses in the per-process cache."""
+
+        return bool(self.request.query_params.get("q"))
+
     def get_queryset(self):
         "Retrive queryset for authenticated user."
         assigned_only = int(self.request.query_params.get("assigned_only", 0))
+        text = self.request.query_params.get("q", "").strip()
         queryset = self.queryset
         if assigned_only:
             queryset = queryset.filter(recipe__isnull=False)
-        return (
-            queryset.filter(
-                user=self.request.user,
-            )
-            .order_by("-name")
-            .distinct()
-        )
+        queryset = queryset.filter(
+            user=self.request.user,
+        ).distinct()
+        if self.action == "list" and text:
+            return autocomplete_by_name(queryset, text)[:AUTOCOMPLETE_LIMIT]
+
+        return queryset.order_by("-name")
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tags', '0002_tag_name_trgm_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name'], name='tag_user_name_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:48
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """Merge Tags sharing user and name into the oldest one."""
+
+    Tag = apps.get_model('tags', 'Tag')
+    Through = apps.get_model('recipes', 'Recipe').tags.through
+    duplicates = (
+        Tag.objects.values('user_id', 'name')
+        .annotate(keep_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        extra = Tag.objects.filter(
+            user_id=duplicate['user_id'],
+            name=duplicate['name'],
+        ).exclude(id=duplicate['keep_id'])
+        links = Through.objects.filter(tag__in=extra)
+        Through.objects.bulk_create(
+            [
+                Through(recipe_id=recipe_id, tag_id=duplicate['keep_id'])
+                for recipe_id in links.values_list('recipe_id', flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+        links.delete()
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_recipe_tags'),
+        ('tags', '0003_tag_user_name_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 """Serilizers for tags APIs."""
+from django.utils.translation import gettext as _
 from rest_framework import serializers
 from tags.models import Tag
 
@@ -10,3 +11,20 @@ class TagSerializer(serializers.ModelSerializer):
         model = Tag
         fields = ["id", "name"]
         read_only_fields = ["id"]
+
+    def validate_name(self, value):
+        """Check name is not used by another Tag of the user."""
+
+        request = self.context.get("request")
+        if self.parent is not None or request is None:
+            return value
+
+        others = Tag.objects.filter(user=request.user, name=value)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(
+                _("Tag with this name already exists.")
+            )
+
+        return value
@@ -0,0 +1,31 @@
+"""
+Helpers shared by Recipe API and image tests.
+"""
+import io
+
+from django.urls import reverse
+from PIL import Image
+
+
+def detail_url(recipe_id):
+    """Create and return recipe detail URL."""
+    return reverse("recipes:recipe-detail", args=[recipe_id])
+
+
+def image_upload_url(recipe_id):
+    """Create and return and image upload URL."""
+    return reverse("recipes:recipe-upload-image", args=[recipe_id])
+
+
+def image_file(size=(600, 300), mode="RGB", format="JPEG", **params):
+    """
+    Return in-memory image file of given size, mode and format.
+    Other params are passed on to the encoder, like exif or pnginfo.
+    """
+
+    file = io.BytesIO()
+    Image.new(mode, size).save(file, format=format, **params)
+    file.name = f"image.{format.lower()}"
+    file.seek(0)
+
+    return file
@@ -1,10 +1,15 @@
 """
 Test custom Django management commands.
 """
+from io import StringIO
 from unittest.mock import patch
+
+import pytest
 from psycopg2 import OperationalError as Psycopg2Error
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
+from PIL import Image
+from recipes.models import Recipe
 
 
 @patch("recipes.management.commands.wait_for_db.Command.check")
@@ -28,3 +33,112 @@ class TestCommands:
         call_command("wait_for_db")
         assert patched_check.call_count == 6
         patched_check.assert_called_with(databases=["default"])
+
+
+@pytest.mark.django_db
+class TestBenchmarkCommands:
+    """Test benchmark management commands."""
+
+    def test_benchmark_recipe_filters(self):
+        """Test filter benchmark prints plans and leaves no data behind."""
+
+        out = StringIO()
+        call_command(
+            "benchmark_recipe_filters",
+            recipes=20,
+            tags=5,
+            tags_per_recipe=2,
+            stdout=out,
+        )
+        output = out.getvalue()
+
+        assert "JOIN + DISTINCT (any)" in output
+        assert "EXISTS (any)" in output
+        assert "Execution Time" in output
+        assert Recipe.objects.count() == 0
+
+    def test_benchmark_recipe_list(self):
+        """Test list benchmark reports both serializers for every size."""
+
+        out = StringIO()
+        call_command("benchmark_recipe_list", sizes="5,10", stdout=out)
+        output = out.getvalue()
+
+        assert output.count("RecipeSerializer") == 2
+        assert output.count("RecipeRowSerializer") == 2
+        assert Recipe.objects.count() == 0
+
+    def test_explain_api_queries(self):
+        """Test API explain command prints plans for every scenario."""
+
+        out = StringIO()
+        call_command(
+            "explain_api_queries",
+            recipes=20,
+            tags=5,
+            ingredients=10,
+            stdout=out,
+        )
+        output = out.getvalue()
+
+        assert "== recipe list: GET /api/recipes/recipes/" in output
+        assert "== recipe detail: GET /api/recipes/recipes/" in output
+        assert "== ingredient autocomplete" in output
+        assert "Execution Time" in output
+        assert Recipe.objects.count() == 0
+
+    def test_benchmark_recipe_import(self):
+        """Test import benchmark reports both methods for every size."""
+
+        out = StringIO()
+        call_command(
+            "benchmark_recipe_import", sizes="3,5", single_limit=2, stdout=out
+        )
+        output = out.getvalue()
+
+        assert output.count("single POST") == 2
+        assert output.count("bulk import") == 2
+        assert Recipe.objects.count() == 0
+
+    def test_benchmark_token_auth(self):
+        """Test token benchmark reports both modes and leaves no data."""
+
+        out = StringIO()
+        call_command(
+            "benchmark_token_auth", requests=10, users=2, stdout=out
+        )
+        output = out.getvalue()
+
+        assert "no cache" in output
+        assert "80.0%" in output
+        assert Recipe.objects.count() == 0
+
+    def test_benchmark_image_formats(self, tmp_path):
+        """Test image format benchmark reports sizes of sample images."""
+
+        for index in range(2):
+            Image.new("RGB", (300, 200), "blue").save(
+                tmp_path / f"{index}.jpg", format="JPEG"
+            )
+        (tmp_path / "notes.txt").write_text("not an image")
+        out = StringIO()
+        err = StringIO()
+        call_command(
+            "benchmark_image_formats",
+            directory=str(tmp_path),
+            formats="png",
+            stdout=out,
+            stderr=err,
+        )
+        output = out.getvalue()
+
+        assert "Images: 2" in output
+        assert output.count(" PNG ") == 4
+        assert "Encoding PNG" in output
+        assert "Skipped notes.txt" in err.getvalue()
+
+    def test_benchmark_image_formats_unknown_format(self):
+        """Test unknown formats are rejected."""
+
+        with pytest.raises(CommandError):
+            call_command("benchmark_image_formats", formats="BOGUS")
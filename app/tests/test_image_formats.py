@@ -0,0 +1,217 @@
+"""
+Tests for transcoded Recipe images and their negotiation.
+"""
+from unittest.mock import patch
+
+import pytest
+from django.test import RequestFactory
+from django.urls import reverse
+from PIL import Image, features
+from recipes.formats import (
+    IMAGE_FORMATS,
+    accepted_image_types,
+    transcode_formats,
+)
+from recipes.images import image_storage
+from recipes.models import Recipe
+from rest_framework import status
+from tests.helpers import detail_url, image_file, image_upload_url
+
+
+RECIPES_URL = reverse("recipes:recipe-list")
+ACCEPT_TIFF = "application/json, image/tiff"
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("media_root"),
+]
+
+
+@pytest.fixture
+def transcoding(settings):
+    """Transcode images to TIFF, which every Pillow build can encode."""
+
+    settings.RECIPES_IMAGE_TRANSCODE_FORMATS = ["TIFF"]
+    with patch.dict(IMAGE_FORMATS, {"TIFF": (".tiff", "image/tiff", {})}):
+        yield
+
+
+@pytest.fixture
+def uploaded_recipe(
+    transcoding,
+    authenticated_client,
+    create_example_recipe,
+    django_capture_on_commit_callbacks,
+):
+    """Return Recipe with an uploaded image and its transcoded copies."""
+
+    with django_capture_on_commit_callbacks(execute=True):
+        res = authenticated_client.post(
+            image_upload_url(create_example_recipe.id),
+            {"image": image_file()},
+            format="multipart",
+        )
+    assert res.status_code == status.HTTP_200_OK
+    create_example_recipe.refresh_from_db()
+
+    return create_example_recipe
+
+
+class TestAcceptedImageTypes:
+    """Tests for negotiating image formats from the Accept header."""
+
+    @pytest.mark.parametrize(
+        "header, expected",
+        [
+            ("", ()),
+            ("application/json", ()),
+            ("*/*", ()),
+            ("application/json, image/*", ()),
+            ("application/json, image/webp", ("image/webp",)),
+            ("image/webp, image/avif", ("image/avif", "image/webp")),
+            ("image/avif;q=0.5, image/webp", ("image/webp", "image/avif")),
+            ("image/avif; q=0, IMAGE/WEBP", ("image/webp",)),
+            ("image/avif;q=x", ()),
+        ],
+    )
+    def test_accepted_types(self, settings, header, expected):
+        """Test only image types named by the client are accepted."""
+
+        settings.RECIPES_IMAGE_TRANSCODE_FORMATS = ["AVIF", "WEBP"]
+        request = RequestFactory().get("/", HTTP_ACCEPT=header)
+
+        assert accepted_image_types(request) == expected
+
+    def test_transcode_formats_limited_to_encoders(self, settings):
+        """Test formats Pillow cannot encode are left out."""
+
+        settings.RECIPES_IMAGE_TRANSCODE_FORMATS = ["WEBP", "PNG", "BOGUS"]
+
+        formats = transcode_formats()
+
+        assert "PNG" in formats
+        assert "BOGUS" not in formats
+        assert ("WEBP" in formats) == features.check("webp")
+
+
+class TestTranscodedImages:
+    """Tests for building and serving transcoded image copies."""
+
+    def test_transcoded_copies_stored(self, uploaded_recipe, settings):
+        """Test image and its variants are transcoded on upload."""
+
+        variants = uploaded_recipe.image_variants
+        transcoded = variants.pop("image/tiff")
+
+        assert sorted(variants) == ["1024", "128", "512"]
+        assert sorted(transcoded) == ["1024", "128", "512", "original"]
+        for size, name in transcoded.items():
+            assert name.endswith(".tiff")
+            with image_storage.open(name) as file, Image.open(file) as image:
+                assert image.format == "TIFF"
+                if size == "original":
+                    assert image.size == (600, 300)
+                else:
+                    assert max(image.size) == min(int(size), 600)
+
+    def test_detail_negotiates_image_format(
+        self, uploaded_recipe, authenticated_client
+    ):
+        """Test detail URLs point at copies in the accepted format."""
+
+        url = detail_url(uploaded_recipe.id)
+        res = authenticated_client.get(url, HTTP_ACCEPT=ACCEPT_TIFF)
+        original = authenticated_client.get(url)
+
+        transcoded = uploaded_recipe.image_variants["image/tiff"]
+        assert res.data["image"].endswith(transcoded["original"])
+        assert res.data["image_variants"]["128"].endswith(transcoded["128"])
+        assert original.data["image"].endswith(uploaded_recipe.image.name)
+        assert original.data["image_variants"]["128"].endswith("_128.jpg")
+        assert "Accept" in res["Vary"]
+
+    def test_detail_etag_per_accepted_format(
+        self, uploaded_recipe, authenticated_client
+    ):
+        """Test detail read in one format is not revalidated for another."""
+
+        url = detail_url(uploaded_recipe.id)
+        etag = authenticated_client.get(url, HTTP_ACCEPT=ACCEPT_TIFF)["ETag"]
+        res = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data["image"].endswith(uploaded_recipe.image.name)
+        res = authenticated_client.patch(
+            url, {"title": "Mine"}, HTTP_IF_MATCH=etag
+        )
+        assert res.status_code == status.HTTP_200_OK
+
+    def test_cached_list_kept_per_accepted_format(
+        self, uploaded_recipe, authenticated_client
+    ):
+        """Test cached lists are not shared between negotiated formats."""
+
+        authenticated_client.get(RECIPES_URL, HTTP_ACCEPT=ACCEPT_TIFF)
+        res = authenticated_client.get(RECIPES_URL)
+
+        assert res["X-Cache"] == "MISS"
+        variants = res.data["results"][0]["image_variants"]
+        assert variants["128"].endswith("_128.jpg")
+
+    def test_transcoded_copies_reused(
+        self,
+        uploaded_recipe,
+        create_example_recipe_2,
+        authenticated_client,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test copies stored for the same image are not encoded again."""
+
+        with patch("recipes.images.resize_image") as resize:
+            with django_capture_on_commit_callbacks(execute=True):
+                authenticated_client.post(
+                    image_upload_url(create_example_recipe_2.id),
+                    {"image": image_file()},
+                    format="multipart",
+                )
+
+        resize.assert_not_called()
+        create_example_recipe_2.refresh_from_db()
+        assert (
+            create_example_recipe_2.image_variants
+            == uploaded_recipe.image_variants
+        )
+
+    def test_transcoded_copies_deleted_with_image(
+        self, uploaded_recipe, django_capture_on_commit_callbacks
+    ):
+        """Test unused image is deleted with all of its copies."""
+
+        names = list(uploaded_recipe.image_variants["image/tiff"].values())
+        with django_capture_on_commit_callbacks(execute=True):
+            Recipe.objects.get(id=uploaded_recipe.id).delete()
+
+        for name in names:
+            assert not image_storage.exists(name)
+
+    @pytest.mark.skipif(not features.check("webp"), reason="needs WebP")
+    def test_webp_copies_stored(
+        self,
+        settings,
+        authenticated_client,
+        create_example_recipe,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test images are transcoded to WebP when Pillow supports it."""
+
+        settings.RECIPES_IMAGE_TRANSCODE_FORMATS = ["WEBP"]
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.post(
+                image_upload_url(create_example_recipe.id),
+                {"image": image_file()},
+                format="multipart",
+            )
+
+        create_example_recipe.refresh_from_db()
+        name = create_example_recipe.image_variants["image/webp"]["128"]
+        with image_storage.open(name) as file:
+            assert file.read(12)[8:] == b"WEBP"
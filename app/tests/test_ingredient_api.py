@@ -75,6 +75,22 @@ class TestPrivateIngredientApi:
         assert res.status_code == status.HTTP_200_OK
         assert ingredient.name == payload["name"]
 
+    def test_update_ingredient_duplicate_name(
+        self,
+        authenticated_client,
+        example_user,
+        create_example_ingredient,
+    ):
+        """Test renaming an Ingredient to another Ingredient's name fails."""
+
+        Ingredient.objects.create(user=example_user, name="Salt")
+        url = detail_url(ingredient_id=create_example_ingredient.id)
+        res = authenticated_client.patch(url, {"name": "Salt"})
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        create_example_ingredient.refresh_from_db()
+        assert create_example_ingredient.name == "Ingredient1"
+
     def test_delete_ingredient(
         self,
         authenticated_client,
@@ -124,3 +140,40 @@ class TestPrivateIngredientApi:
         res = authenticated_client.get(INGREDIENTS_URL, {"assigned_only": 1})
 
         assert len(res.data) == 1
+
+    def test_autocomplete_ingredients(
+        self,
+        authenticated_client,
+        example_user,
+    ):
+        """Test autocomplete returns prefix matches before similar words."""
+
+        for name in ["Paste", "Tomato Paste", "Tomato", "Cumin"]:
+            Ingredient.objects.create(user=example_user, name=name)
+
+        res = authenticated_client.get(INGREDIENTS_URL, {"q": "tomatos"})
+        assert res.status_code == status.HTTP_200_OK
+        assert [i["name"] for i in res.data] == ["Tomato", "Tomato Paste"]
+
+        res = authenticated_client.get(INGREDIENTS_URL, {"q": "past"})
+        assert [i["name"] for i in res.data] == ["Paste", "Tomato Paste"]
+
+    def test_autocomplete_limited(
+        self,
+        authenticated_client,
+        example_user,
+        create_example_ingredient_for_user_2,
+    ):
+        """Test autocomplete is limited to user and to a few results."""
+
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(user=example_user, name=f"Ingredient{i}")
+                for i in range(20)
+            ]
+        )
+        res = authenticated_client.get(INGREDIENTS_URL, {"q": "ingredientx"})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert len(res.data) == 10
+        assert "IngredientX" not in [i["name"] for i in res.data]
@@ -0,0 +1,233 @@
+"""
+Tests for serving uploaded media through signed URLs.
+"""
+import time
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+import pytest
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from recipes.images import image_storage
+from rest_framework import status
+from tests.helpers import detail_url
+
+
+NAME = "uploads/recipe/ab/abcd.jpg"
+RECIPES_URL = reverse("recipes:recipe-list")
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.MEDIA_ACCEL_REDIRECT_LOCATION = "/protected-media/"
+    image_storage.save(NAME, ContentFile(b"image bytes"))
+
+
+def media_url(name=NAME):
+    """Return path and query of signed URL of media file name."""
+
+    url = urlsplit(image_storage.url(name))
+    return f"{url.path}?{url.query}"
+
+
+class TestServeMedia:
+    """Tests for the media view."""
+
+    @pytest.mark.django_db
+    def test_signed_url_redirected_to_nginx(
+        self, client, settings, django_assert_num_queries
+    ):
+        """Test valid URL hands file transfer to nginx."""
+
+        with django_assert_num_queries(0):
+            res = client.get(media_url())
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res["X-Accel-Redirect"] == f"/protected-media/{NAME}"
+        assert res["Content-Type"] == "image/jpeg"
+        assert res.content == b""
+        directives = dict(
+            directive.partition("=")[::2]
+            for directive in res["Cache-Control"].split(", ")
+        )
+        assert set(directives) == {"public", "max-age", "immutable"}
+        max_age = settings.MEDIA_URL_MAX_AGE
+        assert max_age < int(directives["max-age"]) <= 2 * max_age
+
+    def test_url_stable_within_period(self):
+        """Test URLs signed in the same period are equal."""
+
+        assert image_storage.url(NAME) == image_storage.url(NAME)
+
+    @pytest.mark.parametrize(
+        "query",
+        ["", "expires=9999999999&signature=bad", "expires=x&signature=x"],
+    )
+    def test_invalid_signature_forbidden(self, client, query):
+        """Test URL without valid signature is rejected."""
+
+        res = client.get(f"/static/media/{NAME}?{query}")
+
+        assert res.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_signature_bound_to_name(self, client):
+        """Test signature of one file does not grant access to another."""
+
+        query = urlsplit(image_storage.url(NAME)).query
+        res = client.get(f"/static/media/uploads/recipe/ab/other.jpg?{query}")
+
+        assert res.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_expired_url_forbidden(self, client, settings):
+        """Test URL is rejected after its expiry."""
+
+        url = media_url()
+        later = time.time() + 2 * settings.MEDIA_URL_MAX_AGE + 1
+        with patch("core.media.time.time", return_value=later):
+            res = client.get(url)
+
+        assert res.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_path_traversal_not_found(self, client, settings):
+        """Test names leaving the media directory are rejected."""
+
+        settings.MEDIA_URL_MAX_AGE = 0
+        res = client.get("/static/media/uploads/../../etc/passwd")
+
+        assert res.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_only_read_methods_allowed(self, client):
+        """Test media view accepts GET and HEAD only."""
+
+        assert client.head(media_url()).status_code == status.HTTP_200_OK
+        assert client.post(media_url()).status_code == (
+            status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+    def test_served_by_django_without_redirect_location(
+        self, client, settings
+    ):
+        """Test file is sent by Django when nginx is not in front."""
+
+        settings.MEDIA_ACCEL_REDIRECT_LOCATION = ""
+        res = client.get(media_url())
+
+        assert res.status_code == status.HTTP_200_OK
+        assert b"".join(res.streaming_content) == b"image bytes"
+        assert "X-Accel-Redirect" not in res
+
+    @pytest.mark.parametrize("location", ["/protected-media/", ""])
+    def test_image_format_content_types(self, client, settings, location):
+        """Test transcoded copies are served with their image media type."""
+
+        settings.MEDIA_ACCEL_REDIRECT_LOCATION = location
+        for name, media_type in [
+            ("uploads/recipe/ab/abcd.avif", "image/avif"),
+            ("uploads/recipe/ab/abcd.webp", "image/webp"),
+        ]:
+            image_storage.save(name, ContentFile(b"image bytes"))
+            res = client.get(media_url(name))
+
+            assert res.status_code == status.HTTP_200_OK
+            assert res["Content-Type"] == media_type
+
+    def test_unsigned_urls(self, client, settings):
+        """Test unsigned URLs are served with long lived cache headers."""
+
+        settings.MEDIA_URL_MAX_AGE = 0
+        url = image_storage.url(NAME)
+        res = client.get(url)
+
+        assert url == f"/static/media/{NAME}"
+        assert res.status_code == status.HTTP_200_OK
+        assert "max-age=31536000" in res["Cache-Control"]
+
+
+class TestMediaUrlPeriods:
+    """Tests for renewing signed media URLs."""
+
+    @pytest.mark.django_db
+    def test_cached_responses_renewed_every_period(
+        self, authenticated_client, create_example_recipe, settings
+    ):
+        """Test cached lists are not reused once media URLs are re-signed."""
+
+        authenticated_client.get(RECIPES_URL)
+        res = authenticated_client.get(RECIPES_URL)
+        assert res["X-Cache"] == "HIT"
+
+        later = time.time() + settings.MEDIA_URL_MAX_AGE
+        with patch("core.media.time.time", return_value=later):
+            res = authenticated_client.get(RECIPES_URL)
+
+        assert res["X-Cache"] == "MISS"
+
+    @pytest.mark.django_db
+    def test_list_revalidated_every_period(
+        self, authenticated_client, create_example_recipe, settings
+    ):
+        """Test conditional list reads are not answered after a period."""
+
+        res = authenticated_client.get(RECIPES_URL)
+        headers = {"HTTP_IF_MODIFIED_SINCE": res["Last-Modified"]}
+        res = authenticated_client.get(RECIPES_URL, **headers)
+        assert res.status_code == status.HTTP_304_NOT_MODIFIED
+
+        later = time.time() + 3 * settings.MEDIA_URL_MAX_AGE
+        with patch("core.media.time.time", return_value=later):
+            res = authenticated_client.get(RECIPES_URL, **headers)
+            assert res.status_code == status.HTTP_200_OK
+
+            res = authenticated_client.get(
+                RECIPES_URL, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]
+            )
+            assert res.status_code == status.HTTP_304_NOT_MODIFIED
+
+    @pytest.mark.django_db
+    def test_detail_revalidated_every_period(
+        self, authenticated_client, create_example_recipe, settings
+    ):
+        """Test conditional detail reads are not answered after a period."""
+
+        url = detail_url(create_example_recipe.id)
+        res = authenticated_client.get(url)
+        headers = {
+            "HTTP_IF_NONE_MATCH": res["ETag"],
+            "HTTP_IF_MODIFIED_SINCE": res["Last-Modified"],
+        }
+        assert authenticated_client.get(url, **headers).status_code == (
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        later = time.time() + 3 * settings.MEDIA_URL_MAX_AGE
+        with patch("core.media.time.time", return_value=later):
+            res = authenticated_client.get(url, **headers)
+            assert res.status_code == status.HTTP_200_OK
+            assert res["ETag"] != headers["HTTP_IF_NONE_MATCH"]
+
+            res = authenticated_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]
+            )
+            assert res.status_code == status.HTTP_304_NOT_MODIFIED
+
+    @pytest.mark.django_db
+    def test_update_precondition_kept_across_periods(
+        self, authenticated_client, create_example_recipe, settings
+    ):
+        """Test If-Match of a read from an earlier period still applies."""
+
+        url = detail_url(create_example_recipe.id)
+        etag = authenticated_client.get(url)["ETag"]
+
+        later = time.time() + 3 * settings.MEDIA_URL_MAX_AGE
+        with patch("core.media.time.time", return_value=later):
+            res = authenticated_client.patch(
+                url, {"title": "Mine"}, HTTP_IF_MATCH=etag
+            )
+            assert res.status_code == status.HTTP_200_OK
+
+            res = authenticated_client.patch(
+                url, {"title": "Again"}, HTTP_IF_MATCH=etag
+            )
+            assert res.status_code == status.HTTP_412_PRECONDITION_FAILED
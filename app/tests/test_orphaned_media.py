@@ -0,0 +1,130 @@
+"""
+Tests for collecting orphaned Recipe image files.
+"""
+import os
+from io import StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from recipes.images import image_storage
+from recipes.models import ImageBlob
+from recipes.orphans import ReferencedImages, remove_orphans
+
+
+pytestmark = pytest.mark.django_db
+
+
+def stored_files(root):
+    """Return relative names of all files under directory root."""
+
+    return sorted(
+        os.path.relpath(os.path.join(path, name), root)
+        for path, _, files in os.walk(root)
+        for name in files
+    )
+
+
+@pytest.fixture
+def media(settings, tmp_path, create_example_recipe):
+    """Store a referenced image with a variant and some orphans."""
+
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    recipe = create_example_recipe
+    recipe.image = SimpleUploadedFile("photo.jpg", b"referenced")
+    recipe.save()
+    name = recipe.image.name
+    variant = f"{os.path.splitext(name)[0]}_128.jpg"
+    orphans = [
+        "uploads/recipe/0d2b6a7e-uuid.jpg",
+        "uploads/recipe/ff/ffee.png",
+        "uploads/recipe/ff/ffee_512.png",
+        f"{name}.0123abcd.tmp",
+    ]
+    for file in [variant] + orphans:
+        image_storage.save(file, ContentFile(b"x"))
+
+    return {"name": name, "variant": variant, "orphans": sorted(orphans)}
+
+
+def collect(**options):
+    out = StringIO()
+    call_command("collect_orphaned_media", min_age=0, stdout=out, **options)
+    return out.getvalue()
+
+
+class TestCollectOrphanedMedia:
+    """Tests for orphaned media garbage collection."""
+
+    def test_dry_run_lists_orphans(self, media, settings):
+        """Test dry run reports orphans and removes nothing."""
+
+        before = stored_files(settings.MEDIA_ROOT)
+        output = collect(dry_run=True)
+
+        for name in media["orphans"]:
+            assert name in output
+        assert media["name"] not in output.splitlines()
+        assert "Orphaned files: 4, 4 (4 bytes) would be removed" in output
+        assert stored_files(settings.MEDIA_ROOT) == before
+
+    def test_orphans_deleted_in_batches(self, media, settings):
+        """Test only unreferenced files are deleted."""
+
+        output = collect(batch_size=1)
+
+        assert stored_files(settings.MEDIA_ROOT) == sorted(
+            [media["name"], media["variant"]]
+        )
+        assert "Removed 4 of 4 orphans" in output
+        assert "Orphaned files: 4, 4 (4 bytes) deleted" in output
+
+    def test_orphans_quarantined(self, media, settings, tmp_path):
+        """Test orphans are moved below quarantine directory."""
+
+        quarantine = tmp_path / "quarantine"
+        collect(quarantine=str(quarantine))
+
+        assert stored_files(quarantine) == media["orphans"]
+        assert stored_files(settings.MEDIA_ROOT) == sorted(
+            [media["name"], media["variant"]]
+        )
+
+    def test_recent_files_skipped(self, media, settings):
+        """Test files newer than minimum age are kept."""
+
+        before = stored_files(settings.MEDIA_ROOT)
+        out = StringIO()
+        call_command("collect_orphaned_media", stdout=out)
+
+        assert "Orphaned files: 0" in out.getvalue()
+        assert stored_files(settings.MEDIA_ROOT) == before
+
+    def test_image_referenced_since_scan_kept(self, media):
+        """Test orphan that became referenced before removal is kept."""
+
+        ImageBlob.objects.create(name="uploads/recipe/ff/ffee.png")
+
+        removed = remove_orphans(media["orphans"])
+
+        assert sorted(removed) == sorted(
+            name for name in media["orphans"] if "/ff/" not in name
+        )
+        assert image_storage.exists("uploads/recipe/ff/ffee_512.png")
+
+
+class TestReferencedImages:
+    """Tests for the compact set of referenced images."""
+
+    def test_variants_of_referenced_image_included(self):
+        """Test variant files count as referenced with their original."""
+
+        ImageBlob.objects.create(name="uploads/recipe/ab/abcd.jpg")
+        referenced = ReferencedImages.load()
+
+        assert len(referenced) == 1
+        assert "uploads/recipe/ab/abcd.jpg" in referenced
+        assert "uploads/recipe/ab/abcd_1024.jpg" in referenced
+        assert "uploads/recipe/ab/abcd.jpg.99.tmp" not in referenced
+        assert "uploads/recipe/ab/abce.jpg" not in referenced
@@ -4,30 +4,23 @@ Tests for recipe APIs.
 import os
 import tempfile
 from decimal import Decimal
+from unittest.mock import patch
 
 import pytest
 from django.urls import reverse
 from PIL import Image
 from recipes.models import Recipe
+from recipes.pagination import RecipeCursorPagination
 from recipes.serializers import RecipeDetailSerializer, RecipeSerializer
 from rest_framework import status
 from tags.models import Tag
+from tests.helpers import detail_url, image_upload_url
 
 
 RECIPES_URL = reverse("recipes:recipe-list")
 pytestmark = pytest.mark.django_db
 
 
-def detail_url(recipe_id):
-    """Create and return recipe detail URL."""
-    return reverse("recipes:recipe-detail", args=[recipe_id])
-
-
-def image_upload_url(recipe_id):
-    """Create and return and image upload URL."""
-    return reverse("recipes:recipe-upload-image", args=[recipe_id])
-
-
 class TestPublicRecipeApi:
     """
     Test unauthenticated API requests.
@@ -59,7 +52,7 @@ class TestPrivateRecipeApi:
         serializer = RecipeSerializer(recipes, many=True)
 
         assert res.status_code == status.HTTP_200_OK
-        assert res.data == serializer.data
+        assert res.data["results"] == serializer.data
 
     def test_retrive_recipes_limited_to_user(
         self,
@@ -79,7 +72,7 @@ class TestPrivateRecipeApi:
         serializer = RecipeSerializer(recipes, many=True)
 
         assert res.status_code == status.HTTP_200_OK
-        assert res.data == serializer.data
+        assert res.data["results"] == serializer.data
 
     def test_get_recipe_detail(
         self,
@@ -489,10 +482,10 @@ class TestPrivateRecipeApi:
         params = {"tags": f"{tag_1.id}, {tag_2.id}"}
         res = authenticated_client.get(RECIPES_URL, params)
 
-        assert serializer_1.data in res.data
-        assert serializer_2.data in res.data
-        assert len(res.data) == 2
-        assert serializer_3.data not in res.data
+        assert serializer_1.data in res.data["results"]
+        assert serializer_2.data in res.data["results"]
+        assert len(res.data["results"]) == 2
+        assert serializer_3.data not in res.data["results"]
 
     def test_filter_by_ingredients(
         self,
@@ -519,10 +512,758 @@ class TestPrivateRecipeApi:
         params = {"ingredients": f"{ingredient_1.id}, {ingredient_2.id}"}
         res = authenticated_client.get(RECIPES_URL, params)
 
-        assert serializer_1.data in res.data
-        assert serializer_2.data in res.data
-        assert len(res.data) == 2
-        assert serializer_3.data not in res.data
+        assert serializer_1.data in res.data["results"]
+        assert serializer_2.data in res.data["results"]
+        assert len(res.data["results"]) == 2
+        assert serializer_3.data not in res.data["results"]
+
+    def test_filter_by_all_tags(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_recipe_2,
+        create_example_tag_1,
+        create_example_tag_2,
+    ):
+        """Test filtering Recipes having every given Tag."""
+
+        recipe_1 = create_example_recipe
+        recipe_2 = create_example_recipe_2
+        tag_1 = create_example_tag_1
+        tag_2 = create_example_tag_2
+        recipe_1.tags.add(tag_1, tag_2)
+        recipe_2.tags.add(tag_1)
+
+        params = {"tags": f"{tag_1.id},{tag_2.id}", "match": "all"}
+        res = authenticated_client.get(RECIPES_URL, params)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert [r["id"] for r in res.data["results"]] == [recipe_1.id]
+
+    def test_filter_by_all_ingredients(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_recipe_2,
+        create_example_ingredients_list,
+    ):
+        """Test filtering Recipes having every given Ingredient."""
+
+        recipe_1 = create_example_recipe
+        recipe_2 = create_example_recipe_2
+        ingredients = create_example_ingredients_list
+        recipe_1.ingredients.add(ingredients[0])
+        recipe_2.ingredients.add(*ingredients)
+        ids = ",".join(str(ingredient.id) for ingredient in ingredients)
+
+        params = {"ingredients": ids, "match": "all"}
+        res = authenticated_client.get(RECIPES_URL, params)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert [r["id"] for r in res.data["results"]] == [recipe_2.id]
+
+    def test_filter_by_tags_without_distinct(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_tag_1,
+        create_example_tag_2,
+        django_assert_num_queries,
+    ):
+        """Test filtering by Tags uses a semi-join instead of DISTINCT."""
+
+        recipe = create_example_recipe
+        tag_1 = create_example_tag_1
+        tag_2 = create_example_tag_2
+        recipe.tags.add(tag_1, tag_2)
+
+        params = {"tags": f"{tag_1.id},{tag_2.id}"}
+        with django_assert_num_queries(3) as captured:
+            res = authenticated_client.get(RECIPES_URL, params)
+
+        assert len(res.data["results"]) == 1
+        recipe_sql = captured.captured_queries[0]["sql"]
+        assert "EXISTS" in recipe_sql
+        assert "DISTINCT" not in recipe_sql
+
+    def test_list_recipes_query_count(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+        create_example_tag_1,
+        create_example_ingredients_list,
+        django_assert_num_queries,
+    ):
+        """Test listing Recipes does not query relations per Recipe."""
+
+        for recipe in create_example_recipes_list:
+            recipe.tags.add(create_example_tag_1)
+            recipe.ingredients.add(*create_example_ingredients_list)
+
+        with django_assert_num_queries(3):
+            res = authenticated_client.get(RECIPES_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+        results = res.data["results"]
+        assert len(results) == 5
+        assert all(len(recipe["ingredients"]) == 3 for recipe in results)
+
+    def test_get_recipe_detail_query_count(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_tag_1,
+        create_example_ingredients_list,
+        django_assert_num_queries,
+    ):
+        """Test Recipe detail loads relations in a fixed number of queries."""
+
+        recipe = create_example_recipe
+        recipe.tags.add(create_example_tag_1)
+        recipe.ingredients.add(*create_example_ingredients_list)
+
+        with django_assert_num_queries(3):
+            res = authenticated_client.get(detail_url(recipe_id=recipe.id))
+
+        assert res.status_code == status.HTTP_200_OK
+        assert len(res.data["tags"]) == 1
+        assert len(res.data["ingredients"]) == 3
+
+    def test_create_recipe_related_query_count(
+        self,
+        authenticated_client,
+        create_example_tag_1,
+        django_assert_max_num_queries,
+    ):
+        """Test creating Tags and Ingredients does not query per name."""
+
+        def payload(count):
+            return {
+                "title": f"Recipe {count}",
+                "time_minutes": 10,
+                "price": Decimal("2.50"),
+                "tags": [{"name": create_example_tag_1.name}]
+                + [{"name": f"Tag {count}-{i}"} for i in range(count)],
+                "ingredients": [
+                    {"name": f"Ingredient {count}-{i}"} for i in range(count)
+                ],
+            }
+
+        with django_assert_max_num_queries(50) as small:
+            res = authenticated_client.post(
+                RECIPES_URL, payload(2), format="json"
+            )
+        assert res.status_code == status.HTTP_201_CREATED
+
+        with django_assert_max_num_queries(len(small)) as large:
+            res = authenticated_client.post(
+                RECIPES_URL, payload(20), format="json"
+            )
+        assert res.status_code == status.HTTP_201_CREATED
+        assert len(large) == len(small)
+
+        recipe = Recipe.objects.get(id=res.data["id"])
+        assert recipe.tags.count() == 21
+        assert recipe.ingredients.count() == 20
+        assert Tag.objects.filter(name=create_example_tag_1.name).count() == 1
+
+    def test_create_recipe_with_duplicate_tag_names(
+        self, authenticated_client, example_user
+    ):
+        """Test repeated names in one payload create a single Tag."""
+
+        payload = {
+            "title": "Soup",
+            "time_minutes": 10,
+            "price": Decimal("2.50"),
+            "tags": [{"name": "Dinner"}, {"name": "Dinner"}],
+        }
+        res = authenticated_client.post(RECIPES_URL, payload, format="json")
+
+        assert res.status_code == status.HTTP_201_CREATED
+        assert Tag.objects.filter(user=example_user).count() == 1
+        assert len(res.data["tags"]) == 1
+
+
+class TestRecipeRelationSync:
+    """Tests for syncing Tags and Ingredients on Recipe update."""
+
+    @staticmethod
+    def write_queries(captured):
+        return [
+            query["sql"]
+            for query in captured
+            if query["sql"].split()[0] in ("INSERT", "UPDATE", "DELETE")
+        ]
+
+    def test_noop_update_does_not_write(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_tag_1,
+        create_example_ingredients_list,
+        django_assert_max_num_queries,
+    ):
+        """Test resending unchanged relations issues no write queries."""
+
+        recipe = create_example_recipe
+        recipe.tags.add(create_example_tag_1)
+        recipe.ingredients.add(*create_example_ingredients_list)
+        updated_at = Recipe.objects.get(id=recipe.id).updated_at
+        payload = {
+            "title": recipe.title,
+            "tags": [{"name": create_example_tag_1.name}],
+            "ingredients": [
+                {"name": ingredient.name}
+                for ingredient in create_example_ingredients_list
+            ],
+        }
+
+        with django_assert_max_num_queries(12) as captured:
+            res = authenticated_client.patch(
+                detail_url(recipe.id), payload, format="json"
+            )
+
+        assert res.status_code == status.HTTP_200_OK
+        assert self.write_queries(captured) == []
+        assert Recipe.objects.get(id=recipe.id).updated_at == updated_at
+
+    def test_update_only_writes_changed_links(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_tag_1,
+        create_example_tag_2,
+        django_assert_max_num_queries,
+    ):
+        """Test replacing one Tag deletes and inserts a single link each."""
+
+        recipe = create_example_recipe
+        recipe.tags.add(create_example_tag_1)
+        payload = {"tags": [{"name": create_example_tag_2.name}]}
+
+        with django_assert_max_num_queries(15) as captured:
+            res = authenticated_client.patch(
+                detail_url(recipe.id), payload, format="json"
+            )
+
+        assert res.status_code == status.HTTP_200_OK
+        writes = self.write_queries(captured)
+        through = Recipe.tags.through._meta.db_table
+        assert [sql.split()[0] for sql in writes if through in sql] == [
+            "DELETE",
+            "INSERT",
+        ]
+        assert list(recipe.tags.all()) == [create_example_tag_2]
+
+    def test_update_relations_touches_recipe(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_ingredient,
+    ):
+        """Test changing relations marks the Recipe as modified."""
+
+        recipe = create_example_recipe
+        updated_at = Recipe.objects.get(id=recipe.id).updated_at
+        payload = {"ingredients": [{"name": create_example_ingredient.name}]}
+        res = authenticated_client.patch(
+            detail_url(recipe.id), payload, format="json"
+        )
+
+        assert res.status_code == status.HTTP_200_OK
+        recipe.refresh_from_db()
+        assert recipe.updated_at > updated_at
+        assert list(recipe.ingredients.all()) == [create_example_ingredient]
+
+
+class TestRecipePagination:
+    """Tests for cursor pagination of Recipe list."""
+
+    def test_list_recipes_paginated(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+    ):
+        """Test Recipe list is split into pages following the cursor."""
+
+        recipes = create_example_recipes_list
+        res = authenticated_client.get(RECIPES_URL, {"page_size": 2})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert [r["id"] for r in res.data["results"]] == [
+            recipes[4].id,
+            recipes[3].id,
+        ]
+        assert res.data["previous"] is None
+
+        res = authenticated_client.get(res.data["next"])
+        assert [r["id"] for r in res.data["results"]] == [
+            recipes[2].id,
+            recipes[1].id,
+        ]
+
+        res = authenticated_client.get(res.data["next"])
+        assert [r["id"] for r in res.data["results"]] == [recipes[0].id]
+        assert res.data["next"] is None
+
+    def test_page_size_limited_to_maximum(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+    ):
+        """Test requested page size can not exceed the maximum."""
+
+        with patch.object(RecipeCursorPagination, "max_page_size", 3):
+            res = authenticated_client.get(RECIPES_URL, {"page_size": 100})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert len(res.data["results"]) == 3
+        assert res.data["next"] is not None
+
+    def test_invalid_cursor_returns_error(self, authenticated_client):
+        """Test passing a malformed cursor returns not found."""
+
+        res = authenticated_client.get(RECIPES_URL, {"cursor": "invalid"})
+
+        assert res.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestRecipeRangeFiltersAndOrdering:
+    """Tests for price and time filters and ordering of Recipe list."""
+
+    def test_filter_by_price_range(
+        self, authenticated_client, create_example_recipes_list
+    ):
+        """Test Recipes are filtered by minimum and maximum price."""
+
+        recipes = create_example_recipes_list
+        res = authenticated_client.get(
+            RECIPES_URL, {"price_min": "2.00", "price_max": "4.50"}
+        )
+
+        assert res.status_code == status.HTTP_200_OK
+        assert [r["id"] for r in res.data["results"]] == [
+            recipes[3].id,
+            recipes[2].id,
+            recipes[1].id,
+        ]
+
+    def test_filter_by_time_max(
+        self, authenticated_client, create_example_recipes_list
+    ):
+        """Test Recipes are filtered by maximum time."""
+
+        recipes = create_example_recipes_list
+        res = authenticated_client.get(RECIPES_URL, {"time_max": 10})
+
+        assert [r["id"] for r in res.data["results"]] == [
+            recipes[1].id,
+            recipes[0].id,
+        ]
+
+    @pytest.mark.parametrize(
+        "params", [{"price_min": "cheap"}, {"time_max": "-1"}]
+    )
+    def test_invalid_range_filter(self, authenticated_client, params):
+        """Test malformed range filter returns error for the parameter."""
+
+        res = authenticated_client.get(RECIPES_URL, params)
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert list(res.data) == list(params)
+
+    @pytest.mark.parametrize(
+        "params", [{"tags": "a"}, {"ingredients": "1,,2"}]
+    )
+    def test_invalid_id_filter(self, authenticated_client, params):
+        """Test malformed id filter returns error for the parameter."""
+
+        res = authenticated_client.get(RECIPES_URL, params)
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert list(res.data) == list(params)
+
+    @pytest.mark.parametrize(
+        "ordering, key, reverse",
+        [
+            ("price", "price", False),
+            ("-price", "price", True),
+            ("time_minutes", "time_minutes", False),
+            ("-time_minutes", "time_minutes", True),
+            ("id", "id", False),
+        ],
+    )
+    def test_ordering(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+        ordering,
+        key,
+        reverse,
+    ):
+        """Test Recipe list is sorted by allowed ordering."""
+
+        recipes = sorted(
+            create_example_recipes_list,
+            key=lambda recipe: (getattr(recipe, key), recipe.id),
+            reverse=reverse,
+        )
+        res = authenticated_client.get(RECIPES_URL, {"ordering": ordering})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert [r["id"] for r in res.data["results"]] == [
+            recipe.id for recipe in recipes
+        ]
+
+    def test_ordering_not_allowed(self, authenticated_client):
+        """Test ordering by a column outside the whitelist fails."""
+
+        res = authenticated_client.get(RECIPES_URL, {"ordering": "title"})
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "ordering" in res.data
+
+    def test_ordering_paginated_with_ties(
+        self, authenticated_client, example_user
+    ):
+        """Test cursor walks Recipes sharing a sort value exactly once."""
+
+        recipes = [
+            Recipe.objects.create(
+                user=example_user,
+                title=f"Recipe {i}",
+                time_minutes=10 + i % 2,
+                price=Decimal("1.00"),
+            )
+            for i in range(7)
+        ]
+        expected = [
+            recipe.id
+            for recipe in sorted(
+                recipes, key=lambda recipe: (recipe.time_minutes, recipe.id)
+            )
+        ]
+
+        seen = []
+        url, params = RECIPES_URL, {"ordering": "time_minutes", "page_size": 2}
+        while url:
+            res = authenticated_client.get(url, params)
+            seen += [r["id"] for r in res.data["results"]]
+            url, params = res.data["next"], None
+
+        assert seen == expected
+
+    def test_ordering_with_sparse_fields_query_count(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+        django_assert_num_queries,
+    ):
+        """Test sort column is loaded with sparse fields for the cursor."""
+
+        with django_assert_num_queries(1):
+            res = authenticated_client.get(
+                RECIPES_URL,
+                {"ordering": "-price", "fields": "title", "page_size": 2},
+            )
+
+        assert res.data["results"] == [
+            {"title": "Sample Recipe 5"},
+            {"title": "Sample Recipe 4"},
+        ]
+        assert res.data["next"] is not None
+
+    def test_range_filters_with_fast_list(
+        self, authenticated_client, create_example_recipes_list, settings
+    ):
+        """Test filters and ordering apply to row serializer lists."""
+
+        settings.RECIPES_FAST_LIST = True
+        res = authenticated_client.get(
+            RECIPES_URL,
+            {"time_max": 15, "ordering": "price", "fields": "title"},
+        )
+
+        assert res.data["results"] == [
+            {"title": "Sample Recipe 1"},
+            {"title": "Sample Recipe 2"},
+            {"title": "Sample Recipe 3"},
+        ]
+
+
+class TestRecipeSearch:
+    """Tests for full-text search of Recipes."""
+
+    def test_search_ranked_by_relevance(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+    ):
+        """Test title matches rank above description matches."""
+
+        recipes = create_example_recipes_list
+        recipes[1].description = "Goes well with a tomato salad."
+        recipes[1].save()
+        recipes[3].title = "Tomato soup"
+        recipes[3].save()
+
+        res = authenticated_client.get(RECIPES_URL, {"search": "tomatoes"})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert [r["id"] for r in res.data["results"]] == [
+            recipes[3].id,
+            recipes[1].id,
+        ]
+
+    def test_search_combined_with_tags(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_recipe_2,
+        create_example_tag_1,
+    ):
+        """Test search narrows Recipes filtered by Tags."""
+
+        recipe_1 = create_example_recipe
+        recipe_2 = create_example_recipe_2
+        recipe_1.tags.add(create_example_tag_1)
+        params = {"search": "sample recipe", "tags": create_example_tag_1.id}
+
+        res = authenticated_client.get(RECIPES_URL, params)
+
+        ids = [r["id"] for r in res.data["results"]]
+        assert ids == [recipe_1.id]
+        assert recipe_2.id not in ids
+
+    def test_search_limited_to_user(
+        self,
+        authenticated_client,
+        create_example_recipe_for_user_2,
+    ):
+        """Test search does not return other users Recipes."""
+
+        res = authenticated_client.get(RECIPES_URL, {"search": "sample"})
+
+        assert res.data["results"] == []
+
+    def test_search_paginated(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+    ):
+        """Test searched Recipes can be paged with the cursor."""
+
+        params = {"search": "sample", "page_size": 2}
+        res = authenticated_client.get(RECIPES_URL, params)
+        ids = [r["id"] for r in res.data["results"]]
+        while res.data["next"]:
+            res = authenticated_client.get(res.data["next"])
+            ids += [r["id"] for r in res.data["results"]]
+
+        assert sorted(ids) == sorted(r.id for r in create_example_recipes_list)
+
+    def test_search_vector_updated_on_write(
+        self,
+        authenticated_client,
+        create_example_recipe,
+    ):
+        """Test editing a Recipe title updates its search vector."""
+
+        recipe = create_example_recipe
+        url = detail_url(recipe_id=recipe.id)
+        authenticated_client.patch(url, {"title": "Lemon pie"})
+
+        res = authenticated_client.get(RECIPES_URL, {"search": "lemon"})
+
+        assert [r["id"] for r in res.data["results"]] == [recipe.id]
+
+
+class TestSparseFieldsets:
+    """Tests for limiting Recipe fields with `fields` parameter."""
+
+    def test_list_only_requested_fields(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+        create_example_tag_1,
+        django_assert_num_queries,
+    ):
+        """Test list skips relations and columns that were not requested."""
+
+        create_example_recipes_list[0].tags.add(create_example_tag_1)
+
+        with django_assert_num_queries(1) as captured:
+            res = authenticated_client.get(
+                RECIPES_URL, {"fields": "id,title"}
+            )
+
+        assert res.status_code == status.HTTP_200_OK
+        assert len(res.data["results"]) == 5
+        for recipe in res.data["results"]:
+            assert set(recipe) == {"id", "title"}
+        sql = captured.captured_queries[0]["sql"]
+        assert '"recipes_recipe"."title"' in sql
+        assert '"recipes_recipe"."description"' not in sql
+
+    def test_detail_with_requested_relation(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_tag_1,
+        create_example_ingredient,
+        django_assert_num_queries,
+    ):
+        """Test detail prefetches only requested relations."""
+
+        recipe = create_example_recipe
+        recipe.tags.add(create_example_tag_1)
+        recipe.ingredients.add(create_example_ingredient)
+        url = detail_url(recipe_id=recipe.id)
+
+        with django_assert_num_queries(2):
+            res = authenticated_client.get(url, {"fields": "title,tags"})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert set(res.data) == {"title", "tags"}
+        assert res.data["tags"][0]["name"] == create_example_tag_1.name
+
+    def test_fields_ignored_on_write(self, authenticated_client):
+        """Test `fields` parameter does not limit writable fields."""
+
+        payload = {
+            "title": "Sample test recipe",
+            "time_minutes": 30,
+            "price": Decimal("5.99"),
+        }
+        res = authenticated_client.post(f"{RECIPES_URL}?fields=id", payload)
+
+        assert res.status_code == status.HTTP_201_CREATED
+        assert res.data["title"] == payload["title"]
+
+
+class TestConditionalRequests:
+    """Tests for ETag and Last-Modified handling of Recipes."""
+
+    def test_detail_not_modified(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        django_assert_num_queries,
+    ):
+        """Test detail returns 304 for matching ETag with one query."""
+
+        url = detail_url(recipe_id=create_example_recipe.id)
+        res = authenticated_client.get(url)
+        etag = res["ETag"]
+
+        with django_assert_num_queries(1):
+            res = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert res.status_code == status.HTTP_304_NOT_MODIFIED
+        assert res["ETag"] == etag
+
+    def test_detail_if_modified_since(
+        self,
+        authenticated_client,
+        create_example_recipe,
+    ):
+        """Test detail returns 304 when not modified since given date."""
+
+        url = detail_url(recipe_id=create_example_recipe.id)
+        res = authenticated_client.get(url)
+        last_modified = res["Last-Modified"]
+        res = authenticated_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        assert res.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_detail_etag_changes_with_tags(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_tag_1,
+    ):
+        """Test linking or renaming a Tag changes Recipe ETag."""
+
+        recipe = create_example_recipe
+        tag = create_example_tag_1
+        url = detail_url(recipe_id=recipe.id)
+        etag = authenticated_client.get(url)["ETag"]
+
+        recipe.tags.add(tag)
+        res = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == status.HTTP_200_OK
+        assert res["ETag"] != etag
+
+        etag = res["ETag"]
+        tag.name = "Renamed"
+        tag.save()
+        res = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data["tags"][0]["name"] == "Renamed"
+
+    def test_list_not_modified(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        django_assert_num_queries,
+    ):
+        """Test list returns 304 for matching ETag without queries."""
+
+        etag = authenticated_client.get(RECIPES_URL)["ETag"]
+
+        with django_assert_num_queries(0):
+            res = authenticated_client.get(
+                RECIPES_URL, HTTP_IF_NONE_MATCH=etag
+            )
+        assert res.status_code == status.HTTP_304_NOT_MODIFIED
+
+        create_example_recipe.title = "New title"
+        create_example_recipe.save()
+        res = authenticated_client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert res.status_code == status.HTTP_200_OK
+
+    def test_update_with_stale_if_match_fails(
+        self,
+        authenticated_client,
+        create_example_recipe,
+    ):
+        """Test update is rejected when If-Match does not match ETag."""
+
+        recipe = create_example_recipe
+        url = detail_url(recipe_id=recipe.id)
+        etag = authenticated_client.get(url)["ETag"]
+        recipe.title = "Changed elsewhere"
+        recipe.save()
+
+        res = authenticated_client.patch(
+            url, {"title": "Mine"}, HTTP_IF_MATCH=etag
+        )
+
+        assert res.status_code == status.HTTP_412_PRECONDITION_FAILED
+        recipe.refresh_from_db()
+        assert recipe.title == "Changed elsewhere"
+
+    def test_update_with_current_if_match(
+        self,
+        authenticated_client,
+        create_example_recipe,
+    ):
+        """Test update passes with current ETag and returns the new one."""
+
+        recipe = create_example_recipe
+        url = detail_url(recipe_id=recipe.id)
+        etag = authenticated_client.get(url)["ETag"]
+
+        res = authenticated_client.patch(
+            url, {"title": "Mine"}, HTTP_IF_MATCH=etag
+        )
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res["ETag"] != etag
+        assert res["ETag"] == authenticated_client.get(url)["ETag"]
 
 
 class TestImageUpload:
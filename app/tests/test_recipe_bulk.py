@@ -0,0 +1,221 @@
+"""
+Tests for bulk Recipe update and delete API.
+"""
+import pytest
+from django.urls import reverse
+from recipes.models import Recipe
+from rest_framework import status
+from tags.models import Tag
+
+
+RECIPES_URL = reverse("recipes:recipe-list")
+BULK_URL = reverse("recipes:recipe-bulk")
+pytestmark = pytest.mark.django_db
+
+
+class TestRecipeBulkUpdate:
+    """Tests for bulk partial update of Recipes."""
+
+    def test_bulk_requires_authentication(self, api_client):
+        """Test bulk changes are not available to anonymous users."""
+
+        res = api_client.patch(BULK_URL, {"ids": [1]}, format="json")
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_bulk_update_fields(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+        create_example_recipe_for_user_2,
+    ):
+        """Test fields are updated only on listed Recipes of user."""
+
+        recipes = create_example_recipes_list
+        other = create_example_recipe_for_user_2
+        payload = {
+            "ids": [recipes[0].id, recipes[1].id, other.id, 999999],
+            "time_minutes": 42,
+        }
+        res = authenticated_client.patch(BULK_URL, payload, format="json")
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data["ids"] == [recipes[0].id, recipes[1].id]
+        assert res.data["not_found"] == [other.id, 999999]
+        assert set(
+            Recipe.objects.filter(time_minutes=42).values_list("id", flat=True)
+        ) == {recipes[0].id, recipes[1].id}
+        other.refresh_from_db()
+        assert other.time_minutes != 42
+
+    def test_bulk_add_and_remove_tags(
+        self,
+        authenticated_client,
+        example_user,
+        create_example_recipes_list,
+        create_example_tag_1,
+        create_example_ingredients_list,
+    ):
+        """Test Tags and Ingredients are added and removed by name."""
+
+        recipes = create_example_recipes_list[:3]
+        for recipe in recipes:
+            recipe.tags.add(create_example_tag_1)
+        recipes[0].ingredients.add(*create_example_ingredients_list)
+        payload = {
+            "ids": [recipe.id for recipe in recipes],
+            "add_tags": [{"name": "Quick"}],
+            "remove_tags": [{"name": create_example_tag_1.name}],
+            "remove_ingredients": [{"name": "Ingredient1"}],
+        }
+        res = authenticated_client.patch(BULK_URL, payload, format="json")
+
+        assert res.status_code == status.HTTP_200_OK
+        quick = Tag.objects.get(user=example_user, name="Quick")
+        for recipe in recipes:
+            assert list(recipe.tags.all()) == [quick]
+        assert sorted(
+            recipes[0].ingredients.values_list("name", flat=True)
+        ) == ["Ingredient2", "Ingredient3"]
+        assert create_example_recipes_list[3].tags.count() == 0
+
+    def test_bulk_add_existing_link_is_ignored(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_tag_1,
+    ):
+        """Test adding an already linked Tag keeps a single link."""
+
+        recipe = create_example_recipe
+        recipe.tags.add(create_example_tag_1)
+        payload = {
+            "ids": [recipe.id],
+            "add_tags": [{"name": create_example_tag_1.name}],
+        }
+        res = authenticated_client.patch(BULK_URL, payload, format="json")
+
+        assert res.status_code == status.HTTP_200_OK
+        assert recipe.tags.count() == 1
+
+    def test_bulk_update_query_count_independent_of_ids(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+        django_assert_max_num_queries,
+    ):
+        """Test bulk update runs the same statements for any number of ids."""
+
+        ids = [recipe.id for recipe in create_example_recipes_list]
+        payload = {"price": "9.99", "add_tags": [{"name": "Cheap"}]}
+
+        with django_assert_max_num_queries(50) as small:
+            authenticated_client.patch(
+                BULK_URL, {"ids": ids[:1], **payload}, format="json"
+            )
+        with django_assert_max_num_queries(len(small)):
+            res = authenticated_client.patch(
+                BULK_URL, {"ids": ids, **payload}, format="json"
+            )
+
+        assert res.data["ids"] == sorted(ids)
+
+    def test_bulk_update_changes_etag_and_cached_list(
+        self, authenticated_client, create_example_recipe
+    ):
+        """Test bulk update marks Recipes modified and drops cached lists."""
+
+        recipe = create_example_recipe
+        updated_at = Recipe.objects.get(id=recipe.id).updated_at
+        authenticated_client.get(RECIPES_URL)
+        res = authenticated_client.patch(
+            BULK_URL, {"ids": [recipe.id], "title": "Renamed"}, format="json"
+        )
+        assert res.status_code == status.HTTP_200_OK
+
+        res = authenticated_client.get(RECIPES_URL)
+        assert res.data["results"][0]["title"] == "Renamed"
+        assert Recipe.objects.get(id=recipe.id).updated_at > updated_at
+
+    def test_bulk_requires_ids(self, authenticated_client):
+        """Test bulk request without ids fails."""
+
+        res = authenticated_client.patch(
+            BULK_URL, {"time_minutes": 5}, format="json"
+        )
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "ids" in res.data
+
+    def test_bulk_ids_limited(self, authenticated_client, settings):
+        """Test bulk request over the id limit fails."""
+
+        settings.RECIPES_BULK_MAX_IDS = 2
+        res = authenticated_client.patch(
+            BULK_URL, {"ids": [1, 2, 3]}, format="json"
+        )
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_bulk_update_invalid_field(
+        self, authenticated_client, create_example_recipe
+    ):
+        """Test invalid field value fails without changes."""
+
+        payload = {"ids": [create_example_recipe.id], "time_minutes": "x"}
+        res = authenticated_client.patch(BULK_URL, payload, format="json")
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        create_example_recipe.refresh_from_db()
+        assert create_example_recipe.time_minutes == 5
+
+
+class TestRecipeBulkDelete:
+    """Tests for bulk delete of Recipes."""
+
+    def test_bulk_delete(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+        create_example_recipe_for_user_2,
+        create_example_tag_1,
+    ):
+        """Test listed Recipes of user are deleted with their links."""
+
+        recipes = create_example_recipes_list
+        for recipe in recipes:
+            recipe.tags.add(create_example_tag_1)
+        other = create_example_recipe_for_user_2
+        ids = [recipes[0].id, recipes[1].id, other.id]
+        res = authenticated_client.delete(
+            BULK_URL, {"ids": ids}, format="json"
+        )
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data["ids"] == [recipes[0].id, recipes[1].id]
+        assert res.data["not_found"] == [other.id]
+        assert not Recipe.objects.filter(id__in=ids[:2]).exists()
+        assert Recipe.objects.filter(id=other.id).exists()
+        assert Recipe.tags.through.objects.count() == 3
+        assert Tag.objects.filter(id=create_example_tag_1.id).exists()
+
+    def test_bulk_delete_query_count_independent_of_ids(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+        django_assert_max_num_queries,
+    ):
+        """Test bulk delete does not load or delete Recipes one by one."""
+
+        ids = [recipe.id for recipe in create_example_recipes_list]
+        with django_assert_max_num_queries(50) as small:
+            authenticated_client.delete(
+                BULK_URL, {"ids": ids[:1]}, format="json"
+            )
+        with django_assert_max_num_queries(len(small)):
+            res = authenticated_client.delete(
+                BULK_URL, {"ids": ids[1:]}, format="json"
+            )
+
+        assert len(res.data["ids"]) == 4
+        assert Recipe.objects.count() == 0
@@ -0,0 +1,153 @@
+"""
+Tests for streamed Recipe export API.
+"""
+import csv
+import io
+import json
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from recipes.export import iter_export
+from recipes.models import Recipe
+from rest_framework import status
+
+
+EXPORT_URL = reverse("recipes:recipe-export")
+IMPORT_URL = reverse("recipes:recipe-bulk-import")
+pytestmark = pytest.mark.django_db
+
+
+def read_stream(res):
+    """Return decoded body of streaming response."""
+
+    assert res.streaming
+    return b"".join(res.streaming_content).decode()
+
+
+class TestRecipeExport:
+    """Tests for Recipe export endpoint."""
+
+    def test_export_requires_authentication(self, api_client):
+        """Test export is not available to anonymous users."""
+
+        res = api_client.get(EXPORT_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_export_ndjson(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+        create_example_recipe_for_user_2,
+        create_example_tag_1,
+        create_example_ingredients_list,
+    ):
+        """Test NDJSON export streams all Recipes of user."""
+
+        first = create_example_recipes_list[0]
+        first.tags.add(create_example_tag_1)
+        first.ingredients.add(*create_example_ingredients_list)
+        res = authenticated_client.get(EXPORT_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res["Content-Type"].startswith("application/x-ndjson")
+        assert "recipes.ndjson" in res["Content-Disposition"]
+        items = [json.loads(line) for line in read_stream(res).splitlines()]
+        assert [item["id"] for item in items] == [
+            recipe.id for recipe in create_example_recipes_list
+        ]
+        assert items[0]["tags"] == [
+            {"id": create_example_tag_1.id, "name": create_example_tag_1.name}
+        ]
+        assert len(items[0]["ingredients"]) == 3
+        assert items[1]["price"] == "2.50"
+        assert "description" in items[1]
+
+    def test_export_csv(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_tag_1,
+        create_example_tag_2,
+    ):
+        """Test CSV export flattens related names into one column."""
+
+        recipe = create_example_recipe
+        recipe.tags.add(create_example_tag_1, create_example_tag_2)
+        res = authenticated_client.get(EXPORT_URL, {"format": "csv"})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res["Content-Type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(read_stream(res))))
+        assert len(rows) == 1
+        assert rows[0]["title"] == recipe.title
+        assert sorted(rows[0]["tags"].split("|")) == [
+            create_example_tag_1.name,
+            create_example_tag_2.name,
+        ]
+        assert rows[0]["ingredients"] == ""
+
+    def test_export_csv_by_accept_header(
+        self, authenticated_client, create_example_recipe
+    ):
+        """Test CSV export is chosen by Accept header."""
+
+        res = authenticated_client.get(EXPORT_URL, HTTP_ACCEPT="text/csv")
+
+        assert res["Content-Type"].startswith("text/csv")
+
+    def test_export_queries_per_chunk(
+        self,
+        example_user,
+        create_example_recipes_list,
+        create_example_tag_1,
+        django_assert_num_queries,
+    ):
+        """Test relations are fetched once per chunk of Recipes."""
+
+        for recipe in create_example_recipes_list:
+            recipe.tags.add(create_example_tag_1)
+
+        # one cursor over Recipes and two relation queries per chunk, inside
+        # a savepoint of the test transaction
+        with django_assert_num_queries(9):
+            items = list(iter_export(example_user, chunk_size=2))
+
+        assert len(items) == 5
+        assert all(len(item["tags"]) == 1 for item in items)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_export_reads_cursor_in_transaction(
+        self, example_user, create_example_recipes_list
+    ):
+        """Test rows are streamed from a cursor without hold."""
+
+        items = iter_export(example_user, chunk_size=2)
+        assert not connection.in_atomic_block
+
+        next(items)
+        assert connection.in_atomic_block
+
+        list(items)
+        assert not connection.in_atomic_block
+
+    def test_export_round_trips_through_import(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_tag_1,
+    ):
+        """Test exported NDJSON can be imported again."""
+
+        create_example_recipe.tags.add(create_example_tag_1)
+        body = read_stream(authenticated_client.get(EXPORT_URL))
+        res = authenticated_client.post(
+            IMPORT_URL, body, content_type="application/x-ndjson"
+        )
+
+        assert res.status_code == status.HTTP_201_CREATED
+        assert res.data["created"] == 1
+        imported = Recipe.objects.get(id=res.data["results"][0]["id"])
+        assert imported.title == create_example_recipe.title
+        assert list(imported.tags.all()) == [create_example_tag_1]
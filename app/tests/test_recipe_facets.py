@@ -0,0 +1,140 @@
+"""
+Tests for Recipe facet counts API.
+"""
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from tags.models import Tag
+
+
+FACETS_URL = reverse("recipes:recipe-facets")
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tagged_recipes(
+    example_user,
+    create_example_recipes_list,
+    create_example_recipe_for_user_2,
+    create_example_tag_for_user_2,
+    create_example_ingredients_list,
+):
+    """Link example Recipes to Tags and Ingredients of two users."""
+
+    vegan = Tag.objects.create(user=example_user, name="Vegan")
+    quick = Tag.objects.create(user=example_user, name="Quick")
+    Tag.objects.create(user=example_user, name="Unused")
+    recipes = create_example_recipes_list
+    for recipe in recipes[:3]:
+        recipe.tags.add(vegan)
+    for recipe in recipes[2:]:
+        recipe.tags.add(quick)
+    recipes[0].ingredients.add(*create_example_ingredients_list)
+    recipes[2].ingredients.add(create_example_ingredients_list[0])
+    create_example_recipe_for_user_2.tags.add(create_example_tag_for_user_2)
+
+    return {"vegan": vegan, "quick": quick, "recipes": recipes}
+
+
+class TestRecipeFacets:
+    """Tests for Tag and Ingredient facet counts."""
+
+    def test_facets_require_authentication(self, api_client):
+        """Test facets are not available to anonymous users."""
+
+        res = api_client.get(FACETS_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_invalid_id_filter(self, authenticated_client):
+        """Test malformed id filter returns error instead of counts."""
+
+        res = authenticated_client.get(FACETS_URL, {"tags": "a"})
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "tags" in res.data
+
+    def test_facet_counts(
+        self,
+        authenticated_client,
+        tagged_recipes,
+        create_example_ingredients_list,
+        django_assert_num_queries,
+    ):
+        """Test counts of user's Tags and Ingredients from one query."""
+
+        vegan, quick = tagged_recipes["vegan"], tagged_recipes["quick"]
+        ingredients = create_example_ingredients_list
+        with django_assert_num_queries(1):
+            res = authenticated_client.get(FACETS_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data["tags"] == [
+            {"id": quick.id, "name": "Quick", "count": 3},
+            {"id": vegan.id, "name": "Vegan", "count": 3},
+        ]
+        assert res.data["ingredients"] == [
+            {"id": ingredients[0].id, "name": "Ingredient1", "count": 2},
+            {"id": ingredients[1].id, "name": "Ingredient2", "count": 1},
+            {"id": ingredients[2].id, "name": "Ingredient3", "count": 1},
+        ]
+
+    def test_facets_narrowed_by_filters(
+        self, authenticated_client, tagged_recipes
+    ):
+        """Test facets only count Recipes matching list filters."""
+
+        vegan, quick = tagged_recipes["vegan"], tagged_recipes["quick"]
+        res = authenticated_client.get(FACETS_URL, {"tags": vegan.id})
+
+        assert res.data["tags"] == [
+            {"id": vegan.id, "name": "Vegan", "count": 3},
+            {"id": quick.id, "name": "Quick", "count": 1},
+        ]
+        assert [item["count"] for item in res.data["ingredients"]] == [
+            2,
+            1,
+            1,
+        ]
+
+        res = authenticated_client.get(
+            FACETS_URL, {"tags": f"{vegan.id},{quick.id}", "match": "all"}
+        )
+
+        assert res.data["tags"] == [
+            {"id": quick.id, "name": "Quick", "count": 1},
+            {"id": vegan.id, "name": "Vegan", "count": 1},
+        ]
+
+    def test_facets_narrowed_by_range_filters(
+        self, authenticated_client, tagged_recipes
+    ):
+        """Test facets honor price and time filters of the list."""
+
+        res = authenticated_client.get(
+            FACETS_URL, {"price_max": "2.50", "time_max": 10}
+        )
+
+        assert res.data["tags"] == [
+            {"id": tagged_recipes["vegan"].id, "name": "Vegan", "count": 2},
+        ]
+
+    def test_facets_cached_until_data_changes(
+        self, authenticated_client, tagged_recipes, django_assert_num_queries
+    ):
+        """Test repeated facets are served from cache until Tags change."""
+
+        authenticated_client.get(FACETS_URL)
+        with django_assert_num_queries(0):
+            res = authenticated_client.get(FACETS_URL)
+        assert res["X-Cache"] == "HIT"
+
+        tagged_recipes["recipes"][4].tags.add(tagged_recipes["vegan"])
+        res = authenticated_client.get(FACETS_URL)
+
+        assert res["X-Cache"] == "MISS"
+        assert res.data["tags"][0] == {
+            "id": tagged_recipes["vegan"].id,
+            "name": "Vegan",
+            "count": 4,
+        }
@@ -0,0 +1,272 @@
+"""
+Tests for validating and stripping uploaded Recipe images.
+"""
+import io
+import struct
+import tracemalloc
+import zlib
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, PngImagePlugin
+from recipes.uploads import clean_image_upload, strip_webp
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from tests.helpers import detail_url, image_file, image_upload_url
+
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("media_root"),
+]
+
+
+def png_chunk(kind, data):
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+def png_bomb(width, height):
+    """
+    Return PNG claiming width x height RGB pixels.
+    Its image data inflates to 64 MB from a few kilobytes.
+    """
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        PngImagePlugin._MAGIC
+        + png_chunk(b"IHDR", header)
+        + png_chunk(b"IDAT", zlib.compress(bytes(64 * 1024 * 1024), 9))
+        + png_chunk(b"IEND", b"")
+    )
+
+
+def upload(client, recipe, file):
+    return client.post(
+        image_upload_url(recipe.id), {"image": file}, format="multipart"
+    )
+
+
+class TestImageUploadLimits:
+    """Tests for rejecting unsafe image uploads."""
+
+    @pytest.mark.parametrize("size", [(10_000, 10_000), (100_000, 100_000)])
+    def test_decompression_bomb_rejected_from_header(
+        self, authenticated_client, create_example_recipe, size
+    ):
+        """Test image claiming too many pixels is rejected."""
+
+        file = SimpleUploadedFile("bomb.png", png_bomb(*size))
+        res = upload(authenticated_client, create_example_recipe, file)
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "pixels" in str(res.data["image"][0])
+        create_example_recipe.refresh_from_db()
+        assert not create_example_recipe.image
+
+    def test_decompression_bomb_checked_in_bounded_memory(self):
+        """Test validating a bomb never decodes its image data."""
+
+        file = SimpleUploadedFile("bomb.png", png_bomb(100_000, 100_000))
+        tracemalloc.start()
+        try:
+            with pytest.raises(ValidationError):
+                clean_image_upload(file)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert peak < 1024 * 1024
+
+    def test_pixel_limit_configurable(
+        self, authenticated_client, create_example_recipe, settings
+    ):
+        """Test ordinary image over RECIPES_IMAGE_MAX_PIXELS is rejected."""
+
+        settings.RECIPES_IMAGE_MAX_PIXELS = 1000
+        file = image_file(format="PNG")
+        res = upload(authenticated_client, create_example_recipe, file)
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "1000 pixels" in str(res.data["image"][0])
+
+    def test_upload_over_byte_limit_rejected(
+        self, authenticated_client, create_example_recipe, settings
+    ):
+        """Test upload is aborted once it grows over the byte limit."""
+
+        settings.RECIPES_IMAGE_MAX_BYTES = 1000
+        file = SimpleUploadedFile("big.jpg", b"\xff\xd8\xff" + bytes(5000))
+        res = upload(authenticated_client, create_example_recipe, file)
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "1000 bytes" in str(res.data["image"][0])
+
+    @pytest.mark.parametrize("format", ["GIF", "BMP"])
+    def test_unknown_format_rejected(
+        self, authenticated_client, create_example_recipe, format
+    ):
+        """Test images of other formats are rejected."""
+
+        file = image_file(format=format)
+        res = upload(authenticated_client, create_example_recipe, file)
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_disabled_format_rejected(
+        self, authenticated_client, create_example_recipe, settings
+    ):
+        """Test formats missing from RECIPES_IMAGE_FORMATS are rejected."""
+
+        settings.RECIPES_IMAGE_FORMATS = ["JPEG"]
+        file = image_file(format="PNG")
+        res = upload(authenticated_client, create_example_recipe, file)
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "PNG" in str(res.data["image"][0])
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            b"\xff\xd8\xff\xe0\x00",
+            b"\xff\xd8\xff\xe0\x00\x10JFIF\x00garbage" + bytes(100),
+            PngImagePlugin._MAGIC + png_chunk(b"IHDR", b"short"),
+            png_bomb(10, 10)[:40],
+        ],
+    )
+    def test_corrupted_image_rejected(
+        self, authenticated_client, create_example_recipe, content
+    ):
+        """Test truncated and corrupted images are rejected."""
+
+        file = SimpleUploadedFile("image.jpg", content)
+        res = upload(authenticated_client, create_example_recipe, file)
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_detail_update_cannot_replace_image(
+        self, authenticated_client, create_example_recipe
+    ):
+        """Test images bypassing upload validation are not stored."""
+
+        res = authenticated_client.patch(
+            detail_url(create_example_recipe.id),
+            {"title": "New title", "image": image_file()},
+            format="multipart",
+        )
+
+        assert res.status_code == status.HTTP_200_OK
+        create_example_recipe.refresh_from_db()
+        assert create_example_recipe.title == "New title"
+        assert not create_example_recipe.image
+
+
+class TestImageUploadNames:
+    """Tests for naming stored images after their detected format."""
+
+    def test_client_extension_ignored(
+        self, authenticated_client, create_example_recipe, client
+    ):
+        """Test image named as HTML is stored and served as JPEG."""
+
+        file = image_file()
+        file.name = "image.html"
+        res = upload(authenticated_client, create_example_recipe, file)
+
+        assert res.status_code == status.HTTP_200_OK
+        create_example_recipe.refresh_from_db()
+        assert create_example_recipe.image.name.endswith(".jpg")
+        res = client.get(create_example_recipe.image.url)
+        assert res["Content-Type"] == "image/jpeg"
+
+
+class TestImageMetadataStripping:
+    """Tests for removing metadata from uploaded images."""
+
+    def test_jpeg_exif_stripped_orientation_kept(
+        self, authenticated_client, create_example_recipe
+    ):
+        """Test EXIF is dropped except for orientation."""
+
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = "Camera maker"
+        exif[0x8825] = {2: (52.0, 13.0, 0.0)}
+        file = image_file(exif=exif.tobytes())
+        res = upload(authenticated_client, create_example_recipe, file)
+
+        assert res.status_code == status.HTTP_200_OK
+        create_example_recipe.refresh_from_db()
+        with create_example_recipe.image.open() as stored:
+            content = stored.read()
+        assert b"Camera maker" not in content
+        with Image.open(io.BytesIO(content)) as image:
+            assert dict(image.getexif()) == {0x0112: 6}
+            assert image.size == (600, 300)
+            image.load()
+
+    def test_jpeg_without_orientation_has_no_exif(self):
+        """Test EXIF without orientation is dropped completely."""
+
+        exif = Image.Exif()
+        exif[0x010F] = "Camera maker"
+        file = image_file(exif=exif.tobytes())
+        cleaned = clean_image_upload(SimpleUploadedFile("a.jpg", file.read()))
+
+        with Image.open(cleaned) as image:
+            assert "exif" not in image.info
+
+    def test_png_text_chunks_stripped(
+        self, authenticated_client, create_example_recipe
+    ):
+        """Test PNG text and time chunks are dropped."""
+
+        info = PngImagePlugin.PngInfo()
+        info.add_text("Comment", "secret")
+        info.add_text("Author", "secret", zip=True)
+        info.add_itxt("Title", "secret")
+        file = image_file(format="PNG", pnginfo=info)
+        res = upload(authenticated_client, create_example_recipe, file)
+
+        assert res.status_code == status.HTTP_200_OK
+        create_example_recipe.refresh_from_db()
+        with create_example_recipe.image.open() as stored:
+            content = stored.read()
+        assert b"secret" not in content
+        with Image.open(io.BytesIO(content)) as image:
+            assert image.text == {}
+            image.load()
+
+    def test_webp_metadata_chunks_stripped(self):
+        """Test WebP EXIF and XMP chunks and their flags are dropped."""
+
+        def chunk(kind, data):
+            padding = b"\x00" * (len(data) % 2)
+            return kind + struct.pack("<I", len(data)) + data + padding
+
+        vp8x = bytes([0x10 | 0x08 | 0x04]) + bytes(9)
+        chunks = (
+            chunk(b"VP8X", vp8x)
+            + chunk(b"VP8L", b"image")
+            + chunk(b"EXIF", b"secret")
+            + chunk(b"XMP ", b"<secret/>")
+        )
+        source = io.BytesIO(
+            b"RIFF" + struct.pack("<I", len(chunks) + 4) + b"WEBP" + chunks
+        )
+        target = io.BytesIO()
+
+        strip_webp(source, target)
+
+        content = target.getvalue()
+        assert content == (
+            b"RIFF"
+            + struct.pack("<I", len(content) - 8)
+            + b"WEBP"
+            + chunk(b"VP8X", bytes([0x10]) + bytes(9))
+            + chunk(b"VP8L", b"image")
+        )
@@ -0,0 +1,398 @@
+"""
+Tests for resized Recipe image variants.
+"""
+import hashlib
+import io
+import os
+from unittest.mock import patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+from recipes.images import (
+    build_image_variants,
+    image_storage,
+    resize_image,
+    schedule_image_variants,
+)
+from recipes.models import ImageBlob, Recipe
+from rest_framework import status
+from tests.helpers import detail_url, image_file, image_upload_url
+
+
+RECIPES_URL = reverse("recipes:recipe-list")
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("media_root"),
+]
+
+
+class TestResizeImage:
+    """Tests for resizing images."""
+
+    def test_variants_keep_aspect_ratio(self):
+        """Test variants fit their size without scaling up."""
+
+        variants = resize_image(
+            image_file(), [(128, None), (512, None), (1024, None)]
+        )
+
+        sizes = {
+            size: Image.open(io.BytesIO(content)).size
+            for (size, _), (content, ext) in variants.items()
+        }
+        assert sizes == {1024: (600, 300), 512: (512, 256), 128: (128, 64)}
+        assert {ext for content, ext in variants.values()} == {".jpg"}
+
+    def test_transparent_image_kept_as_png(self):
+        """Test images with alpha channel are stored as PNG."""
+
+        variants = resize_image(
+            image_file(mode="RGBA", format="PNG"), [(128, None)]
+        )
+
+        content, ext = variants[128, None]
+        assert ext == ".png"
+        assert Image.open(io.BytesIO(content)).mode == "RGBA"
+
+
+class TestRecipeImageVariants:
+    """Tests for building and serving image variants."""
+
+    def test_upload_schedules_variants_off_request(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        settings,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test upload hands resizing to the worker pool."""
+
+        settings.RECIPES_IMAGE_WORKERS = 2
+        recipe = create_example_recipe
+        with patch("recipes.images._get_executor") as get_executor:
+            with django_capture_on_commit_callbacks(execute=True):
+                res = authenticated_client.post(
+                    image_upload_url(recipe.id),
+                    {"image": image_file()},
+                    format="multipart",
+                )
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data["image_variants"] == {}
+        submit = get_executor.return_value.submit
+        assert submit.call_args[0][1:] == (
+            build_image_variants,
+            recipe.id,
+            recipe.user_id,
+            Recipe.objects.get(id=recipe.id).image.name,
+        )
+
+    def test_built_variants_change_detail_etag(
+        self, authenticated_client, create_example_recipe
+    ):
+        """Test detail cached before variants were built is not reused."""
+
+        recipe = create_example_recipe
+        authenticated_client.post(
+            image_upload_url(recipe.id),
+            {"image": image_file()},
+            format="multipart",
+        )
+        res = authenticated_client.get(detail_url(recipe.id))
+        assert res.data["image_variants"] == {}
+
+        recipe.refresh_from_db()
+        build_image_variants(recipe.id, recipe.user_id, recipe.image.name)
+        res = authenticated_client.get(
+            detail_url(recipe.id), HTTP_IF_NONE_MATCH=res["ETag"]
+        )
+
+        assert res.status_code == status.HTTP_200_OK
+        assert sorted(res.data["image_variants"]) == ["1024", "128", "512"]
+
+    def test_variants_exposed_on_detail_and_list(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test built variants are returned by detail and list."""
+
+        recipe = create_example_recipe
+        authenticated_client.get(RECIPES_URL)
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.post(
+                image_upload_url(recipe.id),
+                {"image": image_file()},
+                format="multipart",
+            )
+
+        recipe.refresh_from_db()
+        assert sorted(recipe.image_variants) == ["1024", "128", "512"]
+        for name in recipe.image_variants.values():
+            assert image_storage.exists(name)
+
+        res = authenticated_client.get(detail_url(recipe.id))
+        url = res.data["image_variants"]["128"]
+        assert url.startswith("http://testserver/static/media/uploads/")
+        assert url.endswith("_128.jpg")
+
+        res = authenticated_client.get(RECIPES_URL)
+        assert res.data["results"][0]["image_variants"]["128"] == url
+
+    def test_variants_in_fast_list(
+        self, authenticated_client, create_example_recipe, settings
+    ):
+        """Test row serializer returns variant URLs as well."""
+
+        settings.RECIPES_FAST_LIST = True
+        recipe = create_example_recipe
+        recipe.image_variants = {"128": "uploads/recipe/a_128.jpg"}
+        recipe.save()
+
+        res = authenticated_client.get(RECIPES_URL)
+
+        assert res.data["results"][0]["image_variants"] == {
+            "128": "http://testserver/static/media/uploads/recipe/a_128.jpg"
+        }
+
+    def test_variants_reused_for_same_image(
+        self,
+        create_example_recipe,
+        create_example_recipe_for_user_2,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test variants stored for an image are reused by other Recipes."""
+
+        recipes = [create_example_recipe, create_example_recipe_for_user_2]
+        with django_capture_on_commit_callbacks(execute=True):
+            save_image(recipes[0], image_file())
+            schedule_image_variants(recipes[0])
+        with patch("recipes.images.resize_image") as resize:
+            with django_capture_on_commit_callbacks(execute=True):
+                save_image(recipes[1], image_file())
+                schedule_image_variants(recipes[1])
+
+        resize.assert_not_called()
+        for recipe in recipes:
+            recipe.refresh_from_db()
+        assert recipes[0].image_variants == recipes[1].image_variants
+
+    def test_variants_of_replaced_image_dropped(
+        self, create_example_recipe, media_root
+    ):
+        """Test variants built for an image no longer used are deleted."""
+
+        recipe = create_example_recipe
+        name = image_storage.save("uploads/recipe/old.jpg", image_file())
+        recipe.image = "uploads/recipe/new.jpg"
+        recipe.save()
+
+        build_image_variants(recipe.id, recipe.user_id, name)
+
+        recipe.refresh_from_db()
+        assert recipe.image_variants == {}
+        assert os.listdir(media_root / "uploads" / "recipe") == []
+
+    def test_detail_update_keeps_image_and_variants(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test detail update cannot leave variants of a replaced image."""
+
+        recipe = create_example_recipe
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.post(
+                image_upload_url(recipe.id),
+                {"image": image_file()},
+                format="multipart",
+            )
+            res = authenticated_client.patch(
+                detail_url(recipe.id),
+                {"image": image_file(size=(300, 600))},
+                format="multipart",
+            )
+
+        assert res.status_code == status.HTTP_200_OK
+        recipe.refresh_from_db()
+        assert sorted(recipe.image_variants) == ["1024", "128", "512"]
+        assert image_storage.exists(recipe.image.name)
+        for name in recipe.image_variants.values():
+            assert image_storage.exists(name)
+
+
+def save_image(recipe, file):
+    """Store image file on Recipe like an upload does."""
+
+    recipe.image = SimpleUploadedFile("photo.JPEG", file.read())
+    recipe.save()
+
+
+def stored_files(root):
+    """Return names of all files under directory root."""
+
+    return sorted(
+        name for _, _, files in os.walk(root) for name in files
+    )
+
+
+class TestImageDeduplication:
+    """Tests for content-addressed storage of Recipe images."""
+
+    def test_identical_images_stored_once(
+        self,
+        create_example_recipe,
+        create_example_recipe_for_user_2,
+        media_root,
+    ):
+        """Test Recipes with the same image share one file."""
+
+        recipes = [create_example_recipe, create_example_recipe_for_user_2]
+        for recipe in recipes:
+            save_image(recipe, image_file())
+
+        name = recipes[0].image.name
+        digest = os.path.splitext(os.path.basename(name))[0]
+        assert name == f"uploads/recipe/{digest[:2]}/{digest}.jpg"
+        assert recipes[1].image.name == name
+        assert stored_files(media_root) == [f"{digest}.jpg"]
+        assert ImageBlob.objects.get(name=name).ref_count == 2
+
+    def test_upload_through_api_named_by_content(
+        self, authenticated_client, create_example_recipe
+    ):
+        """Test uploaded image name is the hash of its content."""
+
+        file = image_file()
+        digest = hashlib.sha256(file.getvalue()).hexdigest()
+        res = authenticated_client.post(
+            image_upload_url(create_example_recipe.id),
+            {"image": file},
+            format="multipart",
+        )
+
+        assert res.data["image"].endswith(f"/{digest[:2]}/{digest}.jpg")
+        assert ImageBlob.objects.get().ref_count == 1
+
+    def test_reupload_keeps_single_reference(
+        self,
+        create_example_recipe,
+        media_root,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test uploading the same image again keeps it stored."""
+
+        recipe = create_example_recipe
+        save_image(recipe, image_file())
+        with django_capture_on_commit_callbacks(execute=True):
+            save_image(recipe, image_file())
+
+        assert ImageBlob.objects.get(name=recipe.image.name).ref_count == 1
+        assert len(stored_files(media_root)) == 1
+
+    def test_replaced_image_deleted_when_unused(
+        self,
+        create_example_recipe,
+        media_root,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test image replaced by another upload is deleted."""
+
+        recipe = create_example_recipe
+        save_image(recipe, image_file())
+        old = recipe.image.name
+        with django_capture_on_commit_callbacks(execute=True):
+            save_image(recipe, image_file(size=(20, 20)))
+
+        assert not ImageBlob.objects.filter(name=old).exists()
+        assert not image_storage.exists(old)
+        assert image_storage.exists(recipe.image.name)
+
+    def test_cleared_image_deleted_when_unused(
+        self,
+        create_example_recipe,
+        media_root,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test image removed from its only Recipe is deleted."""
+
+        recipe = create_example_recipe
+        save_image(recipe, image_file())
+        old = recipe.image.name
+        with django_capture_on_commit_callbacks(execute=True):
+            recipe.image = None
+            recipe.save()
+
+        assert not ImageBlob.objects.filter(name=old).exists()
+        assert stored_files(media_root) == []
+
+    def test_shared_image_deleted_with_last_recipe(
+        self,
+        create_example_recipe,
+        create_example_recipe_for_user_2,
+        media_root,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test shared image and its variants outlive all but last Recipe."""
+
+        recipes = [create_example_recipe, create_example_recipe_for_user_2]
+        with django_capture_on_commit_callbacks(execute=True):
+            for recipe in recipes:
+                save_image(recipe, image_file())
+            schedule_image_variants(recipes[0])
+        name = recipes[0].image.name
+
+        with django_capture_on_commit_callbacks(execute=True):
+            recipes[0].delete()
+        assert ImageBlob.objects.get(name=name).ref_count == 1
+        assert len(stored_files(media_root)) == 4
+
+        with django_capture_on_commit_callbacks(execute=True):
+            recipes[1].delete()
+        assert not ImageBlob.objects.exists()
+        assert stored_files(media_root) == []
+
+    def test_bulk_delete_releases_images(
+        self,
+        authenticated_client,
+        create_example_recipes_list,
+        media_root,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test bulk delete drops one reference per deleted Recipe."""
+
+        recipes = create_example_recipes_list
+        for recipe in recipes[:3]:
+            save_image(recipe, image_file())
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.delete(
+                reverse("recipes:recipe-bulk"),
+                {"ids": [recipe.id for recipe in recipes[:2]]},
+                format="json",
+            )
+        assert ImageBlob.objects.get().ref_count == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.delete(
+                reverse("recipes:recipe-bulk"),
+                {"ids": [recipes[2].id]},
+                format="json",
+            )
+        assert not ImageBlob.objects.exists()
+        assert stored_files(media_root) == []
+
+    def test_storage_keeps_existing_file(self, media_root):
+        """Test saving an existing name neither renames nor rewrites it."""
+
+        name = image_storage.save("uploads/a.jpg", ContentFile(b"first"))
+        again = image_storage.save("uploads/a.jpg", ContentFile(b"other"))
+
+        assert again == name
+        assert stored_files(media_root) == ["a.jpg"]
+        with image_storage.open(name) as file:
+            assert file.read() == b"first"
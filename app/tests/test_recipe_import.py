@@ -0,0 +1,169 @@
+"""
+Tests for bulk Recipe import API.
+"""
+import json
+
+import pytest
+from django.urls import reverse
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+from rest_framework import status
+from tags.models import Tag
+
+
+RECIPES_URL = reverse("recipes:recipe-list")
+IMPORT_URL = reverse("recipes:recipe-bulk-import")
+pytestmark = pytest.mark.django_db
+
+
+def make_items(count, prefix="Recipe"):
+    """Return list of count importable Recipe payloads."""
+
+    return [
+        {
+            "title": f"{prefix} {i}",
+            "description": f"Imported recipe {i}.",
+            "time_minutes": 10 + i,
+            "price": "4.50",
+            "tags": [{"name": "Imported"}, {"name": f"Tag {i % 3}"}],
+            "ingredients": [{"name": f"Ingredient {i % 5}"}],
+        }
+        for i in range(count)
+    ]
+
+
+class TestRecipeImport:
+    """Tests for bulk Recipe import endpoint."""
+
+    def test_import_requires_authentication(self, api_client):
+        """Test import is not available to anonymous users."""
+
+        res = api_client.post(IMPORT_URL, make_items(1), format="json")
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_import_json_array(
+        self, authenticated_client, example_user, create_example_tag_1
+    ):
+        """Test importing JSON array creates Recipes and related objects."""
+
+        items = make_items(6)
+        items[0]["tags"].append({"name": create_example_tag_1.name})
+        res = authenticated_client.post(IMPORT_URL, items, format="json")
+
+        assert res.status_code == status.HTTP_201_CREATED
+        assert res.data["created"] == 6
+        assert res.data["failed"] == 0
+        assert [result["index"] for result in res.data["results"]] == list(
+            range(6)
+        )
+        recipes = Recipe.objects.filter(user=example_user)
+        assert recipes.count() == 6
+        recipe = recipes.get(id=res.data["results"][0]["id"])
+        assert recipe.description == "Imported recipe 0."
+        assert recipe.tags.count() == 3
+        assert Tag.objects.filter(user=example_user).count() == 5
+        assert Ingredient.objects.filter(user=example_user).count() == 5
+
+    def test_import_ndjson_stream(self, authenticated_client, example_user):
+        """Test importing newline delimited JSON."""
+
+        body = "\n".join(json.dumps(item) for item in make_items(3)) + "\n\n"
+        res = authenticated_client.post(
+            IMPORT_URL, body, content_type="application/x-ndjson"
+        )
+
+        assert res.status_code == status.HTTP_201_CREATED
+        assert res.data["created"] == 3
+        assert Recipe.objects.filter(user=example_user).count() == 3
+
+    def test_import_reports_invalid_items(
+        self, authenticated_client, example_user
+    ):
+        """Test invalid items are reported by index and others imported."""
+
+        items = make_items(3)
+        items[1]["time_minutes"] = "soon"
+        res = authenticated_client.post(IMPORT_URL, items, format="json")
+
+        assert res.status_code == status.HTTP_201_CREATED
+        assert res.data["created"] == 2
+        assert res.data["failed"] == 1
+        assert "time_minutes" in res.data["results"][1]["errors"]
+        assert "id" not in res.data["results"][1]
+        titles = set(
+            Recipe.objects.filter(user=example_user).values_list(
+                "title", flat=True
+            )
+        )
+        assert titles == {"Recipe 0", "Recipe 2"}
+
+    def test_import_malformed_ndjson_writes_nothing(
+        self, authenticated_client
+    ):
+        """Test malformed NDJSON line rejects the whole import."""
+
+        body = json.dumps(make_items(1)[0]) + "\n{not json\n"
+        res = authenticated_client.post(
+            IMPORT_URL, body, content_type="application/x-ndjson"
+        )
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert "line 2" in res.data["detail"]
+        assert Recipe.objects.count() == 0
+
+    @pytest.mark.parametrize("body", ["5", "null", "true", '"text"'])
+    def test_import_rejects_non_list_json(self, authenticated_client, body):
+        """Test JSON body other than array or object is rejected."""
+
+        res = authenticated_client.post(
+            IMPORT_URL, body, content_type="application/json"
+        )
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert Recipe.objects.count() == 0
+
+    def test_import_limited_in_size(self, authenticated_client, settings):
+        """Test import over the item limit writes nothing."""
+
+        settings.RECIPES_IMPORT_CHUNK_SIZE = 2
+        settings.RECIPES_IMPORT_MAX_ITEMS = 3
+        res = authenticated_client.post(
+            IMPORT_URL, make_items(4), format="json"
+        )
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        assert Recipe.objects.count() == 0
+        assert Tag.objects.count() == 0
+
+    def test_import_query_count_independent_of_size(
+        self,
+        authenticated_client,
+        django_assert_max_num_queries,
+    ):
+        """Test a chunk is written in a fixed number of queries."""
+
+        with django_assert_max_num_queries(50) as small:
+            res = authenticated_client.post(
+                IMPORT_URL, make_items(3, "Small"), format="json"
+            )
+        assert res.data["created"] == 3
+
+        Tag.objects.all().delete()
+        Ingredient.objects.all().delete()
+        with django_assert_max_num_queries(len(small)):
+            res = authenticated_client.post(
+                IMPORT_URL, make_items(60, "Large"), format="json"
+            )
+        assert res.data["created"] == 60
+
+    def test_import_invalidates_cached_list(self, authenticated_client):
+        """Test cached Recipe list shows imported Recipes."""
+
+        res = authenticated_client.get(RECIPES_URL)
+        assert res.data["results"] == []
+
+        authenticated_client.post(IMPORT_URL, make_items(2), format="json")
+        res = authenticated_client.get(RECIPES_URL)
+
+        assert len(res.data["results"]) == 2
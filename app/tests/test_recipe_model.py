@@ -1,9 +1,11 @@
 """
 Tests for Recipe model.
 """
+import hashlib
+import os
 import pytest
-from unittest.mock import patch
 from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
 from recipes import models
 
 
@@ -31,12 +33,24 @@ class TestRecipeModel:
         assert models.Recipe.objects.all().count() == 1
         assert isinstance(recipe, models.Recipe) is True
 
-    @patch("recipes.models.uuid.uuid4")
-    def test_recipe_file_name_uuid(self, mock_uuid):
-        """Test generating image path"""
+    def test_recipe_file_name_from_content(self):
+        """Test generating image path from hash of image content."""
 
-        uuid = "test-uuid"
-        mock_uuid.return_value = uuid
-        file_path = models.recipe_image_file_path(None, "example.jpg")
+        content = b"\xff\xd8\xff\xe0image"
+        recipe = models.Recipe(image=SimpleUploadedFile("a.JPG", content))
+        digest = hashlib.sha256(content).hexdigest()
+        file_path = models.recipe_image_file_path(recipe, "example.JPG")
 
-        assert file_path == f"uploads/recipe/{uuid}.jpg"
+        assert file_path == f"uploads/recipe/{digest[:2]}/{digest}.jpg"
+
+    @pytest.mark.parametrize(
+        "content, ext",
+        [(b"\x89PNG\r\n\x1a\nimage", ".png"), (b"<script>", "")],
+    )
+    def test_recipe_file_extension_from_content(self, content, ext):
+        """Test image path ignores the extension of the client file name."""
+
+        recipe = models.Recipe(image=SimpleUploadedFile("a.html", content))
+        file_path = models.recipe_image_file_path(recipe, "a.html")
+
+        assert os.path.splitext(file_path)[1] == ext
@@ -0,0 +1,145 @@
+"""
+Parity tests for fast Recipe list serializer.
+"""
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from recipes.models import Recipe
+from recipes.serializers import RecipeRowSerializer, RecipeSerializer
+from tags.models import Tag
+
+
+RECIPES_URL = reverse("recipes:recipe-list")
+pytestmark = pytest.mark.django_db
+
+
+def normalize(data):
+    """Return serialized Recipes with nested lists in stable order."""
+
+    return [
+        {
+            key: (
+                sorted(value, key=lambda item: item["id"])
+                if isinstance(value, list)
+                else value
+            )
+            for key, value in recipe.items()
+        }
+        for recipe in data
+    ]
+
+
+@pytest.fixture
+def recipes_with_relations(
+    example_user,
+    create_example_recipes_list,
+    create_example_ingredients_list,
+):
+    """Create Recipes covering different relation and value shapes."""
+
+    recipes = create_example_recipes_list
+    tags = [
+        Tag.objects.create(user=example_user, name=f"Tag {i}")
+        for i in range(3)
+    ]
+    recipes[0].tags.add(*tags)
+    recipes[0].ingredients.add(*create_example_ingredients_list)
+    recipes[1].tags.add(tags[0])
+    recipes[2].ingredients.add(create_example_ingredients_list[1])
+    recipes[3].price = Decimal("0.05")
+    recipes[3].link = "http://example.com/recipe/"
+    recipes[3].save()
+    recipes[4].price = Decimal("999.99")
+    recipes[4].save()
+
+    return recipes
+
+
+@pytest.fixture
+def fast_list(settings):
+    settings.RECIPES_FAST_LIST = True
+
+
+class TestRecipeRowSerializer:
+    """Tests comparing RecipeRowSerializer with RecipeSerializer."""
+
+    def test_rows_match_model_serializer(self, recipes_with_relations):
+        """Test row serializer output equals RecipeSerializer output."""
+
+        recipes = Recipe.objects.order_by("-id")
+        expected = RecipeSerializer(recipes, many=True).data
+        rows = recipes.values(*RecipeRowSerializer.columns())
+        data = RecipeRowSerializer(rows, many=True).data
+
+        assert normalize(data) == normalize(expected)
+
+    def test_single_row_matches_model_serializer(
+        self,
+        create_example_recipe,
+        create_example_tag_1,
+    ):
+        """Test serializing a single row equals RecipeSerializer output."""
+
+        recipe = create_example_recipe
+        recipe.tags.add(create_example_tag_1)
+        row = Recipe.objects.values(*RecipeRowSerializer.columns()).get()
+
+        assert RecipeRowSerializer(row).data == RecipeSerializer(recipe).data
+
+    def test_empty_rows(self, django_assert_num_queries):
+        """Test serializing no rows runs no related queries."""
+
+        with django_assert_num_queries(0):
+            data = RecipeRowSerializer([], many=True).data
+
+        assert data == []
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {},
+            {"page_size": 2},
+            {"fields": "id,title"},
+            {"fields": "id,price,tags"},
+            {"tags": "0", "match": "all"},
+            {"search": "sample", "page_size": 2},
+        ],
+    )
+    def test_list_response_parity(
+        self,
+        params,
+        authenticated_client,
+        recipes_with_relations,
+        settings,
+    ):
+        """Test list responses are equal with and without fast path."""
+
+        if "tags" in params:
+            tag = recipes_with_relations[0].tags.first()
+            params = {**params, "tags": str(tag.id)}
+
+        cache.clear()
+        settings.RECIPES_FAST_LIST = False
+        expected = authenticated_client.get(RECIPES_URL, params).json()
+        cache.clear()
+        settings.RECIPES_FAST_LIST = True
+        res = authenticated_client.get(RECIPES_URL, params).json()
+
+        assert normalize(res["results"]) == normalize(expected["results"])
+        assert res["next"] == expected["next"]
+
+    def test_list_query_count(
+        self,
+        authenticated_client,
+        recipes_with_relations,
+        fast_list,
+        django_assert_num_queries,
+    ):
+        """Test fast list fetches rows and each relation once."""
+
+        with django_assert_num_queries(3):
+            res = authenticated_client.get(RECIPES_URL)
+
+        assert len(res.data["results"]) == 5
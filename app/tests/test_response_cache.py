@@ -0,0 +1,176 @@
+"""
+Tests for per-user versioned response cache.
+"""
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from recipes.cache import get_data_version, get_stats
+from recipes.models import Recipe
+from rest_framework import status
+
+
+RECIPES_URL = reverse("recipes:recipe-list")
+TAGS_URL = reverse("recipes:tag-list")
+INGREDIENTS_URL = reverse("recipes:ingredient-list")
+pytestmark = pytest.mark.django_db
+
+
+class TestResponseCache:
+    """Tests for caching list responses."""
+
+    @pytest.mark.parametrize("url", [RECIPES_URL, TAGS_URL, INGREDIENTS_URL])
+    def test_list_served_from_cache(
+        self,
+        url,
+        authenticated_client,
+        create_example_recipe,
+        django_assert_num_queries,
+    ):
+        """Test repeated list request is served without querying."""
+
+        res = authenticated_client.get(url)
+        assert res["X-Cache"] == "MISS"
+
+        with django_assert_num_queries(0):
+            cached = authenticated_client.get(url)
+
+        assert cached.status_code == status.HTTP_200_OK
+        assert cached["X-Cache"] == "HIT"
+        assert cached.json() == res.json()
+        assert get_stats() == {"hits": 1, "misses": 1}
+
+    def test_query_string_normalized(
+        self,
+        authenticated_client,
+        create_example_tag_1,
+    ):
+        """Test order of query parameters does not change cache key."""
+
+        tag = create_example_tag_1
+        authenticated_client.get(f"{RECIPES_URL}?tags={tag.id}&match=all")
+        res = authenticated_client.get(
+            f"{RECIPES_URL}?match=all&tags={tag.id}",
+        )
+
+        assert res["X-Cache"] == "HIT"
+
+    def test_cache_limited_to_user(
+        self,
+        api_client,
+        example_user,
+        example_user_2,
+        create_example_recipe,
+        create_example_recipe_for_user_2,
+    ):
+        """Test cached responses are not shared between users."""
+
+        api_client.force_authenticate(user=example_user)
+        res_1 = api_client.get(RECIPES_URL)
+        api_client.force_authenticate(user=example_user_2)
+        res_2 = api_client.get(RECIPES_URL)
+
+        assert res_2["X-Cache"] == "MISS"
+        assert res_1.data["results"] != res_2.data["results"]
+
+    def test_create_recipe_invalidates_cache(self, authenticated_client):
+        """Test creating a Recipe drops cached list of its owner."""
+
+        authenticated_client.get(RECIPES_URL)
+        payload = {"title": "Sample", "time_minutes": 5, "price": "5.00"}
+        authenticated_client.post(RECIPES_URL, payload)
+        res = authenticated_client.get(RECIPES_URL)
+
+        assert res["X-Cache"] == "MISS"
+        assert len(res.data["results"]) == 1
+
+    def test_update_tag_invalidates_recipe_cache(
+        self,
+        authenticated_client,
+        create_example_recipe,
+        create_example_tag_1,
+    ):
+        """Test renaming a Tag drops cached Recipes using it."""
+
+        tag = create_example_tag_1
+        create_example_recipe.tags.add(tag)
+        authenticated_client.get(RECIPES_URL)
+        tag.name = "Renamed"
+        tag.save()
+        res = authenticated_client.get(RECIPES_URL)
+
+        assert res["X-Cache"] == "MISS"
+        assert res.data["results"][0]["tags"][0]["name"] == "Renamed"
+
+    def test_m2m_change_bumps_version(
+        self,
+        example_user,
+        create_example_recipe,
+        create_example_ingredient,
+    ):
+        """Test changing Recipe relations bumps data version of owner."""
+
+        version = get_data_version(example_user.id)
+        create_example_recipe.ingredients.add(create_example_ingredient)
+        after_add = get_data_version(example_user.id)
+        create_example_recipe.ingredients.clear()
+
+        assert version < after_add < get_data_version(example_user.id)
+
+    def test_delete_recipe_bumps_version(
+        self,
+        example_user,
+        create_example_recipe,
+    ):
+        """Test deleting a Recipe bumps data version of owner."""
+
+        version = get_data_version(example_user.id)
+        Recipe.objects.filter(id=create_example_recipe.id).delete()
+
+        assert get_data_version(example_user.id) > version
+
+    def test_autocomplete_kept_in_local_cache(
+        self,
+        authenticated_client,
+        create_example_tag_1,
+    ):
+        """Test only autocomplete responses use the per-process cache."""
+
+        authenticated_client.get(TAGS_URL)
+        assert len(caches["local"]._cache) == 0
+
+        authenticated_client.get(TAGS_URL, {"q": "sample"})
+        assert len(caches["local"]._cache) == 1
+
+        res = authenticated_client.get(TAGS_URL, {"q": "sample"})
+        assert res["X-Cache"] == "HIT"
+
+    @pytest.mark.parametrize(
+        "backend",
+        [
+            "django.core.cache.backends.locmem.LocMemCache",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ],
+    )
+    def test_cache_backends(
+        self,
+        backend,
+        authenticated_client,
+        create_example_recipe,
+        settings,
+        tmp_path,
+    ):
+        """Test response cache works with local memory and file backends."""
+
+        settings.CACHES = {
+            **settings.CACHES,
+            "default": {
+                "BACKEND": backend,
+                "LOCATION": str(tmp_path),
+            },
+        }
+        authenticated_client.get(RECIPES_URL)
+        res = authenticated_client.get(RECIPES_URL)
+
+        assert res["X-Cache"] == "HIT"
+        assert res.data["results"][0]["id"] == create_example_recipe.id
+        assert get_stats() == {"hits": 1, "misses": 1}
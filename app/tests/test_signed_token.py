@@ -0,0 +1,196 @@
+"""
+Tests for signed stateless API tokens.
+"""
+import time
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from users.serializers import UserSerializer
+
+
+pytestmark = pytest.mark.django_db
+
+
+TOKEN_URL = reverse("users:token")
+ME_URL = reverse("users:me")
+RECIPES_URL = reverse("recipes:recipe-list")
+CREDENTIALS = {"email": "user@example.com", "password": "testpass321!"}
+
+
+@pytest.fixture
+def signed_token(api_client, example_user):
+    """Return signed token issued for example user."""
+
+    res = api_client.post(TOKEN_URL, CREDENTIALS)
+    assert res.status_code == status.HTTP_200_OK
+
+    return res.data["token"]
+
+
+def use_token(client, token):
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+    return client
+
+
+class TestSignedToken:
+    """Tests for issuing and verifying signed tokens."""
+
+    def test_token_endpoint_issues_signed_token(
+        self, api_client, example_user, settings
+    ):
+        """Test token endpoint returns signed token with its lifetime."""
+
+        res = api_client.post(TOKEN_URL, CREDENTIALS)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert ":" in res.data["token"]
+        assert res.data["expires_in"] == settings.AUTH_TOKEN_MAX_AGE
+        assert not Token.objects.filter(user=example_user).exists()
+
+    def test_signed_token_authenticates(self, api_client, signed_token):
+        """Test signed token gives access to the user profile."""
+
+        res = use_token(api_client, signed_token).get(ME_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data["email"] == CREDENTIALS["email"]
+
+    def test_signed_token_skips_token_table(
+        self,
+        api_client,
+        example_user,
+        signed_token,
+        create_example_recipe,
+        django_assert_num_queries,
+    ):
+        """Test cached list is served with no query for authentication."""
+
+        client = use_token(api_client, signed_token)
+        client.get(RECIPES_URL)
+
+        with django_assert_num_queries(0):
+            res = client.get(RECIPES_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res["X-Cache"] == "HIT"
+
+    def test_signed_token_version_loaded_once_after_cache_loss(
+        self, api_client, signed_token, django_assert_num_queries
+    ):
+        """Test token version is read from database on cache miss."""
+
+        client = use_token(api_client, signed_token)
+        cache.clear()
+
+        with django_assert_num_queries(2):
+            res = client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+
+    def test_drf_token_still_works(self, api_client, example_user):
+        """Test tokens stored in the token table keep working."""
+
+        token = Token.objects.create(user=example_user)
+        res = use_token(api_client, token.key).get(ME_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+
+    def test_drf_token_issued_when_disabled(
+        self, api_client, example_user, settings
+    ):
+        """Test token endpoint falls back to DRF tokens."""
+
+        settings.AUTH_SIGNED_TOKENS = False
+        res = api_client.post(TOKEN_URL, CREDENTIALS)
+
+        assert res.data["token"] == Token.objects.get(user=example_user).key
+
+    def test_expired_token_rejected(self, api_client, signed_token, settings):
+        """Test signed token is rejected after its lifetime."""
+
+        later = time.time() + settings.AUTH_TOKEN_MAX_AGE + 1
+        with patch("django.core.signing.time.time", return_value=later):
+            res = use_token(api_client, signed_token).get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_tampered_token_rejected(self, api_client, signed_token):
+        """Test signed token with altered payload is rejected."""
+
+        payload, rest = signed_token.split(":", 1)
+        tampered = f"{payload[:-1]}{'A' if payload[-1] != 'A' else 'B'}:{rest}"
+        res = use_token(api_client, tampered).get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_password_change_revokes_token(self, api_client, signed_token):
+        """Test changing password invalidates issued signed tokens."""
+
+        client = use_token(api_client, signed_token)
+        res = client.patch(ME_URL, {"password": "newpass123!"})
+        assert res.status_code == status.HTTP_200_OK
+
+        res = client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+        assert "revoked" in res.data["detail"]
+
+    def test_password_change_bumps_stored_version(self, example_user):
+        """Test stale user instance never moves the token version back."""
+
+        get_user_model().objects.filter(pk=example_user.pk).update(
+            token_version=5
+        )
+        serializer = UserSerializer(
+            example_user, data={"password": "newpass123!"}, partial=True
+        )
+        assert serializer.is_valid()
+        serializer.save()
+
+        example_user.refresh_from_db()
+        assert example_user.token_version == 6
+        assert example_user.check_password("newpass123!")
+
+    def test_password_hash_upgrade_keeps_tokens(
+        self, api_client, example_user, signed_token, settings
+    ):
+        """Test login upgrading an outdated password hash revokes nothing."""
+
+        settings.PASSWORD_HASHERS = [
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]
+        example_user.password = make_password(
+            CREDENTIALS["password"], hasher="md5"
+        )
+        example_user.save()
+        res = api_client.post(TOKEN_URL, CREDENTIALS)
+        assert res.status_code == status.HTTP_200_OK
+
+        example_user.refresh_from_db()
+        assert example_user.password.startswith("pbkdf2_")
+        assert example_user.token_version == 0
+        for token in (signed_token, res.data["token"]):
+            res = use_token(api_client, token).get(ME_URL)
+            assert res.status_code == status.HTTP_200_OK
+
+        cache.clear()
+        res = use_token(api_client, signed_token).get(ME_URL)
+        assert res.status_code == status.HTTP_200_OK
+
+    def test_inactive_user_rejected(
+        self, api_client, example_user, signed_token
+    ):
+        """Test signed token of deactivated user is rejected."""
+
+        example_user.is_active = False
+        example_user.save()
+        res = use_token(api_client, signed_token).get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
@@ -79,6 +79,20 @@ class TestPrivateTagsApi:
         tag.refresh_from_db()
         assert tag.name == payload["name"]
 
+    def test_update_tag_duplicate_name(
+        self, authenticated_client, create_example_tag_1, create_example_tag_2
+    ):
+        """Test renaming a Tag to another Tag's name fails."""
+
+        url = detail_url(create_example_tag_1.id)
+        res = authenticated_client.patch(
+            url, {"name": create_example_tag_2.name}
+        )
+
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+        create_example_tag_1.refresh_from_db()
+        assert create_example_tag_1.name == "Sample Tag X"
+
     def test_delete_tag(self, authenticated_client, create_example_tag_1):
         """Test deleting a Tag is successful."""
 
@@ -129,3 +143,29 @@ class TestPrivateTagsApi:
         res = authenticated_client.get(TAGS_URL, {"assigned_only": 1})
 
         assert len(res.data) == 1
+
+    def test_autocomplete_tags(
+        self,
+        authenticated_client,
+        create_example_tag_1,
+        create_example_tag_2,
+        create_example_tag_for_user_2,
+    ):
+        """Test autocomplete by name prefix for user Tags."""
+
+        res = authenticated_client.get(TAGS_URL, {"q": "sample tag"})
+
+        assert res.status_code == status.HTTP_200_OK
+        names = [t["name"] for t in res.data]
+        assert names == ["Sample Tag X", "Sample Tag Y"]
+
+    def test_autocomplete_single_character(
+        self,
+        authenticated_client,
+        create_example_tag_1,
+    ):
+        """Test autocomplete matches prefix of a single character."""
+
+        res = authenticated_client.get(TAGS_URL, {"q": "s"})
+
+        assert [t["id"] for t in res.data] == [create_example_tag_1.id]
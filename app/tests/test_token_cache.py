@@ -0,0 +1,194 @@
+"""
+Tests for the per-process cache of DRF token lookups.
+"""
+import time
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from users.authentication import token_cache
+
+
+pytestmark = pytest.mark.django_db
+
+
+ME_URL = reverse("users:me")
+RECIPES_URL = reverse("recipes:recipe-list")
+
+
+@pytest.fixture
+def token_client(api_client, example_user):
+    """Return client authenticated with DRF token of example user."""
+
+    token = Token.objects.create(user=example_user)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    api_client.token = token
+
+    return api_client
+
+
+class TestTokenCache:
+    """Tests for caching validated DRF tokens."""
+
+    def test_repeat_request_skips_token_query(
+        self, token_client, create_example_recipe, django_assert_num_queries
+    ):
+        """Test cached list is served with no query for authentication."""
+
+        token_client.get(RECIPES_URL)
+
+        with django_assert_num_queries(0):
+            res = token_client.get(RECIPES_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res["X-Cache"] == "HIT"
+        assert token_cache.stats() == {
+            "hits": 1,
+            "misses": 1,
+            "hit_rate": 0.5,
+            "size": 1,
+        }
+
+    def test_cached_user_loaded_lazily(self, token_client, example_user):
+        """Test cached token authenticates the user of the token."""
+
+        token_client.get(ME_URL)
+        res = token_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert res.data["email"] == example_user.email
+        assert token_cache.stats()["hits"] == 1
+
+    def test_deleted_token_rejected(self, token_client):
+        """Test deleting token drops it from cache at once."""
+
+        token_client.get(ME_URL)
+        token_client.token.delete()
+
+        res = token_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_token_deleted_in_other_process_rejected(
+        self, token_client, django_capture_on_commit_callbacks
+    ):
+        """Test token deleted elsewhere is dropped on the next hit."""
+
+        token = token_client.token
+        token_client.get(ME_URL)
+        # Entries of a worker that did not see the deletion.
+        entries = dict(token_cache._entries)
+        with django_capture_on_commit_callbacks(execute=True):
+            Token.objects.filter(key=token.key).delete()
+        token_cache._entries.update(entries)
+
+        res = token_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deleted_token_rejected_after_cache_eviction(
+        self, token_client, django_capture_on_commit_callbacks
+    ):
+        """Test losing shared cache entries never restores deleted token."""
+
+        token = token_client.token
+        token_client.get(ME_URL)
+        entries = dict(token_cache._entries)
+        with django_capture_on_commit_callbacks(execute=True):
+            Token.objects.filter(key=token.key).delete()
+        token_cache._entries.update(entries)
+        cache.clear()
+
+        res = token_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_evicted_marker_checked_against_database(
+        self, token_client, django_assert_num_queries
+    ):
+        """Test token is read again once its shared marker is evicted."""
+
+        token_client.get(ME_URL)
+        cache.delete(f"users:drf-token-valid:{token_client.token.key}")
+
+        res = token_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert token_cache.stats()["misses"] == 2
+
+    def test_password_change_invalidates_entry(
+        self, token_client, django_capture_on_commit_callbacks
+    ):
+        """Test changing password makes the token checked again."""
+
+        token_client.get(ME_URL)
+        with django_capture_on_commit_callbacks(execute=True):
+            res = token_client.patch(ME_URL, {"password": "newpass123!"})
+        assert res.status_code == status.HTTP_200_OK
+
+        res = token_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_200_OK
+        assert token_cache.stats()["misses"] == 2
+
+    def test_inactive_user_rejected(
+        self, token_client, example_user, django_capture_on_commit_callbacks
+    ):
+        """Test deactivating user rejects the cached token."""
+
+        token_client.get(ME_URL)
+        with django_capture_on_commit_callbacks(execute=True):
+            example_user.is_active = False
+            example_user.save()
+
+        res = token_client.get(ME_URL)
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_entry_expires(self, token_client, settings):
+        """Test entries are dropped after the cache timeout."""
+
+        token_client.get(ME_URL)
+        later = time.monotonic() + settings.AUTH_TOKEN_CACHE_TIMEOUT + 1
+        with patch("users.authentication.time.monotonic", return_value=later):
+            token_client.get(ME_URL)
+
+        assert token_cache.stats()["hits"] == 0
+
+    def test_cache_size_bounded(self, api_client, example_user, settings):
+        """Test least recently used tokens are dropped over the limit."""
+
+        settings.AUTH_TOKEN_CACHE_SIZE = 2
+        tokens = [
+            Token.objects.create(user=user, key=f"{index:040x}")
+            for index, user in enumerate(
+                [example_user] + [
+                    type(example_user).objects.create_user(
+                        f"user{index}@example.com", "testpass123"
+                    )
+                    for index in range(2)
+                ]
+            )
+        ]
+        for token in tokens:
+            token_cache.set(token.key, token)
+
+        assert token_cache.stats()["size"] == 2
+        assert token_cache.get(tokens[0].key) is None
+        assert token_cache.get(tokens[2].key) is not None
+
+    def test_cache_disabled(
+        self, token_client, settings, django_assert_num_queries
+    ):
+        """Test every request reads the token table with zero timeout."""
+
+        settings.AUTH_TOKEN_CACHE_TIMEOUT = 0
+        token_client.get(RECIPES_URL)
+
+        with django_assert_num_queries(1):
+            token_client.get(RECIPES_URL)
+
+        assert token_cache.stats()["size"] == 0
@@ -0,0 +1,247 @@
+"""
+Authentication for the APIs.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+
+TOKEN_SALT = "users.signed-token"
+TOKEN_VERSION_KEY = "users:token-version:{user_id}"
+TOKEN_VALID_KEY = "users:drf-token-valid:{key}"
+# Cached token version of inactive or deleted users, never matches a token.
+REVOKED = -1
+
+
+def _cached_version(user):
+    return user.token_version if user.is_active else REVOKED
+
+
+def get_token_version(user_id):
+    """
+    Return current token version of user.
+    Versions are kept in the shared cache, the database is only read when
+    the cache entry is missing.
+    """
+
+    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        user = get_user_model().objects.filter(pk=user_id).first()
+        version = REVOKED if user is None else _cached_version(user)
+        # A concurrent writer may have stored a newer version meanwhile.
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+
+    return version
+
+
+def set_token_version(user, deleted=False):
+    """
+    Publish token version of saved or deleted user.
+    The entry is dropped at once and set again on commit, so a rolled back
+    change never leaves a version the database does not have.
+    """
+
+    key = TOKEN_VERSION_KEY.format(user_id=user.pk)
+    version = REVOKED if deleted else _cached_version(user)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.set(key, version, timeout=None))
+
+
+def create_signed_token(user):
+    """Return signed token for user and its lifetime in seconds."""
+
+    payload = {"u": user.pk, "v": user.token_version}
+    token = signing.dumps(payload, salt=TOKEN_SALT, compress=False)
+
+    return token, settings.AUTH_TOKEN_MAX_AGE
+
+
+class TokenCache:
+    """
+    Bounded LRU of validated DRF token keys with expiry.
+    Each worker process keeps its own entries, so they are checked against
+    the shared cache on every hit and dropped when the user's token version
+    changed or the token was deleted meanwhile. Deleting a token removes a
+    marker from the shared cache instead of adding one, so a marker lost to
+    cache eviction only costs a database lookup and never lets a deleted
+    token through.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return cached entry of token key, or None if missing or stale."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires"] > time.monotonic():
+                self._entries.move_to_end(key)
+            else:
+                self._entries.pop(key, None)
+                entry = None
+
+        if entry is not None:
+            valid_key = TOKEN_VALID_KEY.format(key=key)
+            if not cache.get(valid_key) or entry["version"] != (
+                get_token_version(entry["user_id"])
+            ):
+                self.evict(key)
+                entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return entry
+
+    def set(self, key, token):
+        """Cache token validated against the database."""
+
+        timeout = settings.AUTH_TOKEN_CACHE_TIMEOUT
+        version = _cached_version(token.user)
+        entry = {
+            "user_id": token.user_id,
+            "created": token.created,
+            "version": version,
+            "expires": time.monotonic() + timeout,
+        }
+        cache.set(TOKEN_VALID_KEY.format(key=key), True, timeout=timeout)
+        # The user was just read, so hits need not read the version again.
+        cache.add(
+            TOKEN_VERSION_KEY.format(user_id=token.user_id),
+            version,
+            timeout=None,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def evict(self, key=None, user_id=None):
+        """Drop entry of token key, or all entries of user."""
+
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+            if user_id is not None:
+                for cached_key, entry in list(self._entries.items()):
+                    if entry["user_id"] == user_id:
+                        del self._entries[cached_key]
+
+    def clear(self):
+        """Drop all entries and reset counters."""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit and miss counters, hit rate and number of entries."""
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+
+token_cache = TokenCache()
+
+
+def revoke_drf_token(key):
+    """
+    Drop cached DRF token of this process at once and of other processes
+    by deleting its shared marker.
+    The marker is deleted again on commit, in case another process cached
+    the token while the deletion was not yet visible.
+    """
+
+    valid_key = TOKEN_VALID_KEY.format(key=key)
+    token_cache.evict(key)
+    cache.delete(valid_key)
+    transaction.on_commit(lambda: cache.delete(valid_key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    DRF token authentication with recently validated keys cached in process.
+    A cache hit needs no query, the user is loaded lazily with only its id
+    set, like for signed tokens.
+    """
+
+    def authenticate_credentials(self, key):
+        if not settings.AUTH_TOKEN_CACHE_TIMEOUT:
+            return super().authenticate_credentials(key)
+
+        entry = token_cache.get(key)
+        if entry is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, token)
+            return (user, token)
+
+        user_id = entry["user_id"]
+        user = get_user_model().from_db(DEFAULT_DB_ALIAS, ["id"], [user_id])
+        token = Token.from_db(
+            DEFAULT_DB_ALIAS,
+            ["key", "user_id", "created"],
+            [key, user_id, entry["created"]],
+        )
+        return (user, token)
+
+
+class SignedTokenAuthentication(CachedTokenAuthentication):
+    """
+    Token authentication accepting signed tokens besides DRF tokens.
+    Signed tokens hold user id and token version under an HMAC signature
+    with expiry, so they are verified without reading the database.
+    The authenticated user is loaded lazily, only its id is set until
+    another field is accessed. DRF tokens are still accepted and cached
+    the same way as by CachedTokenAuthentication.
+    """
+
+    def authenticate_credentials(self, key):
+        # DRF token keys are hex strings, signed tokens contain separators.
+        if ":" not in key:
+            return super().authenticate_credentials(key)
+
+        try:
+            payload = signing.loads(
+                key, salt=TOKEN_SALT, max_age=settings.AUTH_TOKEN_MAX_AGE
+            )
+        except signing.SignatureExpired:
+            raise AuthenticationFailed(_("Token has expired."))
+        except signing.BadSignature:
+            raise AuthenticationFailed(_("Invalid token."))
+
+        user_id = payload["u"]
+        version = get_token_version(user_id)
+        if version == REVOKED:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        if payload["v"] != version:
+            raise AuthenticationFailed(_("Token has been revoked."))
+
+        user = get_user_model().from_db(DEFAULT_DB_ALIAS, ["id"], [user_id])
+        return (user, payload)
@@ -45,6 +45,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Signed API tokens carry this counter, bumping it revokes all of them.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     objects = UserManager()
 
@@ -2,6 +2,7 @@
 Serializers for the user API VIew.
 """
 from django.contrib.auth import get_user_model, authenticate
+from django.db import transaction
 from rest_framework import serializers
 from django.utils.translation import gettext as _
 
@@ -22,15 +23,33 @@ class UserSerializer(serializers.ModelSerializer):
         return get_user_model().objects.create_user(**validate_data)
 
     def update(self, instance, validated_data):
-        """Update and return user."""
+        """
+        Update and return user.
+        Only the given fields are saved, so a stale instance never writes
+        back an old token version.
+        """
 
         password = validated_data.pop("password", None)
-        user = super().update(instance, validated_data)
-        if password:
-            user.set_password(password)
-            user.save()
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        update_fields = list(validated_data)
 
-        return user
+        with transaction.atomic():
+            if password:
+                # A new password revokes signed tokens issued before it. The
+                # row is locked, so concurrent changes get their own version.
+                version = (
+                    get_user_model()
+                    .objects.select_for_update()
+                    .values_list("token_version", flat=True)
+                    .get(pk=instance.pk)
+                )
+                instance.set_password(password)
+                instance.token_version = version + 1
+                update_fields += ["password", "token_version"]
+            instance.save(update_fields=update_fields)
+
+        return instance
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -0,0 +1,46 @@
+"""
+Signal handlers keeping cached token versions and tokens of users up to date.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from rest_framework.authtoken.models import Token
+from users.authentication import (
+    revoke_drf_token,
+    set_token_version,
+    token_cache,
+)
+
+
+def publish_token_version(sender, instance, update_fields=None, **kwargs):
+    """
+    Publish token version of saved User.
+    Saves of other fields only, like the password hash upgrade on login,
+    leave the published version alone, as the instance may hold a stale
+    one.
+    """
+
+    token_cache.evict(user_id=instance.pk)
+    if update_fields is not None and not (
+        {"token_version", "is_active"} & set(update_fields)
+    ):
+        return
+
+    set_token_version(instance)
+
+
+def revoke_token_version(sender, instance, **kwargs):
+    """Revoke signed tokens of deleted User."""
+
+    set_token_version(instance, deleted=True)
+    token_cache.evict(user_id=instance.pk)
+
+
+def revoke_cached_token(sender, instance, **kwargs):
+    """Drop deleted DRF token from token caches."""
+
+    revoke_drf_token(instance.key)
+
+
+post_save.connect(publish_token_version, sender=get_user_model())
+post_delete.connect(revoke_token_version, sender=get_user_model())
+post_delete.connect(revoke_cached_token, sender=Token)
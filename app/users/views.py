@@ -1,9 +1,13 @@
 """
 Views for the User API.
 """
-from rest_framework import generics, authentication, permissions
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from users.authentication import SignedTokenAuthentication, create_signed_token
 from users.serializers import AuthTokenSerializer, UserSerializer
 
 
@@ -19,15 +23,32 @@ class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        """Return signed token, or DRF token if signed ones are disabled."""
+
+        if not settings.AUTH_SIGNED_TOKENS:
+            return super().post(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token, max_age = create_signed_token(serializer.validated_data["user"])
+
+        return Response({"token": token, "expires_in": max_age})
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
 
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrive and return the authenticated user."""
 
-        return self.request.user
+        user = self.request.user
+        if user.get_deferred_fields():
+            # Signed tokens authenticate a user with only the id loaded.
+            user = get_user_model().objects.get(pk=user.pk)
+
+        return user
@@ -5,6 +5,21 @@ server {
         alias /vol/static;
     }
 
+    # Media URLs are checked by Django, which answers with X-Accel-Redirect
+    # and the Cache-Control header kept by nginx for the file response.
+    location /static/media/ {
+        uwsgi_pass              ${APP_HOST}:${APP_PORT};
+        include                 /etc/nginx/uwsgi_params;
+    }
+
+    location /protected-media/ {
+        internal;
+        alias /vol/static/media/;
+        sendfile on;
+        sendfile_max_chunk 1m;
+        tcp_nopush on;
+    }
+
     location / {
         uwsgi_pass              ${APP_HOST}:${APP_PORT};
         include                 /etc/nginx/uwsgi_params;